@@ -0,0 +1,114 @@
+"""Compare compiled header plans with the previous per-row field mapping.
+
+    python benchmarks/header_schema.py --rows 200000 --tables 20 --extra-columns 6
+
+Builds large synthetic member tables and times turning them into user
+records two ways: the previous code, which keyed each row by header and
+then looked up every field's candidate names, and HeaderSchema, which
+resolves the headers once and applies the plan to every row.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from core.header_schema import FIELD_MAPPINGS, USER_INDICATORS, HeaderSchema  # noqa: E402
+
+LAYOUTS = [
+    ['Name', 'Email', 'Role', 'Status'],
+    ['Full_Name', 'Email_Address', 'Permission', 'Last_Seen', 'State'],
+    ['Display_Name', 'Mail', 'Access_Level', 'Last_Active'],
+]
+
+
+def legacy_is_user_table(headers: List[str]) -> bool:
+    header_text = ' '.join([header.lower() for header in headers])
+    return any(indicator in header_text for indicator in USER_INDICATORS)
+
+
+def legacy_normalize(user_data: Dict[str, str]) -> Dict[str, str]:
+    normalized = {}
+    for standard_field, possible_fields in FIELD_MAPPINGS.items():
+        for field in possible_fields:
+            if field in user_data:
+                normalized[standard_field] = user_data[field]
+                break
+    return normalized
+
+
+def legacy_rows_to_users(headers: List[str], rows: List[List[str]]) -> List[Dict[str, str]]:
+    users = []
+    headers = [header.strip().lower() for header in headers]
+    for cells in rows:
+        if len(cells) >= len(headers):
+            user_data = {}
+            for i, cell in enumerate(cells[:len(headers)]):
+                user_data[headers[i]] = cell.strip()
+            normalized_user = legacy_normalize(user_data)
+            if normalized_user.get('email'):
+                users.append(normalized_user)
+    return users
+
+
+def generate(rows: int, tables: int, extra_columns: int) -> List[Tuple[List[str], List[List[str]]]]:
+    per_table = max(1, rows // tables)
+    result = []
+    for t in range(tables):
+        headers = LAYOUTS[t % len(LAYOUTS)] + [f'Custom {c}' for c in range(extra_columns)]
+        result.append((headers, [
+            [f' {header} {i} ' if 'mail' not in header.lower() else f' user{i}@tenant{t}.example.com '
+             for header in headers]
+            for i in range(per_table)
+        ]))
+    return result
+
+
+def best_of(repeat: int, action: Callable[[], object]) -> Tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = action()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(args):
+    tables = generate(args.rows, args.tables, args.extra_columns)
+
+    def legacy():
+        return [user for headers, rows in tables if legacy_is_user_table(headers)
+                for user in legacy_rows_to_users(headers, rows)]
+
+    def compiled():
+        schema = HeaderSchema()
+        return [user for headers, rows in tables if schema.is_user_table(headers)
+                for user in schema.compile(headers).apply(rows)]
+
+    legacy_seconds, legacy_users = best_of(args.repeat, legacy)
+    compiled_seconds, compiled_users = best_of(args.repeat, compiled)
+    if legacy_users != compiled_users:
+        raise SystemExit("Compiled plans produced different users than the previous code")
+
+    rows = sum(len(rows) for _, rows in tables)
+    print(f"\n{rows} rows in {len(tables)} tables, {len(tables[0][0])}+ columns each")
+    print(f"  per-row mapping   {legacy_seconds:.3f}s  ({rows / legacy_seconds:,.0f} rows/s)")
+    print(f"  compiled plan     {compiled_seconds:.3f}s  ({rows / compiled_seconds:,.0f} rows/s)")
+    print(f"  speedup           {legacy_seconds / compiled_seconds:.1f}x")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Header plan vs. per-row field mapping on synthetic tables")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--tables', type=int, default=20)
+    parser.add_argument('--extra-columns', type=int, default=6,
+                        help="Unmapped columns per table (groups, teams, ...)")
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,340 @@
+"""Local stand-in for the Notion/Dropbox admin consoles, plus a fake OpenAI endpoint.
+
+Serves a login form (optionally followed by an MFA or CAPTCHA page), a members
+page in several layouts and pagination styles, the JSON member APIs the real
+consoles load over XHR, and some static weight (images, fonts, a tracker
+script). Latency can be injected on every request, and requests/bytes served
+and LLM calls are counted for the benchmark report.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+SESSION_COOKIE = 'mock_session'
+
+PAGINATION_STYLES = ('numbered', 'offset', 'none')
+LAYOUTS = ('table', 'cards', 'xhr')
+CHALLENGES = (None, 'mfa', 'captcha')
+
+STATIC_ASSETS = {
+    '/static/avatar.png': ('image/png', 40_000),
+    '/static/inter.woff2': ('font/woff2', 35_000),
+    '/static/app.css': ('text/css', 8_000),
+    '/static/analytics.js': ('application/javascript', 60_000)
+}
+
+PAGE_HEAD = (
+    '<head><title>{title}</title>'
+    '<link rel="stylesheet" href="/static/app.css">'
+    '<style>@font-face {{ font-family: Inter; src: url(/static/inter.woff2); }} body {{ font-family: Inter; }}</style>'
+    '<script src="/static/analytics.js"></script></head>'
+)
+
+LOGIN_PAGE = (
+    '<html>' + PAGE_HEAD.format(title='Log in') + '<body>'
+    '<form method="post" action="/login">'
+    '<input type="email" name="email"><input type="password" name="password">'
+    '<button type="submit">Continue</button></form></body></html>'
+)
+
+MFA_PAGE = (
+    '<html>' + PAGE_HEAD.format(title='Verify') + '<body>'
+    '<form><input type="text" name="verification_code" placeholder="Enter code" class="mfa-input">'
+    '<button type="submit">Verify</button></form></body></html>'
+)
+
+CAPTCHA_PAGE = (
+    '<html>' + PAGE_HEAD.format(title='Verify') + '<body>'
+    '<div class="g-recaptcha" style="width: 300px; height: 80px">captcha</div></body></html>'
+)
+
+# Renders the members table from the console's own JSON API, like the real SPAs do
+XHR_PAGE = """<html>{head}<body><div class="members"><div id="root">Loading...</div></div>
+<script>
+fetch('{endpoint}', {{method: 'POST', headers: {{'content-type': 'application/json'}}, body: JSON.stringify({body})}})
+  .then((response) => response.json())
+  .then((payload) => {{
+    const rows = ({rows})(payload).map((u) =>
+      `<tr><td>${{u.name}}</td><td>${{u.email}}</td><td>${{u.role}}</td><td>Active</td></tr>`).join('');
+    document.getElementById('root').innerHTML =
+      '<table><thead><tr><th>Name</th><th>Email</th><th>Role</th><th>Status</th></tr></thead>' +
+      `<tbody>${{rows}}</tbody></table>`;
+  }});
+</script></body></html>"""
+
+NOTION_ROWS_JS = (
+    "(p) => p.users.map((m) => { const u = p.recordMap.notion_user[m.userId].value; "
+    "return {name: u.name, email: u.email, role: m.role}; })"
+)
+DROPBOX_ROWS_JS = (
+    "(p) => p.members.map((m) => ({name: m.profile.name.display_name, email: m.profile.email, "
+    "role: m.roles[0].name}))"
+)
+
+
+def make_users(count: int) -> List[Dict[str, str]]:
+    roles = ['Member', 'Member', 'Member', 'Admin', 'Guest']
+    return [
+        {'id': f'u{i}', 'name': f'User {i}', 'email': f'user{i}@example.com', 'role': roles[i % len(roles)]}
+        for i in range(count)
+    ]
+
+
+class MockSaaSServer:
+    """aiohttp app emulating an admin console; see module docstring"""
+
+    def __init__(self, users: int = 200, page_size: int = 50, pagination: str = 'numbered',
+                 layout: str = 'table', challenge: Optional[str] = None, latency_ms: float = 0.0,
+                 llm_latency_ms: float = 0.0):
+        if pagination not in PAGINATION_STYLES:
+            raise ValueError(f"Unknown pagination style: {pagination}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        if challenge not in CHALLENGES:
+            raise ValueError(f"Unknown challenge: {challenge}")
+
+        self.users = make_users(users)
+        self.page_size = page_size if pagination != 'none' else max(users, 1)
+        self.pagination = pagination
+        self.layout = layout
+        self.challenge = challenge
+        self.latency = latency_ms / 1000
+        self.llm_latency = llm_latency_ms / 1000
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'bytes': 0, 'llm_calls': 0, 'api_calls': 0}
+
+    # -- plumbing ------------------------------------------------------------
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.stats['requests'] += 1
+        try:
+            response = await handler(request)
+        except web.HTTPException as error:
+            # Redirects and errors are raised, not returned
+            self.stats['bytes'] += len(error.text or '')
+            raise
+        body = getattr(response, 'body', None)
+        if isinstance(body, (bytes, bytearray)):
+            self.stats['bytes'] += len(body)
+        return response
+
+    def _logged_in(self, request: web.Request) -> bool:
+        return request.cookies.get(SESSION_COOKIE) == 'ok'
+
+    async def start(self) -> 'MockSaaSServer':
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get('/login', self.login_page)
+        app.router.add_post('/login', self.login_submit)
+        app.router.add_get('/verify', self.challenge_page)
+        app.router.add_get('/settings/members', self.members_page)
+        app.router.add_get('/team/admin/members', self.members_page)
+        app.router.add_post('/api/v3/getVisibleUsers', self.notion_api)
+        app.router.add_post('/2/team/members/list_v2', self.dropbox_list)
+        app.router.add_post('/2/team/members/list/continue_v2', self.dropbox_continue)
+        app.router.add_get('/static/{name}', self.static_asset)
+        app.router.add_post('/v1/chat/completions', self.chat_completions)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    # -- login ---------------------------------------------------------------
+
+    async def login_page(self, request: web.Request) -> web.Response:
+        return web.Response(text=LOGIN_PAGE, content_type='text/html')
+
+    async def login_submit(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if not form.get('email') or not form.get('password'):
+            raise web.HTTPFound('/login')
+        if self.challenge:
+            raise web.HTTPFound('/verify')
+        response = web.HTTPFound('/settings/members')
+        response.set_cookie(SESSION_COOKIE, 'ok')
+        raise response
+
+    async def challenge_page(self, request: web.Request) -> web.Response:
+        page = MFA_PAGE if self.challenge == 'mfa' else CAPTCHA_PAGE
+        return web.Response(text=page, content_type='text/html')
+
+    # -- members page --------------------------------------------------------
+
+    def _page_bounds(self, request: web.Request):
+        if self.pagination == 'offset':
+            offset = int(request.query.get('offset', 0))
+        else:
+            offset = (int(request.query.get('page', 1)) - 1) * self.page_size
+        offset = max(0, min(offset, len(self.users)))
+        return offset, min(offset + self.page_size, len(self.users))
+
+    def _page_link(self, path: str, offset: int) -> str:
+        if self.pagination == 'offset':
+            return f'{path}?offset={offset}'
+        return f'{path}?page={offset // self.page_size + 1}'
+
+    def _pagination_html(self, path: str, start: int) -> str:
+        if self.pagination == 'none':
+            return ''
+        total_pages = (len(self.users) + self.page_size - 1) // self.page_size
+        current = start // self.page_size + 1
+        links = []
+        if current > 1:
+            links.append(f'<a class="prev" href="{self._page_link(path, start - self.page_size)}">Prev</a>')
+        for number in range(1, total_pages + 1):
+            css = ' class="current"' if number == current else ''
+            links.append(f'<a{css} href="{self._page_link(path, (number - 1) * self.page_size)}">{number}</a>')
+        if current < total_pages:
+            links.append(f'<a class="next" href="{self._page_link(path, start + self.page_size)}">Next</a>')
+        else:
+            links.append('<button class="next" disabled>Next</button>')
+        return f'<div class="pagination">{"".join(links)}</div>'
+
+    def _rows_html(self, users: List[Dict[str, str]]) -> str:
+        if self.layout == 'cards':
+            items = ''.join(
+                f'<li class="member"><img src="/static/avatar.png" width="24" height="24">'
+                f'<span class="name">{u["name"]}</span> <span class="email">{u["email"]}</span> '
+                f'<span class="role">{u["role"]}</span></li>'
+                for u in users
+            )
+            return f'<ul class="member-list">{items}</ul>'
+        rows = ''.join(
+            f'<tr><td><img src="/static/avatar.png" width="24" height="24">{u["name"]}</td>'
+            f'<td>{u["email"]}</td><td>{u["role"]}</td><td>Active</td>'
+            f'<td><div role="button">...</div></td></tr>'
+            for u in users
+        )
+        return (
+            '<table><thead><tr><th>Name</th><th>Email</th><th>Role</th><th>Status</th><th></th></tr></thead>'
+            f'<tbody>{rows}</tbody></table>'
+        )
+
+    async def members_page(self, request: web.Request) -> web.Response:
+        if not self._logged_in(request):
+            raise web.HTTPFound('/login')
+
+        head = PAGE_HEAD.format(title='Members')
+        if self.layout == 'xhr':
+            if request.path.startswith('/team'):
+                page = XHR_PAGE.format(head=head, endpoint='/2/team/members/list_v2',
+                                       body=json.dumps({'limit': self.page_size}), rows=DROPBOX_ROWS_JS)
+            else:
+                page = XHR_PAGE.format(head=head, endpoint='/api/v3/getVisibleUsers',
+                                       body=json.dumps({'spaceId': 'space-1'}), rows=NOTION_ROWS_JS)
+            return web.Response(text=page, content_type='text/html')
+
+        start, end = self._page_bounds(request)
+        page = (
+            f'<html>{head}<body><div class="members">'
+            '<input placeholder="Search members">'
+            f'{self._rows_html(self.users[start:end])}'
+            f'{self._pagination_html(request.path, start)}'
+            '</div></body></html>'
+        )
+        return web.Response(text=page, content_type='text/html')
+
+    # -- JSON member APIs ----------------------------------------------------
+
+    async def notion_api(self, request: web.Request) -> web.Response:
+        if not self._logged_in(request):
+            raise web.HTTPUnauthorized()
+        self.stats['api_calls'] += 1
+        return web.json_response({
+            'users': [{'userId': u['id'], 'role': u['role']} for u in self.users],
+            'recordMap': {'notion_user': {
+                u['id']: {'value': {'id': u['id'], 'name': u['name'], 'email': u['email']}} for u in self.users
+            }}
+        })
+
+    def _dropbox_page(self, offset: int, limit: int) -> Dict[str, Any]:
+        end = min(offset + limit, len(self.users))
+        return {
+            'members': [
+                {'profile': {'email': u['email'], 'name': {'display_name': u['name']}, 'status': {'.tag': 'active'}},
+                 'roles': [{'name': u['role']}]}
+                for u in self.users[offset:end]
+            ],
+            'cursor': f'{end}:{limit}',
+            'has_more': end < len(self.users)
+        }
+
+    async def dropbox_list(self, request: web.Request) -> web.Response:
+        if not self._logged_in(request):
+            raise web.HTTPUnauthorized()
+        self.stats['api_calls'] += 1
+        body = await request.json()
+        return web.json_response(self._dropbox_page(0, int(body.get('limit', self.page_size))))
+
+    async def dropbox_continue(self, request: web.Request) -> web.Response:
+        if not self._logged_in(request):
+            raise web.HTTPUnauthorized()
+        self.stats['api_calls'] += 1
+        body = await request.json()
+        offset, limit = (int(part) for part in body['cursor'].split(':'))
+        return web.json_response(self._dropbox_page(offset, limit))
+
+    async def static_asset(self, request: web.Request) -> web.Response:
+        path = request.path
+        if path not in STATIC_ASSETS:
+            raise web.HTTPNotFound()
+        content_type, size = STATIC_ASSETS[path]
+        return web.Response(body=b'\0' * size, content_type=content_type)
+
+    # -- fake OpenAI ---------------------------------------------------------
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        prompt = body['messages'][-1]['content']
+        self.stats['llm_calls'] += 1
+        if self.llm_latency:
+            await asyncio.sleep(self.llm_latency)
+
+        if 'Analyze this page' in prompt:
+            content: Any = {'selectors': {}, 'actions': [], 'confidence': 0.5}
+        elif 'Generate automation steps' in prompt:
+            content = []
+        elif '--- Document' in prompt:
+            documents = re.findall(r'--- Document (\d+) ---', prompt)
+            chunks = re.split(r'--- Document \d+ ---', prompt)[1:]
+            content = {number: self._users_in(chunk) for number, chunk in zip(documents, chunks)}
+        else:
+            content = self._users_in(prompt)
+
+        return web.json_response({
+            'id': 'chatcmpl-bench',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body['model'],
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': json.dumps(content)}
+            }],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 50, 'total_tokens': len(prompt) // 4 + 50}
+        })
+
+    def _users_in(self, text: str) -> List[Dict[str, str]]:
+        by_email = {u['email']: u for u in self.users}
+        return [
+            {'name': by_email[email]['name'], 'email': email, 'role': by_email[email]['role']}
+            for email in dict.fromkeys(re.findall(r'user\d+@example\.com', text)) if email in by_email
+        ]
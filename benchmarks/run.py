@@ -0,0 +1,276 @@
+"""Run adapter flows end-to-end against the local mock console and report timings.
+
+    python benchmarks/run.py --users 500 --page-size 50 --repeat 5
+    python benchmarks/run.py --scenarios notion_table,dropbox_xhr --latency-ms 40 --compare
+
+Each scenario starts a MockSaaSServer, drives the real adapter through a
+BrowserPool and records per-operation durations (p50/p95), LLM calls, bytes
+and requests served, and time spent parsing HTML. Results are written to
+benchmarks/results/<timestamp>.json; --compare prints the change against the
+previous result file.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from mock_saas import MockSaaSServer, SESSION_COOKIE  # noqa: E402
+from core.ai_agent import AIAgent  # noqa: E402
+from core.browser_pool import BrowserPool  # noqa: E402
+from core.data_extractor import DataExtractor  # noqa: E402
+from adapters.notion_adapter import NotionAdapter  # noqa: E402
+from adapters.dropbox_adapter import DropboxAdapter  # noqa: E402
+
+logger = logging.getLogger('benchmarks')
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+SCENARIOS = {
+    'notion_table': {'adapter': 'notion', 'server': {'layout': 'table'}},
+    'notion_offset': {'adapter': 'notion', 'server': {'layout': 'table', 'pagination': 'offset'}},
+    'notion_prefetch': {'adapter': 'notion', 'server': {'layout': 'table'}, 'options': {'pagination_concurrency': 4}},
+    'notion_cards': {'adapter': 'notion', 'server': {'layout': 'cards', 'pagination': 'none'}},
+    'notion_xhr': {'adapter': 'notion', 'server': {'layout': 'xhr'}},
+    'notion_mfa': {'adapter': 'notion', 'server': {'challenge': 'mfa'}},
+    'notion_captcha': {'adapter': 'notion', 'server': {'challenge': 'captcha'}},
+    'dropbox_table': {'adapter': 'dropbox', 'server': {'layout': 'table', 'pagination': 'none'}},
+    'dropbox_xhr': {'adapter': 'dropbox', 'server': {'layout': 'xhr'}}
+}
+
+CREDENTIALS = {'email': 'admin@example.com', 'password': 'benchmark'}
+
+
+class TimedDataExtractor(DataExtractor):
+    """DataExtractor that accumulates time spent parsing and normalizing rows"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.parse_seconds = 0.0
+
+    def parse(self, html_content):
+        started = time.perf_counter()
+        try:
+            return super().parse(html_content)
+        finally:
+            self.parse_seconds += time.perf_counter() - started
+
+    def _rows_to_users(self, headers, rows, schema=None):
+        started = time.perf_counter()
+        try:
+            return super()._rows_to_users(headers, rows, schema)
+        finally:
+            self.parse_seconds += time.perf_counter() - started
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize_durations(durations: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        operation: {
+            'count': len(values),
+            'p50': round(percentile(values, 0.5), 4),
+            'p95': round(percentile(values, 0.95), 4),
+            'mean': round(statistics.fmean(values), 4)
+        }
+        for operation, values in durations.items() if values
+    }
+
+
+def adapter_config(base_url: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        **(options or {}),
+        'state_probe_timeout': 3000,
+        'notion': {
+            'base_url': base_url,
+            'login_url': f'{base_url}/login',
+            'admin_url': f'{base_url}/settings/members'
+        }
+    }
+
+
+async def timed(durations: Dict[str, List[float]], operation: str, coroutine):
+    started = time.perf_counter()
+    try:
+        return await coroutine
+    finally:
+        durations.setdefault(operation, []).append(time.perf_counter() - started)
+
+
+async def run_once(name: str, scenario: Dict[str, Any], server: MockSaaSServer, pool: BrowserPool,
+                   ai_agent: AIAgent, extractor: TimedDataExtractor, repetition: int,
+                   durations: Dict[str, List[float]]) -> Dict[str, Any]:
+    config = adapter_config(server.base_url, scenario.get('options'))
+    adapter_name = scenario['adapter']
+
+    async with pool.session(f'{name}:{repetition}', adapter=adapter_name) as browser_manager:
+        if adapter_name == 'notion':
+            adapter = NotionAdapter(config, browser_manager, ai_agent, extractor)
+            logged_in = await timed(durations, 'login', adapter.login(CREDENTIALS))
+        else:
+            # DropboxAdapter.login drives a form this mock does not model; seed the session cookie instead
+            adapter = DropboxAdapter(config, browser_manager, ai_agent, extractor)
+            adapter.admin_url = f'{server.base_url}/team/admin/members'
+            await browser_manager.context.add_cookies(
+                [{'name': SESSION_COOKIE, 'value': 'ok', 'url': server.base_url}]
+            )
+            adapter.session_active = logged_in = True
+
+        if not logged_in:
+            return {'logged_in': False, 'users': 0}
+
+        users = await timed(durations, 'extract_users', adapter.extract_users())
+        return {'logged_in': True, 'users': len(users)}
+
+
+async def run_scenario(name: str, args) -> Dict[str, Any]:
+    scenario = SCENARIOS[name]
+    server_options = {
+        'users': args.users,
+        'page_size': args.page_size,
+        'latency_ms': args.latency_ms,
+        'llm_latency_ms': args.llm_latency_ms,
+        **scenario['server']
+    }
+    server = await MockSaaSServer(**server_options).start()
+    browser_config = {
+        'headless': True,
+        'lean': {
+            'enabled': args.lean,
+            'viewport': {'width': 1280, 'height': 720},
+            'first_party': {'notion': ['127.0.0.1'], 'dropbox': ['127.0.0.1']}
+        },
+        'pool': {'max_size': 2}
+    }
+    pool = await BrowserPool(browser_config).start()
+    ai_agent = AIAgent(api_key='benchmark', model='gpt-4', base_url=f'{server.base_url}/v1')
+    extractor = TimedDataExtractor(ai_agent, parser=args.parser)
+
+    durations: Dict[str, List[float]] = {}
+    outcomes = []
+    started = time.perf_counter()
+    try:
+        for repetition in range(args.repeat):
+            outcomes.append(await run_once(name, scenario, server, pool, ai_agent, extractor,
+                                           repetition, durations))
+    finally:
+        wall_time = time.perf_counter() - started
+        await pool.close()
+        await server.stop()
+
+    return {
+        'scenario': name,
+        'adapter': scenario['adapter'],
+        'server': server_options,
+        'wall_time': round(wall_time, 4),
+        'operations': summarize_durations(durations),
+        'llm_calls': server.stats['llm_calls'],
+        'api_calls': server.stats['api_calls'],
+        'requests': server.stats['requests'],
+        'bytes': server.stats['bytes'],
+        'parse_seconds': round(extractor.parse_seconds, 4),
+        'users_extracted': [outcome['users'] for outcome in outcomes],
+        'logged_in': [outcome['logged_in'] for outcome in outcomes],
+        'lean': dict(pool.profile.stats)
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def latest_results(exclude: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    paths = sorted(path for path in glob.glob(os.path.join(RESULTS_DIR, '*.json')) if path != exclude)
+    if not paths:
+        return None
+    with open(paths[-1], 'r') as file:
+        return json.load(file)
+
+
+def print_report(report: Dict[str, Any], previous: Optional[Dict[str, Any]] = None):
+    before = {r['scenario']: r for r in previous['results']} if previous else {}
+    print(f"\nrevision {report['revision']}  users={report['args']['users']} repeat={report['args']['repeat']}")
+    for result in report['results']:
+        print(
+            f"\n{result['scenario']}: wall {result['wall_time']:.2f}s, llm {result['llm_calls']}, "
+            f"requests {result['requests']}, {result['bytes'] / 1_000_000:.2f} MB, "
+            f"parse {result['parse_seconds']:.3f}s, users {result['users_extracted']}"
+        )
+        old_operations = before.get(result['scenario'], {}).get('operations', {})
+        for operation, stats in result['operations'].items():
+            line = f"  {operation:<14} p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s"
+            if operation in old_operations and old_operations[operation]['p50']:
+                change = (stats['p50'] - old_operations[operation]['p50']) / old_operations[operation]['p50']
+                line += f"  ({change:+.0%} p50 vs {previous['revision']})"
+            print(line)
+
+
+async def main(args):
+    names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        logger.info(f"Running {name}...")
+        results.append(await run_scenario(name, args))
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'args': vars(args),
+        'results': results
+    }
+
+    previous = latest_results() if args.compare else None
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + '.json')
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print_report(report, previous)
+    print(f"\nSaved {path}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark adapter flows against a local mock console")
+    parser.add_argument('--scenarios', help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Injected latency per console request")
+    parser.add_argument('--llm-latency-ms', type=float, default=200.0, help="Injected latency per LLM call")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--parser', default='lxml')
+    parser.add_argument('--lean', action=argparse.BooleanOptionalAction, default=True,
+                        help="Use the lean browser profile (default: on)")
+    parser.add_argument('--compare', action='store_true', help="Show p50 change against the previous results file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    asyncio.run(main(parse_args()))
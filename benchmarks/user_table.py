@@ -0,0 +1,101 @@
+"""Compare dict-per-user aggregation with UserTable for a large member directory.
+
+    python benchmarks/user_table.py --users 200000 --tenants 20
+
+Reports traced memory for holding the users and the time to export them:
+a list of dicts dumped with json.dump (what --output does with job results)
+versus a UserTable streamed to JSONL and CSV.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from core.user_table import UserTable  # noqa: E402
+
+ROLES = ('Member', 'Admin', 'Guest', 'Workspace Owner')
+
+
+def generate(users: int, tenants: int) -> List[Tuple[str, List[Dict[str, str]]]]:
+    per_tenant = max(1, users // tenants)
+    # Values are built with join() so equal strings are separate objects, as when parsed from pages
+    return [
+        (f'tenant-{t}', [
+            {
+                'name': ''.join(['User ', str(i)]),
+                'email': ''.join(['user', str(i), '@tenant', str(t), '.example.com']),
+                'role': ''.join([ROLES[i % len(ROLES)]]),
+                'status': ''.join(['active'])
+            }
+            for i in range(per_tenant)
+        ])
+        for t in range(tenants)
+    ]
+
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, float, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current / 1_000_000, elapsed
+
+
+def timed(action: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+def main(args):
+    source = generate(args.users, args.tenants)
+    # Round-trip through JSON so each record's strings are fresh, as from the job queue
+    source = json.loads(json.dumps(source))
+
+    def build_dicts():
+        return [{'adapter': 'notion', 'tenant': tenant, **user} for tenant, users in source for user in users]
+
+    def build_table():
+        table = UserTable.from_users([], adapter='', tenant='')
+        for tenant, users in source:
+            table.extend(users, adapter='notion', tenant=tenant)
+        return table
+
+    dicts, dict_mb, dict_build = measure(build_dicts)
+    table, table_mb, table_build = measure(build_table)
+
+    with tempfile.TemporaryDirectory() as directory:
+        def dump_dicts():
+            with open(os.path.join(directory, 'users.json'), 'w') as file:
+                json.dump(dicts, file, indent=2, default=str)
+
+        dict_export = timed(dump_dicts)
+        jsonl_export = timed(lambda: table.export(os.path.join(directory, 'users.jsonl')))
+        csv_export = timed(lambda: table.export(os.path.join(directory, 'users.csv')))
+        normalize = timed(lambda: table.normalized().deduplicated())
+
+    print(f"\n{len(dicts)} users across {args.tenants} tenants")
+    print(f"  list of dicts   {dict_mb:8.1f} MB  build {dict_build:.2f}s  json.dump {dict_export:.2f}s")
+    print(f"  UserTable       {table_mb:8.1f} MB  build {table_build:.2f}s  "
+          f"jsonl {jsonl_export:.2f}s  csv {csv_export:.2f}s")
+    print(f"  normalize+dedup {normalize:.2f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Memory and export time of UserTable vs. lists of dicts")
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--tenants', type=int, default=10)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -1,28 +1,74 @@
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from collections import deque
+from contextlib import aclosing
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
+import asyncio
 import logging
+import time
+from core.dom_fingerprint import dom_fingerprint
+from core.header_schema import DEFAULT_FUZZY_CUTOFF, header_schema
+from core.page_state import PageStateClassifier, MFA, CAPTCHA
+from core.response_capture import ResponseCapture, persistable_entry
+from core.user_export import USER_FIELDS, export_format, finish_export, open_writer, partial_path, user_rows
+from core.user_snapshot import diff_users, user_key
+from core.telemetry import telemetry
 
 logger = logging.getLogger(__name__)
 
 class BaseSaaSAdapter(ABC):
+    name = 'saas'
+    admin_url: Optional[str] = None
+    # URL regexes of the console's internal member-list API, if it has one
+    api_patterns: List[str] = []
+    # Waited for before reading members from the rendered admin page
+    member_list_selector = 'table'
+    # Extra member-table header names per user field ({'email': ['login']}), before the built-in ones
+    header_synonyms: Dict[str, List[str]] = {}
+    # Shown only once logged in; lets page-state probes return at once on a clean page
+    logged_in_selectors: List[str] = []
+    # Part of the login page URL; any other URL counts as logged in for page-state probes
+    login_url_marker: Optional[str] = None
+    # Candidates for the logout control, reordered by find_selector's stats
+    logout_selectors = [
+        'a[href*="logout"]',
+        'button[class*="logout"]',
+        '.logout',
+        '#logout'
+    ]
+    
     def __init__(self, config: Dict[str, Any], browser_manager, ai_agent, data_extractor):
         self.config = config
         self.browser_manager = browser_manager
         self.ai_agent = ai_agent
         self.data_extractor = data_extractor
+        self.auth_handler = None
+        self.selector_store = None
+        self.snapshot_store = None
+        self.checkpoint_store = None
+        self.tenant = 'default'
         self.session_active = False
+        self.bulk_concurrency = config.get('bulk_concurrency', 1)
+        self.pagination_concurrency = config.get('pagination_concurrency', 1)
+        self.max_api_pages = config.get('max_api_pages', 1000)
+        self.header_schema = header_schema(
+            self._header_synonyms(config.get(self.name, {}).get('header_synonyms', {})),
+            config.get('header_fuzzy_cutoff', DEFAULT_FUZZY_CUTOFF)
+        )
+        self._admin_landing_url: Optional[str] = None
+    
+    def _header_synonyms(self, configured: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Configured header names first, then the adapter's own"""
+        synonyms = {field: list(names) for field, names in configured.items()}
+        for field, names in self.header_synonyms.items():
+            synonyms.setdefault(field, []).extend(name for name in names if name not in synonyms[field])
+        return synonyms
     
     @abstractmethod
     async def login(self, credentials: Dict[str, str]) -> bool:
         """Login to SaaS application"""
         pass
     
-    @abstractmethod
-    async def extract_users(self) -> List[Dict[str, str]]:
-        """Extract all users from the application"""
-        pass
-    
     @abstractmethod
     async def create_user(self, user_data: Dict[str, str]) -> bool:
         """Create a new user"""
@@ -38,60 +84,610 @@ class BaseSaaSAdapter(ABC):
         """Update user information"""
         pass
     
+    async def create_users(self, users: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Create many users; returns one {'item', 'success', 'error'} result per user"""
+        return await self._run_bulk(users, lambda adapter, batch: adapter._create_batch(batch))
+    
+    async def delete_users(self, user_identifiers: List[str]) -> List[Dict[str, Any]]:
+        """Delete many users; returns one result per identifier"""
+        return await self._run_bulk(user_identifiers, lambda adapter, batch: adapter._delete_batch(batch))
+    
+    async def update_users(self, updates: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Apply {identifier: updates}; returns one result per identifier"""
+        items = list(updates.items())
+        return await self._run_bulk(
+            items, lambda adapter, batch: adapter._update_batch(batch), label=lambda item: item[0]
+        )
+    
+    async def _create_batch(self, users: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Generic fallback: one create_user per item. Adapters override with grouped forms."""
+        return [await self._bulk_result(user, self.create_user(user)) for user in users]
+    
+    async def _delete_batch(self, user_identifiers: List[str]) -> List[Dict[str, Any]]:
+        return [await self._bulk_result(identifier, self.delete_user(identifier)) for identifier in user_identifiers]
+    
+    async def _update_batch(self, updates: List[Tuple[str, Dict[str, str]]]) -> List[Dict[str, Any]]:
+        return [
+            await self._bulk_result(identifier, self.update_user(identifier, changes))
+            for identifier, changes in updates
+        ]
+    
+    async def _bulk_result(self, item: Any, operation) -> Dict[str, Any]:
+        try:
+            success = bool(await operation)
+            return {'item': item, 'success': success, 'error': None if success else 'operation failed'}
+        except Exception as e:
+            return {'item': item, 'success': False, 'error': str(e)}
+    
+    async def _run_bulk(self, items: List[Any], run_batch, label=lambda item: item) -> List[Dict[str, Any]]:
+        """Split items into shards and run each on its own page of this session"""
+        if not items:
+            return []
+        if not self.session_active:
+            return [{'item': label(item), 'success': False, 'error': 'not logged in'} for item in items]
+        
+        shard_count = max(1, min(self.bulk_concurrency, len(items)))
+        shards = [list(range(i, len(items), shard_count)) for i in range(shard_count)]
+        
+        async def run_shard(index: int, batch: List[Any]) -> List[Dict[str, Any]]:
+            if index == 0:
+                return await run_batch(self, batch)
+            sibling = await self._sibling()
+            try:
+                return await run_batch(sibling, batch)
+            finally:
+                await sibling.browser_manager.close_page()
+        
+        shard_results = await asyncio.gather(
+            *(run_shard(i, [items[j] for j in shard]) for i, shard in enumerate(shards)),
+            return_exceptions=True
+        )
+        
+        # Back in input order
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        for shard, outcome in zip(shards, shard_results):
+            if isinstance(outcome, Exception):
+                logger.error(f"Bulk {self.name} shard failed: {outcome}")
+                outcome = [{'item': label(items[j]), 'success': False, 'error': str(outcome)} for j in shard]
+            for j, result in zip(shard, outcome):
+                results[j] = result
+        return results
+    
+    async def _sibling(self) -> 'BaseSaaSAdapter':
+        """Same adapter on a new page of this (already authenticated) browser context"""
+        sibling = type(self)(self.config, await self.browser_manager.open_sibling(), self.ai_agent, self.data_extractor)
+        sibling.auth_handler = self.auth_handler
+        sibling.selector_store = self.selector_store
+        sibling.snapshot_store = self.snapshot_store
+        sibling.checkpoint_store = self.checkpoint_store
+        sibling.tenant = self.tenant
+        sibling.session_active = self.session_active
+        return sibling
+    
+    async def open_admin_page(self) -> bool:
+        """Navigate to the admin page unless this page is already showing it"""
+        if self._admin_landing_url and self.browser_manager.page.url == self._admin_landing_url:
+            return True
+        if not await self.browser_manager.navigate(self.admin_url):
+            return False
+        self._admin_landing_url = self.browser_manager.page.url
+        return True
+    
+    async def ensure_session(self, credentials: Dict[str, str]) -> bool:
+        """Reuse the live or a cached session when it is still valid, otherwise log in"""
+        account = credentials['email']
+        
+        # A warm pooled context is usually still signed in, and may never show the login form
+        if await self.is_logged_in():
+            logger.info(f"Reusing live {self.name} session")
+            self.session_active = True
+            return True
+        
+        if self.auth_handler:
+            storage_state = self.auth_handler.load_session(self.name, account)
+            if storage_state:
+                await self.browser_manager.restore_storage_state(storage_state)
+                if await self.is_logged_in():
+                    logger.info(f"Reusing cached {self.name} session")
+                    self.session_active = True
+                    return True
+                self.auth_handler.invalidate_session(self.name, account)
+        
+        if not await self.login(credentials):
+            return False
+        
+        if self.auth_handler:
+            storage_state = await self.browser_manager.storage_state()
+            await self.auth_handler.save_session(self.name, account, storage_state)
+        return True
+    
+    async def sync_users(self, early_stop: bool = False) -> Dict[str, Any]:
+        """Extract users and report what changed since the last snapshot.
+        
+        With early_stop (for listings sorted by recency) pagination ends at the
+        first page that fully matches the snapshot; removals are then unknown.
+        """
+        if not self.snapshot_store:
+            raise RuntimeError("sync_users requires a snapshot store")
+        
+        previous = self.snapshot_store.load(self.name, self.tenant)
+        stopped = False
+        
+        def page_unchanged(page_users: List[Dict[str, str]]) -> bool:
+            nonlocal stopped
+            stopped = bool(page_users) and all(previous.get(user_key(user)) == user for user in page_users)
+            return stopped
+        
+        until = page_unchanged if early_stop and previous else None
+        users = await self.extract_users(until=until)
+        if users is False:
+            return False
+        if not users and previous:
+            # An empty listing is far more likely a failed scrape than an emptied directory
+            logger.error(f"No {self.name} users extracted; keeping the previous snapshot")
+            return False
+        
+        diff = diff_users(previous, users, complete=not stopped)
+        self.snapshot_store.apply(self.name, self.tenant, diff)
+        logger.info(
+            f"{self.name}/{self.tenant}: {len(diff['added'])} added, {len(diff['changed'])} changed, "
+            f"{len(diff['removed'])} removed{' (stopped early)' if stopped else ''}"
+        )
+        return {**diff, 'complete': not stopped, 'scanned': len(users)}
+    
+    async def is_logged_in(self) -> bool:
+        """Cheap validity probe: request the admin page without rendering it"""
+        if not self.admin_url:
+            return False
+        
+        try:
+            response = await self.browser_manager.page.request.get(self.admin_url, max_redirects=0)
+        except Exception as e:
+            logger.warning(f"Session probe failed: {e}")
+            return False
+        
+        if 300 <= response.status < 400:
+            return 'login' not in response.headers.get('location', '')
+        return response.ok
+    
+    def users_from_payload(self, payload: Any) -> List[Dict[str, str]]:
+        """Map one captured API payload to normalized user records"""
+        return []
+    
+    def next_api_request(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Follow-up request ({'post_data', 'url'}) for the next API page, or None"""
+        return None
+    
+    async def extract_users(self, until: Optional[Callable[[List[Dict[str, str]]], bool]] = None) -> List[Dict[str, str]]:
+        """Extract all users; stop paginating once until(page_users) is true.
+        
+        An extraction that fails or stops part-way returns False (so the job
+        is retried) instead of a partial listing, which sync_users would read
+        as removals. With a checkpoint store, progress is saved after every
+        page and the retry resumes from there.
+        """
+        if not self.session_active:
+            logger.error("Not logged in")
+            return []
+        
+        store = self.checkpoint_store
+        checkpoint = store.load(self.name, self.tenant) if store else None
+        users = checkpoint['users'] if checkpoint else []
+        seen = {user_key(user) for user in users}
+        if checkpoint:
+            logger.info(
+                f"Resuming {self.name}/{self.tenant} extraction after page {checkpoint['pages']} ({len(users)} users)"
+            )
+        
+        pages = 0
+        finished = False
+        try:
+            async with aclosing(self.iter_users(checkpoint['cursor'] if checkpoint else None)) as listing:
+                async for page in listing:
+                    pages += 1
+                    new_users = [user for user in page['users'] if user_key(user) not in seen]
+                    seen.update(user_key(user) for user in new_users)
+                    users.extend(new_users)
+                    if page['cursor'] is None or (until and until(page['users'])):
+                        finished = True
+                        break
+                    if store:
+                        store.save_page(self.name, self.tenant, new_users, page['cursor'])
+        except Exception as e:
+            logger.error(f"{self.name} user extraction failed: {e}")
+            return False
+        
+        if finished:
+            if store and (checkpoint or pages > 1):
+                store.clear(self.name, self.tenant)
+            logger.info(f"Extracted {len(users)} users from {self.name}")
+            return users
+        
+        # Pagination stopped before the last page (navigation failed, cursor expired, ...)
+        if checkpoint and not pages:
+            # The saved cursor no longer works; the next attempt starts over
+            store.clear(self.name, self.tenant)
+        logger.error(f"{self.name}/{self.tenant} extraction stopped after {len(users)} users")
+        return False
+    
+    async def export_users(self, path: str, format: Optional[str] = None,
+                           columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Stream the member list straight into a CSV/JSONL/Parquet file, page by page"""
+        if not self.session_active:
+            logger.error("Not logged in")
+            return False
+        
+        columns = columns or list(USER_FIELDS)
+        writer = None
+        complete = False
+        try:
+            # Written next to path and only moved there once the last page is in
+            writer = open_writer(partial_path(path), columns, export_format(path, format))
+            try:
+                async with aclosing(self.iter_users()) as listing:
+                    async for page in listing:
+                        writer.write(user_rows(page['users'], columns))
+                        complete = page['cursor'] is None
+            finally:
+                writer.close()
+        except Exception as e:
+            logger.error(f"{self.name} user export failed: {e}")
+            complete = False
+        
+        finish_export(path, complete)
+        rows = writer.rows_written if writer else 0
+        if not complete:
+            logger.error(f"{self.name} export to {path} is incomplete ({rows} users)")
+            return False
+        logger.info(f"Exported {rows} {self.name} users to {path}")
+        return {'path': path, 'rows': rows}
+    
+    async def iter_users(self, cursor: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the member list page by page as {'users': [...], 'cursor': ...}.
+        
+        The next page is only loaded once the consumer asks for it. A page's
+        cursor (plain JSON data) resumes the listing right after that page;
+        it is None on the last page. Users already yielded are not repeated.
+        """
+        if not self.session_active:
+            logger.error("Not logged in")
+            return
+        
+        source = (cursor or {}).get('source')
+        if source == 'api':
+            pages = self._resume_api_pages(cursor)
+        elif source == 'html':
+            pages = self._iter_html_pages(cursor)
+        else:
+            pages = self._iter_admin_pages()
+        
+        # Closing this generator early (consumer stopped) also closes the page source
+        seen = set()
+        async with aclosing(pages):
+            async for users, next_cursor in pages:
+                fresh = []
+                for user in users:
+                    key = user_key(user)
+                    if key and key not in seen:
+                        seen.add(key)
+                        fresh.append(user)
+                yield {'users': fresh, 'cursor': next_cursor}
+    
+    async def _iter_admin_pages(self) -> AsyncIterator[Tuple[List[Dict[str, str]], Optional[Dict[str, Any]]]]:
+        """Open the admin page; read members from its own API calls when captured, else from the DOM"""
+        if not self.api_patterns:
+            await self.browser_manager.navigate(self.admin_url)
+            entries = []
+        else:
+            capture = self.browser_manager.capture_responses(self.api_patterns)
+            try:
+                await self.browser_manager.navigate(self.admin_url)
+                await capture.drain()
+            finally:
+                capture.stop()
+            entries = [entry for entry in capture.entries if self.users_from_payload(entry['body'])]
+        
+        if entries:
+            telemetry.increment('extract_api_captures_total')
+            logger.info(f"Reading {self.name} users from {len(entries)} API response(s)")
+            pages = self._iter_api_pages(capture, entries)
+        else:
+            pages = self._iter_html_pages()
+        async with aclosing(pages):
+            async for page in pages:
+                yield page
+    
+    async def _iter_api_pages(self, capture,
+                              entries: List[Dict[str, Any]]) -> AsyncIterator[Tuple[List[Dict[str, str]], Optional[Dict[str, Any]]]]:
+        """Users of the given payloads, then of each follow-up page fetched through their cursor"""
+        fetched = 0
+        while entries:
+            users = [user for entry in entries for user in self.users_from_payload(entry['body'])]
+            # Only the newest page's cursor is followed; earlier ones the page already loaded
+            entry = entries[-1]
+            follow_up = self.next_api_request(entry)
+            cursor = None
+            if follow_up:
+                cursor = {
+                    'source': 'api',
+                    'entry': persistable_entry(entry),
+                    'request': follow_up
+                }
+            yield users, cursor
+            
+            if not follow_up:
+                return
+            if fetched >= self.max_api_pages:
+                # Not the last page: the listing is incomplete, and the cursor resumes it
+                logger.error(f"{self.name} members API still has pages after {self.max_api_pages} follow-ups; stopping")
+                return
+            fetched += 1
+            next_entry = await capture.replay(entry, follow_up.get('post_data'), follow_up.get('url'))
+            entries = [next_entry] if next_entry else []
+    
+    async def _resume_api_pages(self, cursor: Dict[str, Any]) -> AsyncIterator[Tuple[List[Dict[str, str]], Optional[Dict[str, Any]]]]:
+        capture = ResponseCapture(self.browser_manager.page, self.api_patterns)
+        request = cursor['request']
+        entry = await capture.replay(cursor['entry'], request.get('post_data'), request.get('url'))
+        async with aclosing(self._iter_api_pages(capture, [entry] if entry else [])) as pages:
+            async for page in pages:
+                yield page
+    
+    async def _iter_html_pages(self, cursor: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[List[Dict[str, str]], Optional[Dict[str, Any]]]]:
+        """Users of the rendered list, clicking "next" between pages"""
+        if cursor:
+            await self.browser_manager.navigate(cursor['url'])
+        await self.browser_manager.wait_for_element(self.member_list_selector, timeout=10000)
+        
+        page_number = 1
+        first_url = self.browser_manager.page.url
+        if cursor:
+            first_url = cursor['first_url']
+            page_number = cursor['page']
+            # Client-side pagination keeps one URL, so the clicks to get back there are replayed
+            clicks = page_number if cursor['url'] == first_url else 1
+            for _ in range(clicks):
+                pagination_info = await self.data_extractor.extract_pagination_from_page(self.browser_manager)
+                next_selector = pagination_info.get('next_selector') if pagination_info.get('has_next') else None
+                if not next_selector or not await self.browser_manager.click_and_wait(next_selector):
+                    logger.warning(f"Could not get back to {self.name} page {page_number + 1}")
+                    return
+            page_number += 1
+        
+        analyze = cursor is None
+        while True:
+            users, pagination_info = await self.extract_current_page(analyze=analyze)
+            analyze = False
+            next_selector = pagination_info.get('next_selector') if pagination_info.get('has_next') else None
+            
+            next_cursor = None
+            if next_selector:
+                next_cursor = {
+                    'source': 'html',
+                    'url': self.browser_manager.page.url,
+                    'first_url': first_url,
+                    'page': page_number
+                }
+            yield users, next_cursor
+            
+            if not next_selector:
+                return
+            
+            page_urls = self._remaining_page_urls(pagination_info, page_number)
+            if page_urls:
+                # Every remaining page has its own URL: load them side by side, in order
+                logger.info(f"Prefetching {len(page_urls)} {self.name} pages")
+                last_url, last_info = None, {}
+                async with aclosing(self._prefetch_pages(page_urls)) as prefetched:
+                    async for url, users, pagination_info in prefetched:
+                        page_number += 1
+                        last_url, last_info = url, pagination_info
+                        more = url != page_urls[-1] or bool(pagination_info.get('has_next'))
+                        next_cursor = {'source': 'html', 'url': url, 'first_url': first_url, 'page': page_number}
+                        yield users, next_cursor if more else None
+                
+                next_selector = last_info.get('next_selector') if last_info.get('has_next') else None
+                if not next_selector:
+                    return
+                # The links did not cover every page; carry on clicking from the last one
+                if not await self.browser_manager.navigate(last_url):
+                    logger.warning(f"Could not reopen {last_url}; stopping pagination")
+                    return
+            
+            if not await self.browser_manager.click_and_wait(next_selector):
+                logger.warning("Could not advance to the next page; stopping pagination")
+                return
+            page_number += 1
+    
+    def _remaining_page_urls(self, pagination_info: Dict[str, Any], page_number: int) -> List[str]:
+        """URLs of the pages after page_number, if they can be computed and prefetching is on"""
+        if self.pagination_concurrency <= 1 or pagination_info.get('current_page', 1) != page_number:
+            return []
+        urls = self.data_extractor.page_urls(pagination_info, self.browser_manager.page.url)
+        return urls[page_number:]
+    
+    async def _prefetch_pages(self, urls: List[str]) -> AsyncIterator[Tuple[str, List[Dict[str, str]], Dict[str, Any]]]:
+        """Load pages on sibling pages of this session, yielding (url, users, pagination) in order.
+        
+        At most pagination_concurrency pages are in flight; the next one is
+        only started once the consumer has taken an earlier one.
+        """
+        idle: asyncio.Queue = asyncio.Queue()
+        siblings: List[BaseSaaSAdapter] = []
+        reserved = 0
+        
+        async def load(url: str) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+            nonlocal reserved
+            if idle.empty() and reserved < self.pagination_concurrency:
+                reserved += 1
+                sibling = await self._sibling()
+                siblings.append(sibling)
+            else:
+                sibling = await idle.get()
+            try:
+                if not await sibling.browser_manager.navigate(url):
+                    raise RuntimeError(f"Could not load {url}")
+                await sibling.browser_manager.wait_for_element(self.member_list_selector, timeout=10000)
+                return await sibling.extract_current_page()
+            finally:
+                idle.put_nowait(sibling)
+        
+        upcoming = iter(urls)
+        in_flight = deque()
+        try:
+            for url in upcoming:
+                in_flight.append((url, asyncio.ensure_future(load(url))))
+                if len(in_flight) >= self.pagination_concurrency:
+                    break
+            while in_flight:
+                url, task = in_flight.popleft()
+                users, pagination_info = await task
+                following = next(upcoming, None)
+                if following:
+                    in_flight.append((following, asyncio.ensure_future(load(following))))
+                yield url, users, pagination_info
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+            for sibling in siblings:
+                await sibling.browser_manager.close_page()
+    
+    async def analyze_page(self, html_content: str, task: str) -> Dict[str, Any]:
+        """Page analysis, reused for any page whose DOM skeleton was seen before"""
+        if not self.selector_store:
+            return await self.ai_agent.analyze_page_structure(html_content, task)
+        
+        fingerprint = dom_fingerprint(html_content)
+        analysis = self.selector_store.get(self.name, task, fingerprint)
+        telemetry.increment('selector_store_hits_total' if analysis is not None else 'selector_store_misses_total')
+        if analysis is not None:
+            logger.debug(f"Reusing {self.name} selectors for layout {fingerprint}")
+            return analysis
+        
+        analysis = await self.ai_agent.analyze_page_structure(html_content, task)
+        if analysis.get('confidence', 0) > 0:
+            self.selector_store.set(self.name, task, fingerprint, analysis)
+        return analysis
+    
+    async def extract_current_page(self, analyze: bool = False) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Extract users and pagination from the loaded page, in the browser when possible"""
+        users = await self.data_extractor.extract_users_from_page(self.browser_manager, self.header_schema)
+        if users:
+            pagination_info = await self.data_extractor.extract_pagination_from_page(self.browser_manager)
+            return users, pagination_info
+        
+        # No recognizable user table: fall back to full HTML (and AI) extraction
+        telemetry.increment('extract_html_fallbacks_total')
+        html_content = await self.browser_manager.get_page_content()
+        if analyze:
+            await self.analyze_page(html_content, "extract_users")
+        users = await self.data_extractor.extract_users_from_table(html_content, self.header_schema)
+        return users, self.data_extractor.extract_pagination_info(html_content)
+    
+    async def find_selector(self, action: str, candidates: List[str], timeout: int = 5000,
+                            task: Optional[str] = None) -> Optional[str]:
+        """The first candidate that becomes visible, trying the one that has been winning first.
+        
+        A proven winner gets a wait of its own; the rest share one combined
+        wait. Outcomes go to the selector store. With a task description,
+        selectors suggested by the AI are tried last and remembered if they work.
+        """
+        store = self.selector_store
+        ranked = store.rank_selectors(self.name, action, candidates) if store else list(candidates)
+        stats = store.selector_stats(self.name, action) if store else {}
+        
+        if ranked and stats.get(ranked[0], {}).get('successes'):
+            started = time.monotonic()
+            if await self.browser_manager.wait_for_element(ranked[0], timeout=timeout):
+                self._record_selector(action, ranked[0], True, started)
+                return ranked[0]
+            self._record_selector(action, ranked[0], False)
+            telemetry.increment('selector_misses_total')
+            ranked = ranked[1:]
+        
+        if ranked:
+            started = time.monotonic()
+            if await self.browser_manager.wait_for_element(', '.join(ranked), timeout=timeout):
+                # Which one matched: candidates ahead of it were not on the page
+                for selector in ranked:
+                    if await self.browser_manager.page.is_visible(selector):
+                        self._record_selector(action, selector, True, started)
+                        return selector
+                    self._record_selector(action, selector, False)
+            else:
+                for selector in ranked:
+                    self._record_selector(action, selector, False)
+        
+        if task and self.ai_agent:
+            return await self.learn_selector(action, task)
+        return None
+    
+    async def learn_selector(self, action: str, task: str) -> Optional[str]:
+        """Ask the AI for automation steps and keep the first step selector that is present"""
+        telemetry.increment('selector_ai_fallbacks_total')
+        html_content = await self.browser_manager.get_page_content()
+        analysis = await self.analyze_page(html_content, task)
+        steps = await self.ai_agent.generate_automation_steps(task, analysis, html_content)
+        
+        for step in steps:
+            selector = step.get('selector')
+            if not isinstance(selector, str) or not selector:
+                continue
+            started = time.monotonic()
+            if await self.browser_manager.wait_for_element(selector, timeout=2000):
+                logger.info(f"Learned {self.name} selector for {action}: {selector}")
+                self._record_selector(action, selector, True, started, source='ai')
+                return selector
+            self._record_selector(action, selector, False, source='ai')
+        return None
+    
+    def _record_selector(self, action: str, selector: str, success: bool,
+                         started: Optional[float] = None, source: str = 'static'):
+        if not self.selector_store:
+            return
+        latency_ms = (time.monotonic() - started) * 1000 if started is not None else None
+        self.selector_store.record_selector(self.name, action, selector, success, latency_ms, source)
+    
+    async def classify_page_state(self, logged_in_selectors: Optional[List[str]] = None,
+                                  login_url_marker: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Probe all challenge/error/logged-in indicators at once"""
+        classifier = PageStateClassifier(self.browser_manager, timeout=self.config.get('state_probe_timeout', 3000))
+        return await classifier.classify(
+            logged_in_selectors or self.logged_in_selectors, login_url_marker or self.login_url_marker
+        )
+    
     async def logout(self) -> bool:
         """Logout from the application"""
         try:
             # Generic logout attempt
-            logout_selectors = [
-                'a[href*="logout"]',
-                'button[class*="logout"]',
-                '.logout',
-                '#logout'
-            ]
-            
-            for selector in logout_selectors:
-                if await self.browser_manager.wait_for_element(selector, timeout=5000):
-                    await self.browser_manager.click_element(selector)
-                    self.session_active = False
-                    return True
+            selector = await self.find_selector('logout', self.logout_selectors, timeout=5000)
+            if selector:
+                await self.browser_manager.click_element(selector)
+                self.session_active = False
+                return True
             
             return False
         except Exception as e:
             logger.error(f"Logout failed: {e}")
             return False
     
-    async def handle_mfa(self, page) -> bool:
-        """Handle multi-factor authentication"""
-        # Check for common MFA patterns
-        mfa_indicators = [
-            'input[type="text"][placeholder*="code"]',
-            'input[name*="verification"]',
-            'input[name*="token"]',
-            '.mfa-input',
-            '.verification-code'
-        ]
-        
-        for selector in mfa_indicators:
-            if await self.browser_manager.wait_for_element(selector, timeout=5000):
-                logger.warning("MFA detected - manual intervention required")
-                # In production, this would integrate with TOTP or SMS services
-                return False
+    async def handle_mfa(self, page, page_state: Optional[Tuple[str, Optional[str]]] = None) -> bool:
+        """Handle multi-factor authentication; page_state reuses a classify_page_state() result"""
+        state, selector = page_state or await self.classify_page_state()
+        if state == MFA:
+            logger.warning(f"MFA detected ({selector}) - manual intervention required")
+            # In production, this would integrate with TOTP or SMS services
+            return False
         
         return True
     
-    async def handle_captcha(self, page) -> bool:
-        """Handle CAPTCHA challenges"""
-        captcha_indicators = [
-            '.captcha',
-            '#captcha',
-            'img[src*="captcha"]',
-            '.g-recaptcha'
-        ]
-        
-        for selector in captcha_indicators:
-            if await self.browser_manager.wait_for_element(selector, timeout=5000):
-                logger.warning("CAPTCHA detected - manual intervention required")
-                # In production, this would integrate with CAPTCHA solving services
-                return False
+    async def handle_captcha(self, page, page_state: Optional[Tuple[str, Optional[str]]] = None) -> bool:
+        """Handle CAPTCHA challenges; page_state reuses a classify_page_state() result"""
+        state, selector = page_state or await self.classify_page_state()
+        if state == CAPTCHA:
+            logger.warning(f"CAPTCHA detected ({selector}) - manual intervention required")
+            # In production, this would integrate with CAPTCHA solving services
+            return False
         
         return True
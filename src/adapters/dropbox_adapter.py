@@ -1,33 +1,53 @@
 
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from core.page_state import ERROR, LOGGED_IN
 from .base_adapter import BaseSaaSAdapter
 
 logger = logging.getLogger(__name__)
 
+CONTINUE_ENDPOINT = '/2/team/members/list/continue_v2'
+
 class DropboxAdapter(BaseSaaSAdapter):
+    name = 'dropbox'
+    admin_url = "https://www.dropbox.com/team/admin/members"
+    api_patterns = [r'/2/team/members/list(_v2|/continue_v2)?$']
+
+    logged_in_selectors = ['nav[role="navigation"]']
+
     def __init__(self, config, browser_manager, ai_agent, data_extractor):
         super().__init__(config, browser_manager, ai_agent, data_extractor)
+        self.login_url = config.get('dropbox', {}).get('login_url', 'https://www.dropbox.com/login')
 
     async def login(self, credentials: Dict[str, str]) -> bool:
         """Login to Dropbox admin console"""
         try:
             logger.info("Navigating to Dropbox login page")
-            await self.browser_manager.goto_url("https://www.dropbox.com/login")
+            if not await self.browser_manager.navigate(self.login_url):
+                return False
 
-            await self.browser_manager.fill_input('input[name="login_email"]', credentials["email"])
-            await self.browser_manager.fill_input('input[name="login_password"]', credentials["password"])
+            if not (await self.browser_manager.type_text('input[name="login_email"]', credentials["email"])
+                    and await self.browser_manager.type_text('input[name="login_password"]',
+                                                             credentials["password"])):
+                logger.error("Dropbox login form not found")
+                return False
             await self.browser_manager.click_element('button[type="submit"]')
 
-            if not await self.handle_mfa(None):
-                logger.warning("MFA required, login cannot proceed automatically.")
+            # One probe covers MFA, CAPTCHA, a rejected login and the console itself
+            page_state = await self.classify_page_state()
+            page = self.browser_manager.page
+            if not (await self.handle_mfa(page, page_state) and await self.handle_captcha(page, page_state)):
                 return False
 
-            if not await self.handle_captcha(None):
-                logger.warning("CAPTCHA detected during login.")
+            state, selector = page_state
+            if state == ERROR:
+                logger.error(f"Dropbox rejected the login ({selector})")
                 return False
 
-            await self.browser_manager.wait_for_element('nav[role="navigation"]', timeout=10000)
+            if state != LOGGED_IN and not await self.browser_manager.wait_for_element(
+                    self.logged_in_selectors[0], timeout=10000):
+                logger.error("Login failed: Dropbox console did not load")
+                return False
             self.session_active = True
             logger.info("Login successful")
             return True
@@ -35,47 +55,50 @@ class DropboxAdapter(BaseSaaSAdapter):
             logger.error(f"Login failed: {e}")
             return False
 
-    async def extract_users(self) -> List[Dict[str, str]]:
-        """Extract user data from Dropbox admin console"""
-        users = []
-        try:
-            logger.info("Navigating to user management page")
-            await self.browser_manager.goto_url("https://www.dropbox.com/team/admin/members")
-
-            await self.browser_manager.wait_for_element('table', timeout=10000)
-
-            # Use AI agent to get column mappings dynamically
-            page_html = await self.browser_manager.get_page_html()
-            selectors = await self.ai_agent.get_user_table_selectors(page_html)
-
-            rows = await self.browser_manager.query_selector_all(selectors["row_selector"])
-            logger.info(f"Found {len(rows)} user rows")
-
-            for row in rows:
-                user_data = await self.data_extractor.extract_user_data(row, selectors)
-                users.append(user_data)
-
-            logger.info("User extraction completed")
-        except Exception as e:
-            logger.error(f"User extraction failed: {e}")
+    def users_from_payload(self, payload: Any) -> List[Dict[str, str]]:
+        """Map members/list(_v2) and continue payloads to user records"""
+        if not isinstance(payload, dict):
+            return []
 
+        users = []
+        for member in payload.get('members', []):
+            profile = member.get('profile', {})
+            if not profile.get('email'):
+                continue
+            user = {'name': profile.get('name', {}).get('display_name', ''), 'email': profile['email']}
+            # v2 puts roles in a list, v1 in a single tagged union
+            roles = member.get('roles') or [member.get('role')]
+            if roles[0]:
+                user['role'] = roles[0].get('name') or roles[0].get('.tag', '')
+            if profile.get('status'):
+                user['status'] = profile['status'].get('.tag', '')
+            users.append(user)
         return users
 
+    def next_api_request(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Continue with the payload's cursor while has_more is set"""
+        body = entry['body']
+        if not isinstance(body, dict) or not body.get('has_more') or not body.get('cursor'):
+            return None
+        base_url = entry['url'].split('/2/team/members/', 1)[0]
+        return {'url': base_url + CONTINUE_ENDPOINT, 'post_data': {'cursor': body['cursor']}}
+
     async def create_user(self, user_data: Dict[str, str]) -> bool:
         """Create new Dropbox user"""
         try:
             logger.info(f"Creating user: {user_data}")
-            await self.browser_manager.goto_url("https://www.dropbox.com/team/admin/members/invite")
+            await self.browser_manager.navigate("https://www.dropbox.com/team/admin/members/invite")
 
-            await self.browser_manager.fill_input('input[name="email"]', user_data["email"])
+            await self.browser_manager.type_text('input[name="email"]', user_data["email"])
             if "name" in user_data:
-                await self.browser_manager.fill_input('input[name="full_name"]', user_data["name"])
+                await self.browser_manager.type_text('input[name="full_name"]', user_data["name"])
             if "role" in user_data:
                 # Handle role dropdown via AI agent or hardcoded selector
-                await self.browser_manager.select_dropdown('select[name="role"]', user_data["role"])
+                await self.browser_manager.select_option('select[name="role"]', user_data["role"])
 
             await self.browser_manager.click_element('button[type="submit"]')
-            await self.browser_manager.wait_for_element('div.success-message', timeout=5000)
+            if not await self.browser_manager.wait_for_element('div.success-message', timeout=5000):
+                return False
             
             logger.info("User created successfully")
             return True
@@ -87,15 +110,18 @@ class DropboxAdapter(BaseSaaSAdapter):
         """Delete a Dropbox user"""
         try:
             logger.info(f"Attempting to delete user: {user_identifier}")
-            await self.browser_manager.goto_url("https://www.dropbox.com/team/admin/members")
+            await self.browser_manager.navigate("https://www.dropbox.com/team/admin/members")
 
             # Search for the user
-            await self.browser_manager.fill_input('input[type="search"]', user_identifier)
-            await self.browser_manager.wait_for_element('.user-row', timeout=5000)
+            await self.browser_manager.type_text('input[type="search"]', user_identifier)
+            if not await self.browser_manager.wait_for_element('.user-row', timeout=5000):
+                logger.error(f"User not found: {user_identifier}")
+                return False
 
             await self.browser_manager.click_element('.user-row .delete-user-button')
             await self.browser_manager.click_element('.confirm-delete-button')
-            await self.browser_manager.wait_for_element('div.success-message', timeout=5000)
+            if not await self.browser_manager.wait_for_element('div.success-message', timeout=5000):
+                return False
 
             logger.info("User deleted successfully")
             return True
@@ -107,22 +133,25 @@ class DropboxAdapter(BaseSaaSAdapter):
         """Update Dropbox user details"""
         try:
             logger.info(f"Updating user {user_identifier} with {updates}")
-            await self.browser_manager.goto_url("https://www.dropbox.com/team/admin/members")
+            await self.browser_manager.navigate("https://www.dropbox.com/team/admin/members")
 
-            await self.browser_manager.fill_input('input[type="search"]', user_identifier)
-            await self.browser_manager.wait_for_element('.user-row', timeout=5000)
+            await self.browser_manager.type_text('input[type="search"]', user_identifier)
+            if not await self.browser_manager.wait_for_element('.user-row', timeout=5000):
+                logger.error(f"User not found: {user_identifier}")
+                return False
 
             await self.browser_manager.click_element('.user-row .edit-user-button')
 
             if "email" in updates:
-                await self.browser_manager.fill_input('input[name="email"]', updates["email"])
+                await self.browser_manager.type_text('input[name="email"]', updates["email"])
             if "name" in updates:
-                await self.browser_manager.fill_input('input[name="full_name"]', updates["name"])
+                await self.browser_manager.type_text('input[name="full_name"]', updates["name"])
             if "role" in updates:
-                await self.browser_manager.select_dropdown('select[name="role"]', updates["role"])
+                await self.browser_manager.select_option('select[name="role"]', updates["role"])
 
             await self.browser_manager.click_element('button[type="submit"]')
-            await self.browser_manager.wait_for_element('div.success-message', timeout=5000)
+            if not await self.browser_manager.wait_for_element('div.success-message', timeout=5000):
+                return False
 
             logger.info("User updated successfully")
             return True
@@ -1,17 +1,31 @@
 
-import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
+from core.page_state import ERROR
 from .base_adapter import BaseSaaSAdapter
 
 logger = logging.getLogger(__name__)
 
+MEMBER_LIST_SELECTOR = 'table, [role="table"], [role="grid"]'
+
 class NotionAdapter(BaseSaaSAdapter):
+    name = 'notion'
+    api_patterns = [r'/api/v3/getVisibleUsers', r'/api/v3/getSpaceUsers']
+    member_list_selector = MEMBER_LIST_SELECTOR
+    login_url_marker = 'login'
+    invite_selectors = [
+        'button:has-text("Invite")',
+        'button:has-text("Add members")',
+        'button:has-text("Add member")',
+        '[data-testid="invite-members-button"]'
+    ]
+    
     def __init__(self, config, browser_manager, ai_agent, data_extractor):
         super().__init__(config, browser_manager, ai_agent, data_extractor)
         self.base_url = config.get('notion', {}).get('base_url', 'https://notion.so')
         self.login_url = config.get('notion', {}).get('login_url', 'https://notion.so/login')
         self.admin_url = config.get('notion', {}).get('admin_url', 'https://notion.so/settings/members')
+        self.invite_batch_size = config.get('notion', {}).get('invite_batch_size', 50)
     
     async def login(self, credentials: Dict[str, str]) -> bool:
         """Login to Notion"""
@@ -28,20 +42,24 @@ class NotionAdapter(BaseSaaSAdapter):
             await self.browser_manager.type_text('input[type="password"]', credentials['password'])
             
             # Submit form
+            login_page_url = self.browser_manager.page.url
             await self.browser_manager.click_element('button[type="submit"]')
             
-            # Wait for login to complete
-            await asyncio.sleep(3)
+            # Wait for login to complete (redirect away from the login page)
+            await self.browser_manager.wait_for_url_change(login_page_url)
+            await self.browser_manager.wait_for_page_ready()
             
-            # Check for MFA or CAPTCHA
-            if not await self.handle_mfa(self.browser_manager.page):
+            # Check for MFA, CAPTCHA or a rejected login in one probe
+            page_state = await self.classify_page_state()
+            page = self.browser_manager.page
+            if not (await self.handle_mfa(page, page_state) and await self.handle_captcha(page, page_state)):
                 return False
-            
-            if not await self.handle_captcha(self.browser_manager.page):
+            state, selector = page_state
+            if state == ERROR:
+                logger.error(f"Notion rejected the login ({selector})")
                 return False
             
             # Verify login success
-            await asyncio.sleep(2)
             current_url = self.browser_manager.page.url
             
             if 'login' not in current_url:
@@ -54,74 +72,163 @@ class NotionAdapter(BaseSaaSAdapter):
             logger.error(f"Notion login failed: {e}")
             return False
     
-    async def extract_users(self) -> List[Dict[str, str]]:
-        """Extract users from Notion workspace"""
-        if not self.session_active:
-            logger.error("Not logged in")
+    def users_from_payload(self, payload: Any) -> List[Dict[str, str]]:
+        """Map getVisibleUsers/getSpaceUsers payloads (user list + notion_user records)"""
+        if not isinstance(payload, dict):
             return []
         
+        records = {}
+        for user_id, record in payload.get('recordMap', {}).get('notion_user', {}).items():
+            value = record.get('value', {})
+            # Newer responses wrap the record once more
+            records[user_id] = value.get('value', value)
+        
+        roles = {member.get('userId'): member.get('role') for member in payload.get('users', [])}
+        users = []
+        for user_id in roles or records:
+            record = records.get(user_id, {})
+            if not record.get('email'):
+                continue
+            name = record.get('name') or ' '.join(
+                part for part in (record.get('given_name'), record.get('family_name')) if part
+            )
+            user = {'name': name, 'email': record['email']}
+            if roles.get(user_id):
+                user['role'] = roles[user_id]
+            users.append(user)
+        return users
+    
+    async def create_user(self, user_data: Dict[str, str]) -> bool:
+        """Create a new user in Notion"""
+        if not self.session_active:
+            return False
+        
         try:
-            # Navigate to members page
-            await self.browser_manager.navigate(self.admin_url)
-            
-            # Wait for members list to load
-            await asyncio.sleep(3)
-            
-            # Get page content
-            html_content = await self.browser_manager.get_page_content()
-            
-            # Use AI to analyze page structure
-            page_analysis = self.ai_agent.analyze_page_structure(html_content, "extract_users")
-            
-            # Extract user data
-            users = self.data_extractor.extract_users_from_table(html_content)
-            
-            # Handle pagination if present
-            pagination_info = self.data_extractor.extract_pagination_info(html_content)
-            
-            if pagination_info.get('has_next'):
-                additional_users = await self._extract_paginated_users(pagination_info)
-                users.extend(additional_users)
-            
-            logger.info(f"Extracted {len(users)} users from Notion")
-            return users
-            
+            return await self._send_invite([user_data['email']], user_data.get('role'))
         except Exception as e:
-            logger.error(f"User extraction failed: {e}")
-            return []
+            logger.error(f"Notion user creation failed: {e}")
+            return False
     
-    async def _extract_paginated_users(self, pagination_info: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Extract users from multiple pages"""
-        all_users = []
-        
-        while pagination_info.get('has_next'):
-            # Click next page
-            if pagination_info.get('next_selector'):
-                await self.browser_manager.click_element(pagination_info['next_selector'])
-                await asyncio.sleep(2)
+    async def _create_batch(self, users: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Invite users in groups through Notion's multi-email invite form"""
+        # Role is chosen once per invite, so only users sharing a role can go together
+        by_role: Dict[Optional[str], List[Dict[str, str]]] = {}
+        for user in users:
+            by_role.setdefault(user.get('role'), []).append(user)
+        
+        results = {}
+        for role, group in by_role.items():
+            for start in range(0, len(group), self.invite_batch_size):
+                batch = group[start:start + self.invite_batch_size]
+                try:
+                    invited = await self._send_invite([user['email'] for user in batch], role)
+                except Exception as e:
+                    logger.warning(f"Grouped Notion invite failed: {e}")
+                    invited = False
                 
-                # Extract users from current page
-                html_content = await self.browser_manager.get_page_content()
-                users = self.data_extractor.extract_users_from_table(html_content)
-                all_users.extend(users)
+                if invited:
+                    for user in batch:
+                        results[id(user)] = {'item': user, 'success': True, 'error': None}
+                    continue
                 
-                # Update pagination info
-                pagination_info = self.data_extractor.extract_pagination_info(html_content)
-            else:
-                break
+                # Retry one at a time so a single bad address does not fail the group
+                for user in batch:
+                    results[id(user)] = await self._bulk_result(user, self.create_user(user))
         
-        return all_users
+        return [results[id(user)] for user in users]
     
-    async def create_user(self, user_data: Dict[str, str]) -> bool:
-        """Create a new user in Notion"""
+    async def _send_invite(self, emails: List[str], role: Optional[str] = None) -> bool:
+        """Open the invite dialog on the members page and invite emails in one submission"""
+        if not await self.open_admin_page():
+            return False
+        
+        # Look for "Add member" or "Invite" button, starting with the one that worked last
+        selector = await self.find_selector(
+            'invite', self.invite_selectors, timeout=5000,
+            task="Open the dialog for inviting new members to the workspace"
+        )
+        invite_clicked = bool(selector) and await self.browser_manager.click_element(selector)
+        
+        if not invite_clicked:
+            logger.error("Invite button not found")
+            return False
+        
+        # Fill invite form; Notion accepts a comma-separated list of addresses
+        email_input = 'input[type="email"], input[placeholder*="email" i]'
+        if not await self.browser_manager.wait_for_element(email_input):
+            return False
+        await self.browser_manager.type_text(email_input, ', '.join(emails))
+        
+        if role:
+            await self._select_role(role)
+        
+        # Send invite
+        if not await self.browser_manager.click_and_wait('button:has-text("Invite"):visible'):
+            return False
+        
+        logger.info(f"Invited {len(emails)} user(s) to Notion")
+        return True
+    
+    async def delete_user(self, user_identifier: str) -> bool:
+        """Remove a member from the Notion workspace"""
+        if not self.session_active:
+            return False
+        
+        try:
+            if not await self._open_member_menu(user_identifier):
+                return False
+            
+            await self.browser_manager.click_element('[role="menuitem"]:has-text("Remove")')
+            await self.browser_manager.click_and_wait('[role="dialog"] button:has-text("Remove")')
+            
+            logger.info(f"Removed {user_identifier} from Notion")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Notion user deletion failed: {e}")
+            return False
+    
+    async def update_user(self, user_identifier: str, updates: Dict[str, str]) -> bool:
+        """Update a Notion member (only the role is editable)"""
         if not self.session_active:
             return False
         
+        if 'role' not in updates:
+            logger.warning("Notion only supports role updates")
+            return False
+        
         try:
-            # Navigate to members page
-            await self.browser_manager.navigate(self.admin_url)
+            if not await self._open_member_menu(user_identifier):
+                return False
+            
+            if not await self._select_role(updates['role']):
+                return False
+            await self.browser_manager.wait_for_page_ready()
+            
+            logger.info(f"Updated {user_identifier} role to {updates['role']}")
+            return True
             
-            # Look for "Add member" or "Invite" button
-            invite_selectors = [
-                'button:has-text("Invite")',
-                'button:has-text
+        except Exception as e:
+            logger.error(f"Notion user update failed: {e}")
+            return False
+    
+    async def _open_member_menu(self, user_identifier: str) -> bool:
+        """Find a member row and open its access menu"""
+        if not await self.open_admin_page():
+            return False
+        
+        search_input = 'input[placeholder*="Search" i]'
+        if await self.browser_manager.wait_for_element(search_input, timeout=5000):
+            await self.browser_manager.type_text(search_input, user_identifier)
+            await self.browser_manager.wait_for_dom_quiet()
+        
+        member_row = f'tr:has-text("{user_identifier}")'
+        if not await self.browser_manager.wait_for_element(member_row):
+            logger.error(f"Member not found: {user_identifier}")
+            return False
+        
+        return await self.browser_manager.click_element(f'{member_row} [role="button"]')
+    
+    async def _select_role(self, role: str) -> bool:
+        """Pick a role from the currently open role dropdown"""
+        return await self.browser_manager.click_element(f'[role="option"]:has-text("{role}")')
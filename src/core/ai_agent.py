@@ -1,22 +1,140 @@
+import asyncio
+import copy
 import openai
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 import json
 import logging
+from .html_reducer import ReducedHTML, chunk_rows, html_to_rows, reduce_html
+from .rate_limiter import RateLimiter, estimate_tokens
+from .telemetry import telemetry
 
 logger = logging.getLogger(__name__)
 
+# Bump a template's version whenever its prompt text changes so cached
+# responses produced by the old prompt are no longer served.
+PROMPT_VERSIONS = {
+    'analyze_page_structure': 2,
+    'extract_user_data': 2,
+    'generate_automation_steps': 2
+}
+
+OUTLINE_FORMAT_PROMPT = """
+        The page is given as an outline: one element per line, indented by depth,
+        formatted as [node id] tag#id.classes attributes "text". A line such as
+        "... 40 more <tr.row>" stands for repeated siblings that were omitted.
+        Refer to elements with CSS selectors or with their node id (e.g. "n12").
+        """
+
+USER_FIELDS_PROMPT = """
+        Return a JSON array of user objects with fields:
+        - name: User's full name
+        - email: Email address
+        - role: User role/permission level
+        - last_login: Last login date (if available)
+        - status: Account status (active/inactive)
+        
+        Only return valid, complete user records.
+        """
+
 class AIAgent:
-    def __init__(self, api_key: str, model: str = "gpt-4"):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str = "gpt-4", cache=None, base_url: Optional[str] = None,
+                 max_concurrency: int = 4, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, batch_max_chars: int = 12000,
+                 chunk_tokens: int = 2000, outline_chars: int = 8000):
+        self.client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
         self.model = model
+        self.cache = cache
+        self.batch_max_chars = batch_max_chars
+        self.chunk_tokens = chunk_tokens
+        self.outline_chars = outline_chars
+        self.last_reduction: Optional[ReducedHTML] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    
+    def _cache_key(self, template: str, cache_input: str) -> Optional[str]:
+        if not self.cache:
+            return None
+        return self.cache.make_key(self.model, template, PROMPT_VERSIONS[template], cache_input)
+    
+    # Callers may modify answers, so the cache never hands out or keeps the caller's object
+    def _cache_get(self, key: Optional[str], template: str) -> Any:
+        if key is None:
+            return None
+        value = self.cache.get(key)
+        telemetry.increment('ai_cache_hits_total' if value is not None else 'ai_cache_misses_total', template=template)
+        return copy.deepcopy(value)
     
-    def analyze_page_structure(self, html_content: str, task: str) -> Dict[str, Any]:
+    def _cache_set(self, key: Optional[str], value: Any):
+        if key is not None:
+            self.cache.set(key, copy.deepcopy(value))
+    
+    async def _request(self, system_prompt: str, prompt: str, template: str) -> Any:
+        """Send one chat completion within the concurrency and rate limits"""
+        estimated_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+        
+        async with self._semaphore:
+            await self.rate_limiter.acquire(estimated_tokens)
+            with telemetry.span('ai.request', template=template, model=self.model) as span:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1
+                )
+                if response.usage:
+                    span['prompt_tokens'] = response.usage.prompt_tokens
+                    span['completion_tokens'] = response.usage.completion_tokens
+        
+        if response.usage:
+            self.rate_limiter.record_usage(estimated_tokens, response.usage.total_tokens)
+            telemetry.increment('ai_tokens_total', response.usage.prompt_tokens, template=template, kind='prompt')
+            telemetry.increment('ai_tokens_total', response.usage.completion_tokens, template=template, kind='completion')
+        return json.loads(response.choices[0].message.content)
+    
+    def _reduce(self, html_content: str) -> ReducedHTML:
+        """Minimize page HTML into an outline and log how much it shrank"""
+        reduced = reduce_html(html_content)
+        self.last_reduction = reduced
+        logger.info(
+            f"Reduced page HTML from {reduced.original_size} to {reduced.reduced_size} chars "
+            f"({reduced.reduction:.0%} smaller)"
+        )
+        return reduced
+    
+    @staticmethod
+    def _resolve_selectors(value: Any, reduced: ReducedHTML) -> Any:
+        """Replace outline node IDs in an AI answer with real CSS selectors"""
+        if isinstance(value, str):
+            return reduced.resolve(value)
+        if isinstance(value, list):
+            return [AIAgent._resolve_selectors(v, reduced) for v in value]
+        if isinstance(value, dict):
+            return {k: AIAgent._resolve_selectors(v, reduced) for k, v in value.items()}
+        return value
+    
+    async def _complete(self, template: str, system_prompt: str, prompt: str, cache_input: str) -> Any:
+        """Run a chat completion and parse its JSON answer, consulting the cache first"""
+        key = self._cache_key(template, cache_input)
+        cached = self._cache_get(key, template)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {template}")
+            return cached
+        
+        result = await self._request(system_prompt, prompt, template)
+        self._cache_set(key, result)
+        return result
+    
+    async def analyze_page_structure(self, html_content: str, task: str) -> Dict[str, Any]:
         """Analyze page structure and return element selectors"""
+        reduced = self._reduce(html_content)
+        outline = reduced.outline[:self.outline_chars]
         prompt = f"""
-        Analyze this HTML content and identify elements for the task: {task}
-        
-        HTML Content (truncated):
-        {html_content[:5000]}...
+        Analyze this page and identify elements for the task: {task}
+        """ + OUTLINE_FORMAT_PROMPT + f"""
+        Page outline:
+        {outline}
         
         Return a JSON object with:
         - selectors: CSS selectors for relevant elements
@@ -31,62 +149,88 @@ class AIAgent:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert web scraping AI that analyzes HTML structure."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
+            analysis = await self._complete(
+                'analyze_page_structure',
+                "You are an expert web scraping AI that analyzes HTML structure.",
+                prompt,
+                cache_input=f"{task}\n{outline}"
             )
-            
-            result = response.choices[0].message.content
-            return json.loads(result)
+            if isinstance(analysis.get('selectors'), (dict, list)):
+                analysis = {**analysis, 'selectors': self._resolve_selectors(analysis['selectors'], reduced)}
+            return analysis
         except Exception as e:
             logger.error(f"AI analysis failed: {e}")
             return {"selectors": {}, "actions": [], "confidence": 0.0}
     
-    def extract_user_data(self, html_content: str) -> List[Dict[str, str]]:
-        """Extract user data from HTML"""
-        prompt = f"""
-        Extract user information from this HTML content:
-        
-        {html_content[:8000]}...
-        
-        Return a JSON array of user objects with fields:
-        - name: User's full name
-        - email: Email address
-        - role: User role/permission level
-        - last_login: Last login date (if available)
-        - status: Account status (active/inactive)
-        
-        Only return valid, complete user records.
-        """
+    def _user_data_prompt(self, rows_text: str) -> str:
+        return f"""
+        Extract user information from these rows of a member list
+        (one row per line, cells separated by " | "):
         
+        {rows_text}
+        """ + USER_FIELDS_PROMPT
+    
+    def _user_data_chunks(self, html_content: str) -> List[str]:
+        """Reduce HTML to row text and split it into token-budgeted chunks"""
+        header, rows = html_to_rows(html_content)
+        chunks = chunk_rows(rows, self.chunk_tokens, header)
+        logger.info(
+            f"Reduced page HTML from {len(html_content)} to {sum(len(c) for c in chunks)} chars "
+            f"of row text in {len(chunks)} chunks"
+        )
+        return chunks
+    
+    async def _extract_chunk(self, rows_text: str) -> List[Dict[str, str]]:
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a data extraction specialist."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
+            users = await self._complete(
+                'extract_user_data',
+                "You are a data extraction specialist.",
+                self._user_data_prompt(rows_text),
+                cache_input=rows_text
             )
-            
-            result = response.choices[0].message.content
-            return json.loads(result)
+            return users if isinstance(users, list) else []
         except Exception as e:
             logger.error(f"User data extraction failed: {e}")
             return []
     
-    def generate_automation_steps(self, task: str, page_analysis: Dict[str, Any]) -> List[Dict[str, str]]:
+    async def iter_user_data(self, html_content: str) -> AsyncIterator[Dict[str, str]]:
+        """Stream users as each chunk is extracted, deduplicated by email"""
+        chunks = self._user_data_chunks(html_content)
+        tasks = [asyncio.ensure_future(self._extract_chunk(chunk)) for chunk in chunks]
+        seen = set()
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for user in await next_done:
+                    email = str(user.get('email') or '').strip().lower()
+                    if not email or email in seen:
+                        continue
+                    seen.add(email)
+                    yield user
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def extract_user_data(self, html_content: str) -> List[Dict[str, str]]:
+        """Extract user data from HTML"""
+        return [user async for user in self.iter_user_data(html_content)]
+    
+    async def generate_automation_steps(self, task: str, page_analysis: Dict[str, Any],
+                                        html_content: Optional[str] = None) -> List[Dict[str, str]]:
         """Generate step-by-step automation instructions"""
+        reduced = self._reduce(html_content) if html_content else None
+        outline = reduced.outline[:self.outline_chars] if reduced else ''
+        page_section = OUTLINE_FORMAT_PROMPT + f"""
+        Page outline:
+        {outline}
+        """ if reduced else ''
         prompt = f"""
         Generate automation steps for task: {task}
         
         Based on page analysis:
         {json.dumps(page_analysis, indent=2)}
-        
+        """ + page_section + """
         Return a JSON array of steps with:
         - action: Type of action (click, type, wait, etc.)
         - selector: CSS selector for element
@@ -95,18 +239,96 @@ class AIAgent:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an automation expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
+            steps = await self._complete(
+                'generate_automation_steps',
+                "You are an automation expert.",
+                prompt,
+                cache_input=f"{task}\n{json.dumps(page_analysis, sort_keys=True)}\n{outline}"
             )
-            
-            result = response.choices[0].message.content
-            return json.loads(result)
+            if reduced:
+                steps = [
+                    {**step, 'selector': reduced.resolve(step['selector'])}
+                    if isinstance(step.get('selector'), str) else step
+                    for step in steps
+                ]
+            return steps
         except Exception as e:
             logger.error(f"Step generation failed: {e}")
             return []
-
+    
+    async def extract_user_data_batch(self, html_contents: List[str]) -> List[List[Dict[str, str]]]:
+        """Extract users from several documents, packing small ones into shared requests"""
+        results: List[Any] = [None] * len(html_contents)
+        pending = []
+        large = []
+        
+        for index, html_content in enumerate(html_contents):
+            chunks = self._user_data_chunks(html_content)
+            if not chunks:
+                results[index] = []
+            elif len(chunks) > 1 or len(chunks[0]) > self.batch_max_chars:
+                large.append(index)
+            else:
+                key = self._cache_key('extract_user_data', chunks[0])
+                cached = self._cache_get(key, 'extract_user_data')
+                if cached is not None:
+                    results[index] = cached
+                else:
+                    pending.append((index, chunks[0], key))
+        
+        # Greedily pack uncached documents into prompts of at most batch_max_chars
+        batches: List[List[tuple]] = []
+        size = 0
+        for item in pending:
+            if batches and size + len(item[1]) <= self.batch_max_chars:
+                batches[-1].append(item)
+                size += len(item[1])
+            else:
+                batches.append([item])
+                size = len(item[1])
+        
+        batch_results, large_results = await asyncio.gather(
+            asyncio.gather(*(self._extract_batch([item[1] for item in batch]) for batch in batches)),
+            asyncio.gather(*(self.extract_user_data(html_contents[index]) for index in large))
+        )
+        for batch, users_per_document in zip(batches, batch_results):
+            for (index, _, key), users in zip(batch, users_per_document):
+                results[index] = users
+                if users is not None:
+                    self._cache_set(key, users)
+        for index, users in zip(large, large_results):
+            results[index] = users
+        
+        return [users if users is not None else [] for users in results]
+    
+    async def _extract_batch(self, documents: List[str]) -> List[Optional[List[Dict[str, str]]]]:
+        """One request for a batch; None marks a document whose extraction failed"""
+        if len(documents) == 1:
+            try:
+                return [await self._request(
+                    "You are a data extraction specialist.", self._user_data_prompt(documents[0]),
+                    'extract_user_data'
+                )]
+            except Exception as e:
+                logger.error(f"User data extraction failed: {e}")
+                return [None]
+        
+        numbered = '\n'.join(
+            f"--- Document {i} ---\n{document}" for i, document in enumerate(documents, start=1)
+        )
+        prompt = f"""
+        Extract user information from each of the following {len(documents)} member lists
+        (one row per line, cells separated by " | "):
+        
+        {numbered}
+        
+        Return a JSON object mapping each document number (as a string) to its users.
+        For every document:
+        """ + USER_FIELDS_PROMPT
+        
+        try:
+            result = await self._request("You are a data extraction specialist.", prompt, 'extract_user_data_batch')
+            return [result.get(str(i), []) for i in range(1, len(documents) + 1)]
+        except Exception as e:
+            logger.error(f"Batched user data extraction failed: {e}")
+            return [None] * len(documents)
@@ -1,16 +1,58 @@
-import asyncio
-from playwright.async_api import async_playwright, Page, Browser
-from typing import Optional, Dict, Any
+import json
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from typing import Optional, Dict, Any, List
 import logging
+from .lean_profile import LeanProfile
+from .response_capture import ResponseCapture
+from .smart_wait import PageTimings, SmartWaiter
+from .telemetry import telemetry, traced
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+async def new_context(browser: Browser, config: Dict[str, Any], profile: Optional[LeanProfile] = None,
+                      adapter: Optional[str] = None) -> BrowserContext:
+    """Create a browser context from the browser config section"""
+    options = {
+        'viewport': config.get('viewport', {'width': 1920, 'height': 1080}),
+        'user_agent': USER_AGENT
+    }
+    if profile:
+        options.update(profile.context_options())
+    context = await browser.new_context(**options)
+    if profile:
+        await profile.apply(context, adapter)
+    return context
+
+
+async def new_page(context: BrowserContext, config: Dict[str, Any]) -> Page:
+    """Open a page in context with the configured default timeout"""
+    page = await context.new_page()
+    page.set_default_timeout(config.get('timeout', 30000))
+    return page
+
+
 class BrowserManager:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], timings: Optional[PageTimings] = None):
         self.config = config
         self.playwright = None
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.timings = timings or PageTimings(config.get('waits', {}))
+        self.waiter: Optional[SmartWaiter] = None
+        self.profile = LeanProfile(config.get('lean', {}))
+    
+    @classmethod
+    def from_page(cls, config: Dict[str, Any], page: Page, timings: Optional[PageTimings] = None) -> 'BrowserManager':
+        """Wrap a page owned by someone else (e.g. a BrowserPool)"""
+        manager = cls(config, timings)
+        manager.context = page.context
+        manager.page = page
+        manager.waiter = SmartWaiter(page, manager.timings, config.get('waits', {}))
+        return manager
     
     async def start(self):
         """Initialize browser instance"""
@@ -19,26 +61,24 @@ class BrowserManager:
             headless=self.config.get('headless', True)
         )
         
-        context = await self.browser.new_context(
-            viewport=self.config.get('viewport', {'width': 1920, 'height': 1080}),
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        
-        self.page = await context.new_page()
-        await self.page.set_default_timeout(self.config.get('timeout', 30000))
+        self.context = await new_context(self.browser, self.config, self.profile)
+        self.page = await new_page(self.context, self.config)
+        self.waiter = SmartWaiter(self.page, self.timings, self.config.get('waits', {}))
         
         return self.page
     
+    @traced('browser.navigate', 'url')
     async def navigate(self, url: str):
         """Navigate to URL with error handling"""
         try:
             await self.page.goto(url, wait_until='domcontentloaded')
-            await self.page.wait_for_timeout(2000)  # Wait for dynamic content
+            await self.waiter.for_page_ready()  # Wait for dynamic content
             return True
         except Exception as e:
             logger.error(f"Navigation failed: {e}")
             return False
     
+    @traced('browser.wait_for_element', 'selector')
     async def wait_for_element(self, selector: str, timeout: int = 10000):
         """Wait for element to be visible"""
         try:
@@ -48,6 +88,7 @@ class BrowserManager:
             logger.error(f"Element not found: {selector}, Error: {e}")
             return False
     
+    @traced('browser.click', 'selector')
     async def click_element(self, selector: str):
         """Click element with retry logic"""
         for attempt in range(3):
@@ -56,9 +97,36 @@ class BrowserManager:
                 return True
             except Exception as e:
                 logger.warning(f"Click attempt {attempt + 1} failed: {e}")
-                await asyncio.sleep(1)
+                telemetry.increment('browser_click_retries_total')
+                # Retry as soon as the element is actionable again, not after a fixed delay
+                await self.waiter.for_dom_quiet()
+                await self.waiter.for_selector(selector)
         return False
     
+    @traced('browser.click_and_wait', 'selector')
+    async def click_and_wait(self, selector: str) -> bool:
+        """Click an element and wait for the resulting page update to settle"""
+        if not await self.click_element(selector):
+            return False
+        await self.waiter.for_page_ready()
+        return True
+    
+    @traced('browser.wait_for_page_ready')
+    async def wait_for_page_ready(self) -> bool:
+        """Wait for network idle (where reachable) and DOM quiescence"""
+        return await self.waiter.for_page_ready()
+    
+    @traced('browser.wait_for_dom_quiet')
+    async def wait_for_dom_quiet(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the DOM stops changing"""
+        return await self.waiter.for_dom_quiet(timeout)
+    
+    @traced('browser.wait_for_url_change')
+    async def wait_for_url_change(self, previous_url: str, timeout: Optional[float] = None) -> bool:
+        """Wait until the page navigates away from previous_url"""
+        return await self.waiter.for_url_change(previous_url, timeout)
+    
+    @traced('browser.type_text', 'selector')
     async def type_text(self, selector: str, text: str):
         """Type text into element"""
         try:
@@ -68,10 +136,69 @@ class BrowserManager:
             logger.error(f"Failed to type text: {e}")
             return False
     
+    @traced('browser.select_option', 'selector')
+    async def select_option(self, selector: str, value: str):
+        """Choose an option of a <select> by value or label"""
+        try:
+            try:
+                await self.page.select_option(selector, value)
+            except Exception:
+                await self.page.select_option(selector, label=value)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to select option: {e}")
+            return False
+    
+    @traced('browser.evaluate')
+    async def evaluate(self, script: str, arg: Any = None) -> Any:
+        """Run a JavaScript function in the page and return its JSON result"""
+        return await self.page.evaluate(script, arg)
+    
+    @traced('browser.get_page_content')
     async def get_page_content(self):
         """Get current page HTML content"""
         return await self.page.content()
     
+    async def storage_state(self) -> Dict[str, Any]:
+        """Snapshot cookies and localStorage of the current context"""
+        return await self.context.storage_state()
+    
+    async def restore_storage_state(self, state: Dict[str, Any]):
+        """Load a storage_state() snapshot into the current context"""
+        if state.get('cookies'):
+            await self.context.add_cookies(state['cookies'])
+        
+        # localStorage can only be written from inside a matching origin
+        origins = {o['origin']: o.get('localStorage', []) for o in state.get('origins', [])}
+        if origins:
+            await self.context.add_init_script(
+                script=f"""
+                (() => {{
+                    const origins = {json.dumps(origins)};
+                    const items = origins[window.location.origin] || [];
+                    for (const item of items) {{
+                        if (window.localStorage.getItem(item.name) === null) {{
+                            window.localStorage.setItem(item.name, item.value);
+                        }}
+                    }}
+                }})();
+                """
+            )
+    
+    def capture_responses(self, patterns: List[str]) -> ResponseCapture:
+        """Start recording JSON responses whose URL matches any of patterns"""
+        return ResponseCapture(self.page, patterns).start()
+    
+    async def open_sibling(self) -> 'BrowserManager':
+        """Open another page in this context, sharing its cookies and storage"""
+        page = await new_page(self.context, self.config)
+        return BrowserManager.from_page(self.config, page, self.timings)
+    
+    async def close_page(self):
+        """Close only this manager's page (e.g. a sibling opened for fan-out)"""
+        if self.page and not self.page.is_closed():
+            await self.page.close()
+    
     async def screenshot(self, path: str):
         """Take screenshot for debugging"""
         await self.page.screenshot(path=path)
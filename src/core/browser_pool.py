@@ -0,0 +1,146 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+import logging
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+from .browser_manager import BrowserManager, new_context, new_page
+from .lean_profile import LeanProfile
+from .smart_wait import PageTimings
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession:
+    """A context/page pair owned by a BrowserPool"""
+
+    def __init__(self, key: Optional[str], context: BrowserContext, page: Page, manager: BrowserManager):
+        self.key = key
+        self.context = context
+        self.page = page
+        self.manager = manager
+        self.last_used = time.monotonic()
+
+
+class BrowserPool:
+    """One long-lived browser shared by a bounded pool of isolated contexts.
+
+    Sessions are checked out with ``async with pool.session(key) as browser_manager``.
+    A session checked in under a key is only reused for that same key, so tenants
+    never share cookies or storage. ``key=None`` sessions are closed on return:
+    clearing cookies would leave localStorage, sessionStorage and IndexedDB of
+    every visited origin behind for the next caller.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        pool_config = config.get('pool', {})
+        self.max_size = pool_config.get('max_size', 4)
+        self.max_idle_seconds = pool_config.get('max_idle_seconds', 300)
+        self.health_check_timeout = pool_config.get('health_check_timeout', 2.0)
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self._idle: List[PooledSession] = []
+        self._in_use = 0
+        self._slots = asyncio.Semaphore(self.max_size)
+        self.timings = PageTimings(config.get('waits', {}))
+        self.profile = LeanProfile(config.get('lean', {}))
+        self.stats = {'created': 0, 'reused': 0, 'evicted': 0, 'unhealthy': 0}
+
+    async def start(self):
+        """Launch the shared browser process"""
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.config.get('headless', True)
+        )
+        return self
+
+    @asynccontextmanager
+    async def session(self, key: Optional[str] = None, adapter: Optional[str] = None) -> AsyncIterator[BrowserManager]:
+        """Check out a BrowserManager bound to a pooled page; adapter selects the lean-profile allow-list"""
+        await self._slots.acquire()
+        try:
+            pooled = await self._checkout(key, adapter)
+            self._in_use += 1
+            try:
+                yield pooled.manager
+            finally:
+                self._in_use -= 1
+                await self._checkin(pooled)
+        finally:
+            self._slots.release()
+
+    async def _checkout(self, key: Optional[str], adapter: Optional[str] = None) -> PooledSession:
+        await self.evict_idle()
+
+        # Most recently used first keeps the warmest context in play
+        for pooled in reversed(self._idle):
+            if pooled.key != key:
+                continue
+            self._idle.remove(pooled)
+            if await self._is_healthy(pooled):
+                self.stats['reused'] += 1
+                return pooled
+            self.stats['unhealthy'] += 1
+            await self._discard(pooled)
+            break
+
+        # Make room by dropping the stalest idle session of another tenant
+        if self._idle and len(self._idle) + self._in_use >= self.max_size:
+            await self._discard(self._idle.pop(0))
+            self.stats['evicted'] += 1
+
+        return await self._create(key, adapter)
+
+    async def _checkin(self, pooled: PooledSession):
+        if pooled.key is None or pooled.page.is_closed():
+            await self._discard(pooled)
+            return
+
+        pooled.last_used = time.monotonic()
+        self._idle.append(pooled)
+
+    async def _create(self, key: Optional[str], adapter: Optional[str] = None) -> PooledSession:
+        if not self.browser:
+            raise RuntimeError("BrowserPool.start() must be called before checking out sessions")
+
+        context = await new_context(self.browser, self.config, self.profile, adapter)
+        page = await new_page(context, self.config)
+        self.stats['created'] += 1
+        return PooledSession(key, context, page, BrowserManager.from_page(self.config, page, self.timings))
+
+    async def _is_healthy(self, pooled: PooledSession) -> bool:
+        if pooled.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(pooled.page.evaluate('1'), timeout=self.health_check_timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled session failed health check: {e}")
+            return False
+
+    async def _discard(self, pooled: PooledSession):
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled context: {e}")
+
+    async def evict_idle(self):
+        """Close idle sessions unused for longer than max_idle_seconds"""
+        cutoff = time.monotonic() - self.max_idle_seconds
+        stale = [pooled for pooled in self._idle if pooled.last_used < cutoff]
+        for pooled in stale:
+            self._idle.remove(pooled)
+            await self._discard(pooled)
+            self.stats['evicted'] += 1
+
+    async def close(self):
+        """Close all pooled contexts and the shared browser"""
+        while self._idle:
+            await self._discard(self._idle.pop())
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
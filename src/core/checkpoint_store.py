@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+from .user_snapshot import user_key
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Progress of unfinished member-list extractions per (adapter, tenant), kept in SQLite.
+
+    After every page the cursor to resume from and that page's users are
+    saved, so an extraction that dies part-way (crash, expired session,
+    CAPTCHA) continues where it stopped on the next attempt. Checkpoints
+    older than max_age_minutes are discarded; their cursors have likely
+    expired along with the session.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.max_age = config.get('max_age_minutes', 240) * 60
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(config.get('path', ':memory:'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS extraction_checkpoint ('
+            'adapter TEXT NOT NULL, tenant TEXT NOT NULL, cursor TEXT NOT NULL, '
+            'pages INTEGER NOT NULL, started_at REAL NOT NULL, updated_at REAL NOT NULL, '
+            'PRIMARY KEY (adapter, tenant))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS extraction_checkpoint_user ('
+            'adapter TEXT NOT NULL, tenant TEXT NOT NULL, email TEXT NOT NULL, record TEXT NOT NULL, '
+            'UNIQUE (adapter, tenant, email))'
+        )
+        self._db.commit()
+
+    def load(self, adapter: str, tenant: str) -> Optional[Dict[str, Any]]:
+        """Return {'cursor', 'pages', 'users', 'started_at'} of an unfinished extraction, if any"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT cursor, pages, started_at, updated_at FROM extraction_checkpoint '
+                'WHERE adapter = ? AND tenant = ?',
+                (adapter, tenant)
+            ).fetchone()
+            if not row:
+                return None
+            if time.time() - row[3] > self.max_age:
+                logger.info(f"Discarding stale {adapter}/{tenant} extraction checkpoint")
+                self._clear(adapter, tenant)
+                return None
+            records = self._db.execute(
+                'SELECT record FROM extraction_checkpoint_user WHERE adapter = ? AND tenant = ? ORDER BY rowid',
+                (adapter, tenant)
+            ).fetchall()
+        return {
+            'cursor': json.loads(row[0]),
+            'pages': row[1],
+            'started_at': row[2],
+            'users': [json.loads(record) for (record,) in records]
+        }
+
+    def save_page(self, adapter: str, tenant: str, users: List[Dict[str, str]], cursor: Dict[str, Any]):
+        """Record one more extracted page and the cursor that continues after it"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO extraction_checkpoint (adapter, tenant, cursor, pages, started_at, updated_at) '
+                'VALUES (?, ?, ?, 1, ?, ?) '
+                'ON CONFLICT (adapter, tenant) DO UPDATE SET cursor = excluded.cursor, '
+                'pages = pages + 1, updated_at = excluded.updated_at',
+                (adapter, tenant, json.dumps(cursor), now, now)
+            )
+            self._db.executemany(
+                'INSERT OR IGNORE INTO extraction_checkpoint_user (adapter, tenant, email, record) '
+                'VALUES (?, ?, ?, ?)',
+                [(adapter, tenant, user_key(user), json.dumps(user)) for user in users if user_key(user)]
+            )
+            self._db.commit()
+
+    def clear(self, adapter: str, tenant: str):
+        """Forget the checkpoint once the extraction has finished"""
+        with self._lock:
+            self._clear(adapter, tenant)
+
+    def _clear(self, adapter: str, tenant: str):
+        self._db.execute('DELETE FROM extraction_checkpoint WHERE adapter = ? AND tenant = ?', (adapter, tenant))
+        self._db.execute('DELETE FROM extraction_checkpoint_user WHERE adapter = ? AND tenant = ?', (adapter, tenant))
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
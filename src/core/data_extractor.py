@@ -1,99 +1,259 @@
+import asyncio
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from concurrent.futures import Executor
+from contextlib import aclosing
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 import re
 import logging
+from .header_schema import HeaderSchema, header_schema
+from .html_parser import parse_html, select_parser
+from .telemetry import telemetry
 
 logger = logging.getLogger(__name__)
 
+# Most specific first: a broad match such as [class*="page"] is often a layout
+# wrapper ("page-content") around the member table itself
+PAGINATION_SELECTORS = [
+    'nav[aria-label*="pagination" i]',
+    '[aria-label*="pagination" i]',
+    '.pagination',
+    '.pager',
+    '[class*="page"]',
+    '[class*="next"]',
+    '[class*="prev"]'
+]
+
+# "Page 2 of 40" / "page 2/40"
+PAGE_COUNTER = re.compile(r'\bpage\s+\d+\s*(?:of|/)\s*(\d+)', re.I)
+# Page counters larger than this multiple of the highest linked page (or than
+# MAX_UNLINKED_PAGES without numbered links) are misreads and are ignored
+MAX_PAGES_PER_LINKED_PAGE = 50
+MAX_UNLINKED_PAGES = 1000
+
+# Runs inside the page: the <th> text of every table, in document order. Python
+# picks the user tables from these with HeaderSchema.is_user_table (synonyms and
+# fuzzy matches included) before any cell text leaves the browser.
+TABLE_HEADERS_SCRIPT = """
+() => Array.from(document.querySelectorAll('table'),
+    (table) => Array.from(table.querySelectorAll('th'), (th) => th.textContent || ''))
+"""
+
+# Runs inside the page: header and cell text of the tables at the given indices
+USER_TABLES_SCRIPT = """
+(indices) => {
+    const text = (el) => (el.textContent || '').trim();
+    const all = document.querySelectorAll('table');
+    const tables = [];
+    for (const index of indices) {
+        const table = all[index];
+        if (!table) {
+            continue;
+        }
+        const rows = Array.from(table.querySelectorAll('tr'))
+            .map((tr) => Array.from(tr.querySelectorAll('td, th'), text));
+        if (rows.length) {
+            tables.push({headers: rows[0], rows: rows.slice(1)});
+        }
+    }
+    return tables;
+}
+"""
+
+# Returns the outerHTML of the first pagination container, so pagination can be
+# analyzed without serializing the whole document. Elements that contain a
+# table are wrappers, not pagination, and are skipped.
+PAGINATION_SCRIPT = """
+(selectors) => {
+    for (const selector of selectors) {
+        for (const element of document.querySelectorAll(selector)) {
+            if (!element.querySelector('table')) {
+                return element.outerHTML;
+            }
+        }
+    }
+    return null;
+}
+"""
+
+def analyze_document(html_content: str, parser: str, schema: Optional[HeaderSchema] = None
+                     ) -> Tuple[List[Tuple[List[str], List[List[str]]]], Dict[str, Any]]:
+    """Header/cell text of every user table plus pagination info; runs in a parse worker process"""
+    extractor = DataExtractor(None, parser)
+    soup = extractor.parse(html_content)
+    tables = [
+        extractor._table_rows(table) for table in soup.find_all('table') if extractor._is_user_table(table, schema)
+    ]
+    return tables, extractor.extract_pagination_info(html_content)
+
+
+def _page_url_pattern(numbered: List[Tuple[int, str]]) -> Optional[Dict[str, Any]]:
+    """Find a query parameter that is a linear function of the page number (page=N, offset=(N-1)*size, ...)"""
+    links = [(number, urlsplit(href)) for number, href in numbered]
+    if len({number for number, _ in links}) < 2 or len({parts.path for _, parts in links}) > 1:
+        return None
+    
+    queries = [(number, dict(parse_qsl(parts.query, keep_blank_values=True))) for number, parts in links]
+    for param in queries[-1][1]:
+        # Page 1 often links to the bare URL
+        points = {number: query[param] for number, query in queries if param in query}
+        if len(points) < 2 or any(number != 1 for number, query in queries if param not in query):
+            continue
+        if not all(value.isdigit() for value in points.values()):
+            continue
+        
+        (n1, v1), (n2, v2) = sorted(points.items())[:2]
+        step, remainder = divmod(int(v2) - int(v1), n2 - n1)
+        if remainder or step <= 0:
+            continue
+        base = int(v1) - step * n1
+        if all(int(value) == base + step * number for number, value in points.items()):
+            href = next(href for number, href in numbered if number in points)
+            return {'href': href, 'param': param, 'step': step, 'base': base}
+    return None
+
+
 class DataExtractor:
-    def __init__(self, ai_agent):
+    """Turns admin pages into user records.
+
+    With an executor (a ProcessPoolExecutor), documents of at least
+    offload_min_chars are parsed in another process so large pages do not
+    block the event loop; only cell text and pagination info come back.
+
+    Table headers are resolved to user fields by a HeaderSchema, once per
+    distinct header row; adapters pass their own schema for console-specific
+    header names.
+    """
+
+    def __init__(self, ai_agent, parser: Optional[str] = None, executor: Optional[Executor] = None,
+                 offload_min_chars: int = 200000):
         self.ai_agent = ai_agent
+        self.parser = select_parser(parser)
+        self.executor = executor
+        self.offload_min_chars = offload_min_chars
+        self.header_schema = header_schema()
+        self._last_html: Optional[str] = None
+        self._last_soup: Optional[BeautifulSoup] = None
+        self._offloaded: Optional[Tuple[str, Dict[str, Any]]] = None
+    
+    def parse(self, html_content: str) -> BeautifulSoup:
+        """Parse a document once; table and pagination analysis share the tree"""
+        if self._last_soup is None or (html_content is not self._last_html and html_content != self._last_html):
+            with telemetry.span('extract.parse', parser=self.parser, size=len(html_content)):
+                self._last_soup = parse_html(html_content, self.parser)
+            self._last_html = html_content
+        return self._last_soup
+    
+    def release(self):
+        """Drop the cached document and offloaded answer, so the shared extractor does not pin them"""
+        self._last_html = None
+        self._last_soup = None
+        self._offloaded = None
     
-    def extract_users_from_table(self, html_content: str) -> List[Dict[str, str]]:
+    async def extract_users_from_table(self, html_content: str,
+                                       schema: Optional[HeaderSchema] = None) -> List[Dict[str, str]]:
         """Extract user data from HTML table"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        return [user async for user in self.iter_users_from_table(html_content, schema)]
+    
+    async def iter_users_from_table(self, html_content: str,
+                                    schema: Optional[HeaderSchema] = None) -> AsyncIterator[Dict[str, str]]:
+        """Users of the document's user tables; without any, the AI extraction's users as each chunk finishes"""
         users = []
+        if self.executor is not None and len(html_content) >= self.offload_min_chars:
+            with telemetry.span('extract.parse', parser=self.parser, size=len(html_content), offloaded=True):
+                tables, pagination_info = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, analyze_document, html_content, self.parser, schema
+                )
+            # extract_pagination_info on the same document reuses the worker's answer
+            self._offloaded = (html_content, pagination_info)
+            for headers, rows in tables:
+                users.extend(self._rows_to_users(headers, rows, schema))
+        else:
+            soup = self.parse(html_content)
+            
+            # Find potential user tables
+            tables = soup.find_all('table')
+            for table in tables:
+                if self._is_user_table(table, schema):
+                    users.extend(self._parse_user_table(table, schema))
         
-        # Find potential user tables
-        tables = soup.find_all('table')
-        for table in tables:
-            if self._is_user_table(table):
-                users.extend(self._parse_user_table(table))
+        for user in users:
+            yield user
         
         # If no tables found, try AI extraction
         if not users:
-            users = self.ai_agent.extract_user_data(html_content)
+            telemetry.increment('extract_ai_fallbacks_total')
+            async with aclosing(self.ai_agent.iter_user_data(html_content)) as ai_users:
+                async for user in ai_users:
+                    yield user
+    
+    async def extract_users_from_page(self, browser_manager,
+                                      schema: Optional[HeaderSchema] = None) -> List[Dict[str, str]]:
+        """Extract user tables inside the browser, transferring only cell text"""
+        schema = schema or self.header_schema
+        try:
+            headers = await browser_manager.evaluate(TABLE_HEADERS_SCRIPT)
+            indices = [index for index, th in enumerate(headers) if th and schema.is_user_table(th)]
+            tables = await browser_manager.evaluate(USER_TABLES_SCRIPT, indices) if indices else []
+        except Exception as e:
+            logger.warning(f"In-browser table extraction failed: {e}")
+            return []
         
+        users = []
+        with telemetry.span('extract.rows_to_users', tables=len(tables)):
+            for table in tables:
+                users.extend(self._rows_to_users(table['headers'], table['rows'], schema))
         return users
     
-    def _is_user_table(self, table) -> bool:
+    async def extract_pagination_from_page(self, browser_manager) -> Dict[str, Any]:
+        """Extract pagination info from just the pagination element's HTML"""
+        try:
+            fragment = await browser_manager.evaluate(PAGINATION_SCRIPT, PAGINATION_SELECTORS)
+        except Exception as e:
+            logger.warning(f"In-browser pagination lookup failed: {e}")
+            fragment = None
+        return self.extract_pagination_info(fragment or '')
+    
+    def _is_user_table(self, table, schema: Optional[HeaderSchema] = None) -> bool:
         """Determine if table contains user data"""
-        headers = table.find_all('th')
-        header_text = ' '.join([th.get_text().lower() for th in headers])
-        
-        user_indicators = ['name', 'email', 'user', 'member', 'role', 'permission']
-        return any(indicator in header_text for indicator in user_indicators)
+        return (schema or self.header_schema).is_user_table([th.get_text() for th in table.find_all('th')])
     
-    def _parse_user_table(self, table) -> List[Dict[str, str]]:
+    def _parse_user_table(self, table, schema: Optional[HeaderSchema] = None) -> List[Dict[str, str]]:
         """Parse user data from table"""
-        users = []
+        headers, data_rows = self._table_rows(table)
+        return self._rows_to_users(headers, data_rows, schema)
+    
+    def _table_rows(self, table) -> Tuple[List[str], List[List[str]]]:
+        """Header text and cell text rows of a table"""
         rows = table.find_all('tr')
         
         if not rows:
-            return users
-        
-        # Get headers
-        headers = [th.get_text().strip().lower() for th in rows[0].find_all(['th', 'td'])]
-        
-        # Process data rows
-        for row in rows[1:]:
-            cells = row.find_all(['td', 'th'])
-            if len(cells) >= len(headers):
-                user_data = {}
-                for i, cell in enumerate(cells[:len(headers)]):
-                    if i < len(headers):
-                        user_data[headers[i]] = cell.get_text().strip()
-                
-                # Normalize field names
-                normalized_user = self._normalize_user_data(user_data)
-                if normalized_user.get('email'):  # Must have email
-                    users.append(normalized_user)
+            return [], []
         
-        return users
+        headers = [th.get_text() for th in rows[0].find_all(['th', 'td'])]
+        data_rows = [[cell.get_text() for cell in row.find_all(['td', 'th'])] for row in rows[1:]]
+        return headers, data_rows
+    
+    def _rows_to_users(self, headers: List[str], rows: List[List[str]],
+                       schema: Optional[HeaderSchema] = None) -> List[Dict[str, str]]:
+        """Turn header + cell text rows into normalized user records (rows without an email are skipped)"""
+        return (schema or self.header_schema).compile(headers).apply(rows)
     
     def _normalize_user_data(self, user_data: Dict[str, str]) -> Dict[str, str]:
         """Normalize field names and data"""
-        normalized = {}
-        
-        # Field mappings
-        field_mappings = {
-            'name': ['name', 'full_name', 'display_name', 'user_name'],
-            'email': ['email', 'email_address', 'mail'],
-            'role': ['role', 'permission', 'access_level', 'type'],
-            'last_login': ['last_login', 'last_seen', 'last_active'],
-            'status': ['status', 'state', 'active']
-        }
-        
-        for standard_field, possible_fields in field_mappings.items():
-            for field in possible_fields:
-                if field in user_data:
-                    normalized[standard_field] = user_data[field]
-                    break
-        
-        return normalized
+        return self.header_schema.compile(tuple(user_data)).record(tuple(user_data.values()))
     
     def extract_pagination_info(self, html_content: str) -> Dict[str, Any]:
-        """Extract pagination information"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Look for pagination elements
-        pagination_selectors = [
-            '.pagination',
-            '.pager',
-            '[class*="page"]',
-            '[class*="next"]',
-            '[class*="prev"]'
-        ]
+        """Extract pagination information; this is the last use of a page, so the cache is released"""
+        try:
+            return self._pagination_info(html_content)
+        finally:
+            self.release()
+    
+    def _pagination_info(self, html_content: str) -> Dict[str, Any]:
+        if self._offloaded is not None and (html_content is self._offloaded[0] or html_content == self._offloaded[0]):
+            return dict(self._offloaded[1])
+        soup = self.parse(html_content)
         
         pagination_info = {
             'has_next': False,
@@ -104,11 +264,11 @@ class DataExtractor:
             'prev_selector': None
         }
         
-        for selector in pagination_selectors:
-            elements = soup.select(selector)
-            if elements:
+        for selector in PAGINATION_SELECTORS:
+            element = next((element for element in soup.select(selector) if element.find('table') is None), None)
+            if element is not None:
                 # Analyze pagination structure
-                pagination_info.update(self._analyze_pagination(elements[0]))
+                pagination_info.update(self._analyze_pagination(element))
                 break
         
         return pagination_info
@@ -118,19 +278,68 @@ class DataExtractor:
         info = {}
         
         # Look for next/previous buttons
-        next_button = pagination_element.find(['a', 'button'], text=re.compile(r'next|>', re.I))
-        prev_button = pagination_element.find(['a', 'button'], text=re.compile(r'prev|<', re.I))
+        next_button = pagination_element.find(['a', 'button'], string=re.compile(r'next|>', re.I))
+        prev_button = pagination_element.find(['a', 'button'], string=re.compile(r'prev|<', re.I))
         
-        info['has_next'] = next_button is not None and not next_button.get('disabled')
-        info['has_previous'] = prev_button is not None and not prev_button.get('disabled')
+        # disabled is a boolean attribute: present with an empty value when set
+        info['has_next'] = next_button is not None and not next_button.has_attr('disabled')
+        info['has_previous'] = prev_button is not None and not prev_button.has_attr('disabled')
         
         if next_button:
             info['next_selector'] = self._get_element_selector(next_button)
         if prev_button:
             info['prev_selector'] = self._get_element_selector(prev_button)
         
+        info.update(self._analyze_page_links(pagination_element))
+        return info
+    
+    def _analyze_page_links(self, pagination_element) -> Dict[str, Any]:
+        """Total/current page and, from numbered links, how page numbers map onto the URL"""
+        info = {}
+        numbered = []
+        for link in pagination_element.find_all('a', href=True):
+            text = link.get_text().strip()
+            if text.isdigit():
+                numbered.append((int(text), link['href']))
+        
+        # "Page 2 of 40" style counters also give the total; "Showing 1-50 of 1200" counts items, not pages
+        numbers = [number for number, _ in numbered]
+        counter = PAGE_COUNTER.search(pagination_element.get_text(' '))
+        if counter:
+            total = int(counter.group(1))
+            limit = max(numbers) * MAX_PAGES_PER_LINKED_PAGE if numbers else MAX_UNLINKED_PAGES
+            if total <= limit:
+                numbers.append(total)
+            else:
+                logger.warning(f"Ignoring page counter {counter.group(0)!r}: far beyond the linked pages")
+        if numbers:
+            info['total_pages'] = max(numbers)
+        
+        current = (pagination_element.find(attrs={'aria-current': True}) or
+                   pagination_element.find(class_=re.compile(r'^(current|active|selected)$')))
+        if current is not None and current.get_text().strip().isdigit():
+            info['current_page'] = int(current.get_text().strip())
+        
+        pattern = _page_url_pattern(numbered)
+        if pattern:
+            info['page_url_pattern'] = pattern
         return info
     
+    def page_urls(self, pagination_info: Dict[str, Any], current_url: str) -> List[str]:
+        """URLs of pages 1..total_pages, when the page links follow a query-parameter pattern"""
+        pattern = pagination_info.get('page_url_pattern')
+        if not pattern:
+            return []
+        
+        parts = urlsplit(urljoin(current_url, pattern['href']))
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        urls = []
+        for number in range(1, pagination_info.get('total_pages', 1) + 1):
+            value = str(pattern['base'] + pattern['step'] * number)
+            page_query = [(name, value if name == pattern['param'] else item) for name, item in query]
+            urls.append(urlunsplit(parts._replace(query=urlencode(page_query))))
+        return urls
+    
     def _get_element_selector(self, element) -> str:
         """Generate CSS selector for element"""
         # Simple selector generation
@@ -0,0 +1,53 @@
+import hashlib
+import re
+from typing import List
+
+from bs4 import Tag
+
+from .html_parser import parse_html
+
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head', 'link', 'meta'}
+
+# Build-generated class names (css-1q2w3e, sc-AxjAm, jsx-123) change on every
+# deploy without changing layout, so only keep plain semantic class tokens.
+_SEMANTIC_CLASS_RE = re.compile(r'^[a-zA-Z][a-zA-Z_-]*$')
+
+
+def _node_signature(tag: Tag) -> str:
+    classes = sorted(c for c in tag.get('class', []) if _SEMANTIC_CLASS_RE.match(c))
+    return '.'.join([tag.name] + classes)
+
+
+def _skeleton(tag: Tag) -> str:
+    children: List[str] = []
+    for child in tag.children:
+        if not isinstance(child, Tag) or child.name in SKIPPED_TAGS:
+            continue
+        child_skeleton = _skeleton(child)
+        # Collapse runs of identical siblings (table rows, list items) into one
+        if children and children[-1].rstrip('*') == child_skeleton:
+            if not children[-1].endswith('*'):
+                children[-1] += '*'
+            continue
+        children.append(child_skeleton)
+
+    signature = _node_signature(tag)
+    if children:
+        return f"{signature}({','.join(children)})"
+    return signature
+
+
+def dom_skeleton(html_content: str) -> str:
+    """Reduce a document to its tag/class structure.
+
+    Text, attribute values (other than semantic classes) and repeated sibling
+    rows are dropped, so two pages with the same layout but different data
+    produce the same skeleton.
+    """
+    soup = parse_html(html_content)
+    return _skeleton(soup.body or soup)
+
+
+def dom_fingerprint(html_content: str) -> str:
+    """Stable short hash of dom_skeleton()"""
+    return hashlib.sha256(dom_skeleton(html_content).encode('utf-8')).hexdigest()[:16]
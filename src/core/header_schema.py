@@ -0,0 +1,153 @@
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Header words that mark a table as a member list
+USER_INDICATORS = ['name', 'email', 'user', 'member', 'role', 'permission']
+
+# Standard user fields and the header names they are read from
+FIELD_MAPPINGS = {
+    'name': ['name', 'full_name', 'display_name', 'user_name'],
+    'email': ['email', 'email_address', 'mail'],
+    'role': ['role', 'permission', 'access_level', 'type'],
+    'last_login': ['last_login', 'last_seen', 'last_active'],
+    'status': ['status', 'state', 'active']
+}
+
+DEFAULT_FUZZY_CUTOFF = 0.85
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def header_key(header: str) -> str:
+    """Header reduced to lower-case words joined by '_' ('E-mail Address' -> 'e_mail_address')"""
+    return _NON_WORD.sub('_', header.lower()).strip('_')
+
+
+class HeaderPlan:
+    """Which column holds which user field, for one header row"""
+
+    __slots__ = ('fields', 'width', 'email_index')
+
+    def __init__(self, fields: Iterable[Tuple[str, int]], width: int):
+        self.fields = tuple(fields)
+        self.width = width
+        self.email_index = next((index for field, index in self.fields if field == 'email'), None)
+
+    def apply(self, rows: Iterable[Sequence[str]]) -> List[Dict[str, str]]:
+        """Records for the rows that have every column and a non-empty email"""
+        email_index = self.email_index
+        if email_index is None:
+            return []
+
+        width = self.width
+        fields = self.fields
+        users = []
+        for cells in rows:
+            if len(cells) >= width and cells[email_index].strip():
+                users.append({field: cells[index].strip() for field, index in fields})
+        return users
+
+    def record(self, values: Sequence[str]) -> Dict[str, str]:
+        """One record from values in header order, without the row checks of apply"""
+        return {field: values[index] for field, index in self.fields}
+
+    def __repr__(self):
+        return f"HeaderPlan({dict(self.fields)}, width={self.width})"
+
+
+class HeaderSchema:
+    """Resolves header rows into HeaderPlans, once per distinct header row.
+
+    Each field takes the first of its names that is a header exactly (as
+    FIELD_MAPPINGS always did), then one that matches ignoring case, spacing
+    and punctuation, and finally the closest remaining header whose
+    similarity ratio is at least fuzzy_cutoff (1.0 turns that pass off).
+    Synonyms are extra names per field, tried before the built-in ones.
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, List[str]]] = None,
+                 fuzzy_cutoff: float = DEFAULT_FUZZY_CUTOFF, max_plans: int = 512):
+        self.names: Dict[str, List[str]] = {field: list(names) for field, names in FIELD_MAPPINGS.items()}
+        extra = []
+        for field, names in (synonyms or {}).items():
+            if field not in self.names:
+                logger.warning(f"Ignoring header synonyms for unknown user field {field}")
+                continue
+            names = [name.strip().lower() for name in names]
+            self.names[field] = names + [name for name in self.names[field] if name not in names]
+            extra.extend(names)
+
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.indicators = USER_INDICATORS + [name for name in dict.fromkeys(extra) if name not in USER_INDICATORS]
+        self.max_plans = max_plans
+        self._keys = {field: list(dict.fromkeys(header_key(name) for name in names))
+                      for field, names in self.names.items()}
+        self._indicator_pattern = re.compile('|'.join(re.escape(indicator) for indicator in self.indicators))
+        self._plans: Dict[Tuple[str, ...], HeaderPlan] = {}
+
+    def compile(self, headers: Sequence[str]) -> HeaderPlan:
+        key = tuple(headers)
+        plan = self._plans.get(key)
+        if plan is None:
+            if len(self._plans) >= self.max_plans:
+                self._plans.pop(next(iter(self._plans)))
+            plan = self._plans[key] = self._compile(key)
+        return plan
+
+    def is_user_table(self, headers: Sequence[str]) -> bool:
+        """Header text mentions a user indicator, or the headers resolve to an email column"""
+        if self._indicator_pattern.search(' '.join(headers).lower()):
+            return True
+        return self.compile(headers).email_index is not None
+
+    def _compile(self, headers: Tuple[str, ...]) -> HeaderPlan:
+        lowered = [header.strip().lower() for header in headers]
+        # A repeated header resolves to its last column, as when rows were keyed by header
+        exact = {header: index for index, header in enumerate(lowered)}
+        assigned: Dict[str, int] = {}
+        for field, names in self.names.items():
+            index = next((exact[name] for name in names if name in exact), None)
+            if index is not None:
+                assigned[field] = index
+
+        taken = set(assigned.values())
+        keyed = {header_key(header): index for index, header in enumerate(lowered)}
+        for field, keys in self._keys.items():
+            if field not in assigned:
+                index = next((keyed[key] for key in keys if key in keyed and keyed[key] not in taken), None)
+                if index is not None:
+                    assigned[field] = index
+                    taken.add(index)
+
+        if self.fuzzy_cutoff < 1:
+            for field, keys in self._keys.items():
+                if field in assigned:
+                    continue
+                score, index, header = max(
+                    ((SequenceMatcher(None, key, header).ratio(), index, header)
+                     for header, index in keyed.items() if header and index not in taken for key in keys),
+                    default=(0, None, None)
+                )
+                if index is not None and score >= self.fuzzy_cutoff:
+                    logger.debug(f"Header {headers[index]!r} read as {field} (similarity {score:.2f})")
+                    assigned[field] = index
+                    taken.add(index)
+
+        return HeaderPlan(((field, assigned[field]) for field in self.names if field in assigned), len(headers))
+
+
+_schemas: Dict[Any, HeaderSchema] = {}
+
+
+def header_schema(synonyms: Optional[Dict[str, List[str]]] = None,
+                  fuzzy_cutoff: float = DEFAULT_FUZZY_CUTOFF) -> HeaderSchema:
+    """Shared schema per synonym set, so compiled plans outlive a single adapter instance"""
+    key = (tuple((field, tuple(names)) for field, names in sorted((synonyms or {}).items())), fuzzy_cutoff)
+    schema = _schemas.get(key)
+    if schema is None:
+        schema = _schemas[key] = HeaderSchema(synonyms, fuzzy_cutoff)
+    return schema
@@ -0,0 +1,35 @@
+from typing import Optional
+import logging
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+logger = logging.getLogger(__name__)
+
+# Fastest first: lxml is C-backed, html.parser is the pure-Python fallback
+PARSER_BACKENDS = ('lxml', 'html.parser')
+
+_resolved = {}
+
+
+def select_parser(preferred: Optional[str] = None) -> str:
+    """Return the preferred BeautifulSoup backend if installed, else the next available one"""
+    preferred = preferred or PARSER_BACKENDS[0]
+    if preferred in _resolved:
+        return _resolved[preferred]
+
+    candidates = [preferred] + [p for p in PARSER_BACKENDS if p != preferred]
+    for parser in candidates:
+        try:
+            BeautifulSoup('', parser)
+        except FeatureNotFound:
+            logger.warning(f"HTML parser backend '{parser}' not available")
+            continue
+        _resolved[preferred] = parser
+        return parser
+
+    raise FeatureNotFound(f"No HTML parser backend available from {candidates}")
+
+
+def parse_html(html_content: str, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parse HTML with the fastest available backend"""
+    return BeautifulSoup(html_content, select_parser(parser))
@@ -0,0 +1,224 @@
+import itertools
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+from .html_parser import parse_html
+from .rate_limiter import estimate_tokens
+
+NON_CONTENT_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'iframe', 'head', 'link', 'meta']
+CELL_SEPARATOR = ' | '
+
+# Attributes that help an LLM identify or target an element; everything else
+# (inline styles, tracking/data attributes, event handlers) is dropped.
+KEPT_ATTRIBUTES = (
+    'id', 'name', 'type', 'role', 'href', 'placeholder', 'aria-label', 'data-testid',
+    'title', 'value', 'for', 'disabled', 'checked', 'selected'
+)
+MAX_CLASSES = 4
+MAX_ATTRIBUTE_LENGTH = 60
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _clean(text: str) -> str:
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+_PLAIN_ID_RE = re.compile(r'^-?[A-Za-z_][\w-]*$')
+
+
+def _is_non_content(tag: Tag) -> bool:
+    return tag.name in NON_CONTENT_TAGS or tag.get('aria-hidden') == 'true' or tag.has_attr('hidden')
+
+
+def _content_soup(html_content: str) -> BeautifulSoup:
+    """Parse HTML and drop scripts, styles, SVGs, comments and hidden nodes"""
+    soup = parse_html(html_content)
+    for tag in soup(NON_CONTENT_TAGS):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for tag in soup.find_all(attrs={'aria-hidden': 'true'}):
+        tag.decompose()
+    for tag in soup.find_all(attrs={'hidden': True}):
+        tag.decompose()
+    return soup
+
+
+def _id_selector(element_id: str) -> str:
+    """CSS selector for an id, quoted when the id is not a plain CSS identifier"""
+    if _PLAIN_ID_RE.match(element_id):
+        return f"#{element_id}"
+    escaped = element_id.replace('\\', '\\\\').replace('"', '\\"')
+    return f'[id="{escaped}"]'
+
+
+class ReducedHTML:
+    """Compact outline of a page plus a map from outline node IDs to CSS selectors"""
+
+    def __init__(self, outline: str, node_selectors: Dict[str, str], original_size: int):
+        self.outline = outline
+        self.node_selectors = node_selectors
+        self.original_size = original_size
+        self.reduced_size = len(outline)
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of the original size removed"""
+        if not self.original_size:
+            return 0.0
+        return 1 - self.reduced_size / self.original_size
+
+    def resolve(self, selector: str) -> str:
+        """Translate an outline node ID (``n12`` or ``[n12]``) into a CSS selector"""
+        return self.node_selectors.get(selector.strip().strip('[]'), selector)
+
+    def __repr__(self):
+        return f"ReducedHTML({self.original_size} -> {self.reduced_size} chars, {self.reduction:.0%} smaller)"
+
+
+def _own_text(tag: Tag) -> str:
+    return _clean(' '.join(
+        str(child) for child in tag.children
+        if isinstance(child, NavigableString) and not isinstance(child, Comment)
+    ))
+
+
+def _attributes(tag: Tag) -> List[str]:
+    parts = []
+    for name in KEPT_ATTRIBUTES:
+        if name == 'id' or name not in tag.attrs:
+            continue
+        value = tag.attrs[name]
+        if isinstance(value, list):
+            value = ' '.join(value)
+        value = str(value)[:MAX_ATTRIBUTE_LENGTH]
+        parts.append(f'{name}="{value}"' if value else name)
+    return parts
+
+
+def _signature(tag: Tag) -> Tuple[str, Tuple[str, ...]]:
+    return tag.name, tuple(sorted(tag.get('class', [])))
+
+
+def reduce_html(html_content: str, max_samples: int = 3, max_text: int = 80) -> ReducedHTML:
+    """Reduce a page to a compact, indented element outline for LLM prompts.
+
+    Non-content nodes are removed, runs of more than ``max_samples`` similar
+    siblings are cut to samples plus a count, only targeting-relevant
+    attributes are kept, and single-child wrappers are flattened. Every
+    emitted element gets a stable ID (``[n1]``, ``[n2]``... in document order)
+    that ``ReducedHTML.resolve`` maps back to a CSS selector.
+    """
+    # Non-content nodes are skipped rather than removed: they are still siblings
+    # on the live page, so :nth-of-type positions have to count them
+    soup = parse_html(html_content)
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    root = soup.body or soup
+    lines: List[str] = []
+    node_selectors: Dict[str, str] = {}
+    counter = itertools.count(1)
+
+    def visit(tag: Tag, depth: int, selector: str):
+        children = []
+        type_counts: Dict[str, int] = {}
+        for child in tag.children:
+            if isinstance(child, Tag):
+                type_counts[child.name] = type_counts.get(child.name, 0) + 1
+                if not _is_non_content(child):
+                    children.append((child, f"{child.name}:nth-of-type({type_counts[child.name]})"))
+        text = _own_text(tag)
+        attributes = _attributes(tag)
+
+        if tag.get('id'):
+            selector = _id_selector(tag['id'])
+
+        # Wrappers carrying nothing useful are flattened into their only child
+        if len(children) == 1 and not text and not attributes and not tag.get('id'):
+            child, position = children[0]
+            visit(child, depth, f"{selector} > {position}")
+            return
+
+        node_id = f"n{next(counter)}"
+        node_selectors[node_id] = selector
+        label = tag.name
+        if tag.get('id'):
+            label += f"#{tag['id']}"
+        label += ''.join(f".{c}" for c in tag.get('class', [])[:MAX_CLASSES])
+        line = '  ' * depth + f"[{node_id}] {label}"
+        if attributes:
+            line += ' ' + ' '.join(attributes)
+        if text:
+            line += f' "{text[:max_text]}"'
+        lines.append(line)
+
+        for signature, run in itertools.groupby(children, key=lambda item: _signature(item[0])):
+            run = list(run)
+            for child, position in run[:max_samples]:
+                visit(child, depth + 1, f"{selector} > {position}")
+            if len(run) > max_samples:
+                label = signature[0] + ''.join(f".{c}" for c in signature[1][:MAX_CLASSES])
+                lines.append('  ' * (depth + 1) + f"... {len(run) - max_samples} more <{label}>")
+
+    visit(root, 0, root.name if isinstance(root, Tag) and root.name != '[document]' else ':root')
+    return ReducedHTML('\n'.join(lines), node_selectors, len(html_content))
+
+
+def html_to_rows(html_content: str) -> Tuple[Optional[str], List[str]]:
+    """Reduce a page to one line of text per table/list row.
+
+    Returns ``(header, rows)`` where header is the column header line if the
+    page has one. Cells are joined with `` | `` so positions survive.
+    """
+    soup = _content_soup(html_content)
+
+    header = None
+    rows: List[str] = []
+    for row in soup.select('tr, [role="row"]'):
+        cells = row.find_all(['th', 'td'], recursive=False) or row.select(
+            '[role="cell"], [role="gridcell"], [role="columnheader"]'
+        )
+        line = CELL_SEPARATOR.join(_clean(c.get_text(' ')) for c in cells) if cells else _clean(row.get_text(' '))
+        if not line.strip(' |'):
+            continue
+        is_header = cells and all(c.name == 'th' or c.get('role') == 'columnheader' for c in cells)
+        if is_header and header is None and not rows:
+            header = line
+        else:
+            rows.append(line)
+
+    if not rows:
+        rows = [_clean(li.get_text(' ')) for li in soup.find_all('li')]
+        rows = [line for line in rows if line]
+
+    if not rows:
+        rows = [line for line in (_clean(l) for l in soup.get_text('\n').splitlines()) if line]
+
+    return header, rows
+
+
+def chunk_rows(rows: List[str], max_tokens: int, header: Optional[str] = None) -> List[str]:
+    """Split rows into text chunks of at most ~max_tokens, never splitting a row.
+
+    The header line, if given, is repeated at the top of every chunk.
+    """
+    header_tokens = estimate_tokens(header) if header else 0
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = header_tokens
+
+    for row in rows:
+        row_tokens = estimate_tokens(row)
+        if current and current_tokens + row_tokens > max_tokens:
+            chunks.append('\n'.join(([header] if header else []) + current))
+            current = []
+            current_tokens = header_tokens
+        current.append(row)
+        current_tokens += row_tokens
+
+    if current:
+        chunks.append('\n'.join(([header] if header else []) + current))
+    return chunks
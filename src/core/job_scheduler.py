@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from .telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A single (adapter, tenant, operation) unit of work"""
+
+    def __init__(self, adapter: str, tenant: str, operation: str,
+                 args: Optional[Dict[str, Any]] = None, priority: int = 0,
+                 max_retries: Optional[int] = None):
+        self.adapter = adapter
+        self.tenant = tenant
+        self.operation = operation
+        self.args = args or {}
+        self.priority = priority
+        self.max_retries = max_retries
+        self.attempts = 0
+
+    @property
+    def tenant_key(self) -> Tuple[str, str]:
+        return (self.adapter, self.tenant)
+
+    def __repr__(self):
+        return f"Job({self.adapter}/{self.tenant}:{self.operation})"
+
+
+class JobScheduler:
+    """Runs jobs concurrently with per-SaaS limits and per-tenant serialization.
+
+    Lower ``priority`` values run first. Jobs for the same (adapter, tenant) never
+    overlap; while a tenant is busy, or its SaaS app is at its concurrency limit,
+    its jobs are parked instead of tying up a worker. Failed jobs (the runner
+    raised) are retried with exponential backoff; the tenant stays reserved for
+    the retry, so its later jobs cannot overtake it. on_result, if given, is
+    called with each result as soon as its job finishes.
+    """
+
+    def __init__(self, runner: Callable[[Job], Awaitable[Any]], config: Optional[Dict[str, Any]] = None,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None):
+        config = config or {}
+        self.runner = runner
+        self.on_result = on_result
+        self.max_workers = config.get('max_workers', 16)
+        self.default_concurrency = config.get('default_concurrency', 2)
+        self.concurrency = config.get('concurrency', {})
+        self.max_retries = config.get('max_retries', 3)
+        self.backoff_base = config.get('backoff_base', 1.0)
+        self.backoff_max = config.get('backoff_max', 60.0)
+
+        self.results: List[Dict[str, Any]] = []
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._pending: List[Tuple[int, int, Job]] = []
+        self._sequence = itertools.count()
+        self._adapter_running: Dict[str, int] = {}
+        self._adapter_parked: Dict[str, List[Tuple[int, int, Job]]] = {}
+        self._busy_tenants = set()
+        self._parked: Dict[Tuple[str, str], List[Tuple[int, int, Job]]] = {}
+        # Tenants held across a retry's backoff, and the job they are held for
+        self._retrying: Dict[Tuple[str, str], Job] = {}
+        self._outstanding = 0
+        self._done: Optional[asyncio.Event] = None
+
+    def submit(self, job: Job):
+        """Queue a job; may be called before or during run()"""
+        self._outstanding += 1
+        self._enqueue(job)
+
+    async def run(self) -> List[Dict[str, Any]]:
+        """Run until every submitted job has succeeded or exhausted its retries"""
+        self._queue = asyncio.PriorityQueue()
+        self._done = asyncio.Event()
+        for entry in self._pending:
+            self._queue.put_nowait(entry)
+        self._pending = []
+
+        if self._outstanding == 0:
+            return self.results
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        try:
+            await self._done.wait()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return self.results
+
+    def _enqueue(self, job: Job):
+        entry = (job.priority, next(self._sequence), job)
+        if self._queue is None:
+            self._pending.append(entry)
+        else:
+            self._queue.put_nowait(entry)
+
+    def _adapter_full(self, adapter: str) -> bool:
+        limit = self.concurrency.get(adapter, self.default_concurrency)
+        return self._adapter_running.get(adapter, 0) >= limit
+
+    async def _worker(self):
+        while True:
+            entry = await self._queue.get()
+            job = entry[2]
+            if job.tenant_key in self._busy_tenants and self._retrying.get(job.tenant_key) is not job:
+                heapq.heappush(self._parked.setdefault(job.tenant_key, []), entry)
+                continue
+            if self._adapter_full(job.adapter):
+                heapq.heappush(self._adapter_parked.setdefault(job.adapter, []), entry)
+                continue
+
+            self._retrying.pop(job.tenant_key, None)
+            self._busy_tenants.add(job.tenant_key)
+            self._adapter_running[job.adapter] = self._adapter_running.get(job.adapter, 0) + 1
+            retrying = False
+            try:
+                retrying = await self._execute(job)
+            finally:
+                self._release_adapter(job.adapter)
+                if not retrying:
+                    self._release_tenant(job.tenant_key)
+
+    def _release_adapter(self, adapter: str):
+        self._adapter_running[adapter] -= 1
+        # Everything parked goes back: the first of them may itself be waiting on a busy tenant
+        for entry in self._adapter_parked.pop(adapter, []):
+            self._queue.put_nowait(entry)
+
+    def _release_tenant(self, tenant_key: Tuple[str, str]):
+        self._busy_tenants.discard(tenant_key)
+        parked = self._parked.get(tenant_key)
+        if parked:
+            self._queue.put_nowait(heapq.heappop(parked))
+            if not parked:
+                del self._parked[tenant_key]
+
+    async def _execute(self, job: Job) -> bool:
+        """Run one attempt; True when a retry was scheduled"""
+        job.attempts += 1
+        started = time.monotonic()
+        try:
+            # Everything the job does is labelled with its adapter and tenant
+            with telemetry.context(adapter=job.adapter, tenant=job.tenant), \
+                    telemetry.span('job', operation=job.operation, attempt=job.attempts):
+                result = await self.runner(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return self._handle_failure(job, e, time.monotonic() - started)
+
+        self._finish(job, True, result=result, duration=time.monotonic() - started)
+        return False
+
+    def _handle_failure(self, job: Job, error: Exception, duration: float) -> bool:
+        max_retries = self.max_retries if job.max_retries is None else job.max_retries
+        if job.attempts > max_retries:
+            logger.error(f"{job} failed after {job.attempts} attempts: {error}")
+            telemetry.increment('job_failures_total', adapter=job.adapter)
+            self._finish(job, False, error=str(error), duration=duration)
+            return False
+
+        delay = min(self.backoff_base * 2 ** (job.attempts - 1), self.backoff_max)
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(f"{job} attempt {job.attempts} failed: {error}; retrying in {delay:.1f}s")
+        telemetry.increment('job_retries_total', adapter=job.adapter)
+        self._retrying[job.tenant_key] = job
+        asyncio.get_running_loop().call_later(delay, self._enqueue, job)
+        return True
+
+    def _finish(self, job: Job, success: bool, result: Any = None,
+                error: Optional[str] = None, duration: float = 0.0):
+        record = {
+            'job': job,
+            'success': success,
+            'result': result,
+            'error': error,
+            'attempts': job.attempts,
+            'duration': duration
+        }
+        self.results.append(record)
+        if self.on_result:
+            try:
+                self.on_result(record)
+            except Exception as e:
+                logger.error(f"Result callback failed for {job}: {e}")
+        self._outstanding -= 1
+        if self._outstanding == 0:
+            self._done.set()
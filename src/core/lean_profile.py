@@ -0,0 +1,160 @@
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_TYPES = ['image', 'media', 'font']
+
+DEFAULT_BLOCKED_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'segment.io',
+    'segment.com',
+    'amplitude.com',
+    'mixpanel.com',
+    'hotjar.com',
+    'intercom.io',
+    'intercomcdn.com',
+    'sentry.io',
+    'fullstory.com',
+    'datadoghq.com'
+]
+
+# Typical transfer sizes, used to estimate what blocked requests would have cost.
+# These are averages, not measurements of the requests actually blocked.
+DEFAULT_ESTIMATED_BYTES = {
+    'image': 40000,
+    'media': 500000,
+    'font': 35000,
+    'stylesheet': 30000,
+    'script': 80000,
+    'xhr': 5000,
+    'fetch': 5000,
+    'other': 10000
+}
+
+# Let through while routing; the browser cache is off then, so these are downloaded again on every page
+CACHEABLE_TYPES = {'script', 'stylesheet', 'font', 'image'}
+
+DISABLE_ANIMATIONS_SCRIPT = """
+(() => {
+    const css = '*, *::before, *::after { animation: none !important; transition: none !important; ' +
+        'scroll-behavior: auto !important; caret-color: transparent !important; }';
+    const apply = () => {
+        const style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', apply);
+    } else {
+        apply();
+    }
+})();
+"""
+
+
+def _domain_matches(host: str, domains: List[str]) -> bool:
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+
+class LeanProfile:
+    """Headless profile for read-mostly admin pages (``browser.lean`` in config.yaml).
+
+    Blocks heavy resource types and tracker/third-party domains through a
+    context-wide route, shrinks the viewport and disables CSS animations.
+    Domains on the allow-list ('common' plus the adapter's own list) are never
+    blocked, so login widgets such as CAPTCHAs keep working. With
+    block_third_party, anything outside the adapter's first_party domains and
+    the allow-list is dropped.
+
+    Routing turns off the browser's HTTP cache for the context, so the app's
+    own scripts and stylesheets are downloaded again on every navigation. The
+    route is only installed when some blocking rule applies; with no resource
+    types, domains or third-party blocking configured, pooled contexts keep
+    their cache. Savings are estimated from typical sizes per resource type.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get('enabled', False)
+        self.viewport = config.get('viewport')
+        self.disable_animations = config.get('disable_animations', True)
+        self.block_types = set(config.get('block_resource_types', DEFAULT_BLOCKED_TYPES))
+        self.block_domains = config.get('block_domains', DEFAULT_BLOCKED_DOMAINS)
+        self.block_third_party = config.get('block_third_party', False)
+        self.allow = config.get('allow', {})
+        self.first_party = config.get('first_party', {})
+        self.estimated_bytes = {**DEFAULT_ESTIMATED_BYTES, **config.get('estimated_bytes', {})}
+        self.stats = {'allowed': 0, 'allowed_uncached': 0, 'blocked': 0, 'blocked_by_type': {},
+                      'estimated_bytes_saved': 0}
+
+    def context_options(self) -> Dict[str, Any]:
+        """Extra keyword arguments for browser.new_context()"""
+        if not self.enabled:
+            return {}
+        options = {'reduced_motion': 'reduce', 'service_workers': 'block'}
+        if self.viewport:
+            options['viewport'] = self.viewport
+        return options
+
+    def allowed_domains(self, adapter: Optional[str] = None) -> List[str]:
+        return self.allow.get('common', []) + (self.allow.get(adapter, []) if adapter else [])
+
+    def block_reason(self, url: str, resource_type: str, adapter: Optional[str] = None) -> Optional[str]:
+        """Why a request should be blocked, or None to let it through"""
+        host = urlparse(url).hostname or ''
+        if not host or _domain_matches(host, self.allowed_domains(adapter)):
+            return None
+        if _domain_matches(host, self.block_domains):
+            return 'tracker'
+        if resource_type in self.block_types:
+            return resource_type
+        if self.block_third_party and adapter in self.first_party and not _domain_matches(host, self.first_party[adapter]):
+            return 'third_party'
+        return None
+
+    def blocks_requests(self, adapter: Optional[str] = None) -> bool:
+        """Whether any blocking rule applies, i.e. whether a route (and losing the HTTP cache) is worth it"""
+        third_party = self.block_third_party and adapter in self.first_party
+        return bool(self.block_types or self.block_domains or third_party)
+
+    async def apply(self, context, adapter: Optional[str] = None):
+        """Install animation suppression and, when something is blocked, request routing on a new context"""
+        if not self.enabled:
+            return
+        if self.disable_animations:
+            await context.add_init_script(script=DISABLE_ANIMATIONS_SCRIPT)
+        if not self.blocks_requests(adapter):
+            return
+
+        async def handle(route):
+            request = route.request
+            reason = self.block_reason(request.url, request.resource_type, adapter)
+            if reason is None:
+                self.stats['allowed'] += 1
+                if request.resource_type in CACHEABLE_TYPES:
+                    self.stats['allowed_uncached'] += 1
+                await route.continue_()
+                return
+            self.record_blocked(request.resource_type, reason)
+            await route.abort('blockedbyclient')
+
+        await context.route('**/*', handle)
+
+    def record_blocked(self, resource_type: str, reason: str):
+        self.stats['blocked'] += 1
+        self.stats['blocked_by_type'][reason] = self.stats['blocked_by_type'].get(reason, 0) + 1
+        self.stats['estimated_bytes_saved'] += self.estimated_bytes.get(
+            resource_type, self.estimated_bytes['other']
+        )
+
+    def summary(self) -> str:
+        total = self.stats['allowed'] + self.stats['blocked']
+        return (
+            f"blocked {self.stats['blocked']}/{total} requests {self.stats['blocked_by_type']} "
+            f"(estimated ~{self.stats['estimated_bytes_saved'] / 1_000_000:.1f} MB from typical sizes); "
+            f"{self.stats['allowed_uncached']} cacheable assets fetched without the HTTP cache"
+        )
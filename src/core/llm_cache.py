@@ -0,0 +1,118 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_VOLATILE_ATTR_RE = re.compile(r'\s(?:nonce|data-csrf|csrf-token|data-request-id)="[^"]*"', re.I)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_content(content: str) -> str:
+    """Drop comments, per-request tokens and whitespace noise before hashing"""
+    content = _COMMENT_RE.sub('', content)
+    content = _VOLATILE_ATTR_RE.sub('', content)
+    return _WHITESPACE_RE.sub(' ', content).strip()
+
+
+class LLMCache:
+    """Two-level cache for parsed LLM responses: in-memory LRU over SQLite.
+
+    Keys are content addressed (model + prompt template + template version +
+    normalized input), so a changed prompt or model never serves stale answers.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.memory_entries = config.get('memory_entries', 256)
+        self.max_entries = config.get('max_entries', 10000)
+        self.ttl_seconds = config.get('ttl_seconds', 7 * 24 * 3600)
+        self.stats = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0, 'evictions': 0}
+
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(config.get('path', ':memory:'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, template: str, version: int, content: str) -> str:
+        """Build a cache key for one prompt invocation"""
+        digest = hashlib.sha256()
+        for part in (model, template, str(version), normalize_content(content)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return entry[0]
+
+            row = self._db.execute(
+                'SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row and now - row[1] < self.ttl_seconds:
+                self._db.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+                self._db.commit()
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return value
+
+            if row or entry:
+                self._memory.pop(key, None)
+                self._db.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._db.commit()
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._db.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now, now)
+            )
+            self._evict()
+            self._db.commit()
+
+    def _remember(self, key: str, value: Any, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        self._db.execute('DELETE FROM llm_cache WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+        count = self._db.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                'DELETE FROM llm_cache WHERE key IN '
+                '(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)', (overflow,)
+            )
+            self.stats['evictions'] += overflow
+
+    def close(self):
+        self._db.close()
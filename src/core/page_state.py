@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOGGED_IN = 'logged_in'
+MFA = 'mfa'
+CAPTCHA = 'captcha'
+ERROR = 'error'
+UNKNOWN = 'unknown'
+
+# Checked in order: the first state with a visible match wins
+STATE_INDICATORS: List[Tuple[str, List[str]]] = [
+    (CAPTCHA, [
+        '.g-recaptcha',
+        'iframe[src*="recaptcha"]',
+        'iframe[src*="hcaptcha"]',
+        'img[src*="captcha"]',
+        '.captcha',
+        '#captcha'
+    ]),
+    (MFA, [
+        'input[type="text"][placeholder*="code"]',
+        'input[name*="verification"]',
+        'input[name*="token"]',
+        'input[name*="code"]',
+        '.mfa-input',
+        '.verification-code'
+    ]),
+    # Toasts and banners also use role="alert", so only alerts in a form count
+    (ERROR, [
+        'form [role="alert"]',
+        '.error-message',
+        '.alert-danger'
+    ])
+]
+
+# Resolves to {state, selector} as soon as any indicator is visible, or null
+CLASSIFY_SCRIPT = """
+({indicators, loggedInSelectors, loginUrlMarker}) => {
+    const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)
+        && (el.tagName === 'INPUT' || el.tagName === 'IFRAME' || el.tagName === 'IMG'
+            || el.children.length > 0 || (el.textContent || '').trim() !== '');
+    const firstVisible = (selectors) => selectors.find((selector) => {
+        try {
+            return Array.from(document.querySelectorAll(selector)).some(visible);
+        } catch (e) {
+            return false;
+        }
+    });
+    for (const [state, selectors] of indicators) {
+        const selector = firstVisible(selectors);
+        if (selector) {
+            return {state, selector};
+        }
+    }
+    const loggedInSelector = firstVisible(loggedInSelectors);
+    if (loggedInSelector) {
+        return {state: 'logged_in', selector: loggedInSelector};
+    }
+    if (loginUrlMarker && !window.location.href.includes(loginUrlMarker)) {
+        return {state: 'logged_in', selector: null};
+    }
+    return null;
+}
+"""
+
+
+class PageStateClassifier:
+    """Decides in one polling pass whether a page shows CAPTCHA, MFA, an error or a logged-in view.
+
+    All indicator selectors are evaluated together inside the page, so a clean
+    page costs a single short timeout instead of one timeout per selector.
+    """
+
+    def __init__(self, browser_manager, indicators: Optional[List[Tuple[str, List[str]]]] = None,
+                 timeout: int = 3000):
+        self.browser_manager = browser_manager
+        self.indicators = indicators if indicators is not None else STATE_INDICATORS
+        self.timeout = timeout
+
+    async def classify(self, logged_in_selectors: Optional[List[str]] = None,
+                       login_url_marker: Optional[str] = None,
+                       timeout: Optional[int] = None) -> Tuple[str, Optional[str]]:
+        """Return (state, matched selector); UNKNOWN if nothing matched within timeout"""
+        arg = {
+            'indicators': [[state, selectors] for state, selectors in self.indicators],
+            'loggedInSelectors': logged_in_selectors or [],
+            'loginUrlMarker': login_url_marker
+        }
+        try:
+            handle = await self.browser_manager.page.wait_for_function(
+                CLASSIFY_SCRIPT, arg=arg, timeout=timeout or self.timeout
+            )
+            result: Dict[str, Optional[str]] = await handle.json_value()
+        except Exception as e:
+            logger.debug(f"No page state indicator matched: {e}")
+            return UNKNOWN, None
+
+        logger.info(f"Page state: {result['state']} ({result['selector']})")
+        return result['state'], result['selector']
@@ -0,0 +1,112 @@
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Request headers the browser computes itself and that must not be replayed
+SKIPPED_REPLAY_HEADERS = {'content-length', 'host', 'connection', 'accept-encoding', 'cookie'}
+
+# Request headers that carry credentials; kept out of anything written to disk
+CREDENTIAL_HEADER = re.compile(r'auth|cookie|token|csrf|xsrf|session|api[-_]?key|secret', re.I)
+
+
+class ResponseCapture:
+    """Records JSON response bodies whose URL matches one of the given patterns.
+
+    Admin consoles load member lists through XHR/fetch calls; capturing those
+    payloads gives structured user records without touching the rendered DOM.
+    Captured requests can be replayed (e.g. with a new cursor) through the
+    page's own request context, so cookies and auth headers carry over.
+    """
+
+    def __init__(self, page, patterns: List[str]):
+        self.page = page
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.entries: List[Dict[str, Any]] = []
+        self._pending: Set[asyncio.Future] = set()
+
+    def start(self) -> 'ResponseCapture':
+        self.page.on('response', self._on_response)
+        return self
+
+    def stop(self):
+        self.page.remove_listener('response', self._on_response)
+
+    def matches(self, url: str) -> bool:
+        return any(pattern.search(url) for pattern in self.patterns)
+
+    def _on_response(self, response):
+        if not self.matches(response.url):
+            return
+        task = asyncio.ensure_future(self._record(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, response):
+        if not response.ok or 'json' not in response.headers.get('content-type', ''):
+            return
+        try:
+            body = await response.json()
+        except Exception as e:
+            logger.debug(f"Could not read JSON from {response.url}: {e}")
+            return
+
+        request = response.request
+        self.entries.append({
+            'url': response.url,
+            'method': request.method,
+            'headers': _replay_headers(request.headers),
+            'post_data': _post_data_json(request),
+            'body': body
+        })
+
+    async def drain(self):
+        """Wait until every matched response seen so far has been read"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    async def replay(self, entry: Dict[str, Any], post_data: Any = None,
+                     url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Re-issue a captured request (optionally with a new body/URL) and capture its JSON"""
+        url = url or entry['url']
+        try:
+            response = await self.page.request.fetch(
+                url, method=entry['method'], headers=entry['headers'],
+                data=post_data if post_data is not None else entry['post_data']
+            )
+            if not response.ok:
+                logger.warning(f"Replayed API request failed with {response.status}: {url}")
+                return None
+            body = await response.json()
+        except Exception as e:
+            logger.warning(f"Replayed API request failed: {e}")
+            return None
+
+        return {**entry, 'url': url, 'post_data': post_data if post_data is not None else entry['post_data'],
+                'body': body}
+
+
+def persistable_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """The replayable part of a captured request, without credential headers.
+
+    A resumed replay goes through the live context, which has its own cookies.
+    """
+    return {
+        'url': entry['url'],
+        'method': entry['method'],
+        'headers': {name: value for name, value in entry['headers'].items() if not CREDENTIAL_HEADER.search(name)},
+        'post_data': entry['post_data']
+    }
+
+
+def _replay_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    return {name: value for name, value in headers.items() if name.lower() not in SKIPPED_REPLAY_HEADERS}
+
+
+def _post_data_json(request) -> Any:
+    try:
+        return request.post_data_json
+    except Exception:
+        return request.post_data
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest outcome in a selector's running success score and latency
+SCORE_ALPHA = 0.3
+# Score of a selector that has never been tried
+SCORE_PRIOR = 0.5
+
+
+class SelectorStore:
+    """Persists AI page analyses keyed by (site, task, DOM fingerprint).
+
+    A page whose structure has been analyzed before is answered from here
+    instead of calling the LLM again. It also keeps per (site, action)
+    outcome stats for candidate selectors, so adapters can try the one that
+    has been working lately first.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(config.get('path', ':memory:'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS page_analysis ('
+            'site TEXT NOT NULL, task TEXT NOT NULL, fingerprint TEXT NOT NULL, '
+            'analysis TEXT NOT NULL, updated_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, '
+            'PRIMARY KEY (site, task, fingerprint))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS selector_stats ('
+            'site TEXT NOT NULL, action TEXT NOT NULL, selector TEXT NOT NULL, source TEXT NOT NULL, '
+            'score REAL NOT NULL, latency_ms REAL, successes INTEGER NOT NULL DEFAULT 0, '
+            'failures INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, '
+            'PRIMARY KEY (site, action, selector))'
+        )
+        self._db.commit()
+
+    def get(self, site: str, task: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the stored analysis for this page structure, if any"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT analysis FROM page_analysis WHERE site = ? AND task = ? AND fingerprint = ?',
+                (site, task, fingerprint)
+            ).fetchone()
+            if not row:
+                return None
+            self._db.execute(
+                'UPDATE page_analysis SET hits = hits + 1 WHERE site = ? AND task = ? AND fingerprint = ?',
+                (site, task, fingerprint)
+            )
+            self._db.commit()
+        return json.loads(row[0])
+
+    def set(self, site: str, task: str, fingerprint: str, analysis: Dict[str, Any]):
+        """Remember the analysis learned for this page structure"""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO page_analysis (site, task, fingerprint, analysis, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (site, task, fingerprint, json.dumps(analysis), time.time())
+            )
+            self._db.commit()
+
+    def selector_stats(self, site: str, action: str) -> Dict[str, Dict[str, Any]]:
+        """Outcome stats of every selector recorded for this action"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT selector, source, score, latency_ms, successes, failures FROM selector_stats '
+                'WHERE site = ? AND action = ?',
+                (site, action)
+            ).fetchall()
+        return {
+            row[0]: {'source': row[1], 'score': row[2], 'latency_ms': row[3], 'successes': row[4], 'failures': row[5]}
+            for row in rows
+        }
+
+    def rank_selectors(self, site: str, action: str, candidates: List[str]) -> List[str]:
+        """Candidates plus learned (AI) selectors that worked, best recent score and latency first"""
+        stats = self.selector_stats(site, action)
+        selectors = list(candidates) + [
+            selector for selector, entry in stats.items()
+            if selector not in candidates and entry['source'] == 'ai' and entry['successes']
+        ]
+
+        def key(item):
+            index, selector = item
+            entry = stats.get(selector)
+            if entry is None:
+                return (-SCORE_PRIOR, float('inf'), index)
+            latency = entry['latency_ms'] if entry['latency_ms'] is not None else float('inf')
+            return (-entry['score'], latency, index)
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=key)]
+
+    def record_selector(self, site: str, action: str, selector: str, success: bool,
+                        latency_ms: Optional[float] = None, source: str = 'static'):
+        """Fold one attempt into the selector's running score (and latency, when it matched)"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT score, latency_ms FROM selector_stats WHERE site = ? AND action = ? AND selector = ?',
+                (site, action, selector)
+            ).fetchone()
+            score, latency = row if row else (SCORE_PRIOR, None)
+            score += SCORE_ALPHA * ((1.0 if success else 0.0) - score)
+            if success and latency_ms is not None:
+                latency = latency_ms if latency is None else latency + SCORE_ALPHA * (latency_ms - latency)
+            self._db.execute(
+                'INSERT INTO selector_stats '
+                '(site, action, selector, source, score, latency_ms, successes, failures, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (site, action, selector) DO UPDATE SET score = excluded.score, '
+                'latency_ms = excluded.latency_ms, successes = successes + excluded.successes, '
+                'failures = failures + excluded.failures, updated_at = excluded.updated_at',
+                (site, action, selector, source, score, latency, int(success), int(not success), time.time())
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
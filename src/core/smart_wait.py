@@ -0,0 +1,172 @@
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resolves true once the DOM has gone quietMs without a mutation, or false at timeoutMs
+DOM_QUIET_SCRIPT = """
+({quietMs, timeoutMs}) => new Promise((resolve) => {
+    let quietTimer = null;
+    const observer = new MutationObserver(() => arm());
+    const finish = (quiet) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve(quiet);
+    };
+    const arm = () => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    };
+    const deadline = setTimeout(() => finish(false), timeoutMs);
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+    arm();
+})
+"""
+
+
+class PageTimings:
+    """Learns how long each kind of wait takes per site and derives timeouts.
+
+    Keeps a smoothed mean and deviation of observed durations (like TCP's RTO
+    estimator); the timeout is a safety multiple of the mean, clamped to the
+    configured bounds. A wait that times out unreliable_after times in a row on
+    a site (e.g. network idle on pages that long-poll) is marked unreliable for
+    unreliable_ttl seconds, after which it is tried again.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.default_timeout = config.get('default_timeout', 10000)
+        self.min_timeout = config.get('min_timeout', 1000)
+        self.max_timeout = config.get('max_timeout', 30000)
+        self.safety_factor = config.get('safety_factor', 3.0)
+        self.smoothing = config.get('smoothing', 0.2)
+        self.unreliable_after = config.get('unreliable_after', 3)
+        self.unreliable_ttl = config.get('unreliable_ttl', 600)
+        self._stats: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        # (site, kind) -> monotonic time the mark expires
+        self._unreliable: Dict[Tuple[str, str], float] = {}
+
+    def record(self, site: str, kind: str, elapsed_ms: float):
+        key = (site, kind)
+        self._failures.pop(key, None)
+        if key not in self._stats:
+            self._stats[key] = (elapsed_ms, elapsed_ms / 2)
+            return
+        mean, deviation = self._stats[key]
+        error = elapsed_ms - mean
+        mean += self.smoothing * error
+        deviation += self.smoothing * (abs(error) - deviation)
+        self._stats[key] = (mean, deviation)
+
+    def timeout(self, site: str, kind: str) -> float:
+        """Timeout in milliseconds for this kind of wait on this site"""
+        if (site, kind) not in self._stats:
+            return self.default_timeout
+        mean, deviation = self._stats[(site, kind)]
+        estimate = max(mean * self.safety_factor, mean + 4 * deviation)
+        return min(self.max_timeout, max(self.min_timeout, estimate))
+
+    def record_failure(self, site: str, kind: str) -> bool:
+        """Count a timed-out wait; True once the wait has just become unreliable"""
+        key = (site, kind)
+        self._failures[key] = self._failures.get(key, 0) + 1
+        if self._failures[key] < self.unreliable_after:
+            return False
+        self.mark_unreliable(site, kind)
+        return True
+
+    def mark_unreliable(self, site: str, kind: str):
+        self._failures.pop((site, kind), None)
+        self._unreliable[(site, kind)] = time.monotonic() + self.unreliable_ttl
+
+    def is_unreliable(self, site: str, kind: str) -> bool:
+        expires = self._unreliable.get((site, kind))
+        if expires is None:
+            return False
+        if time.monotonic() >= expires:
+            del self._unreliable[(site, kind)]
+            return False
+        return True
+
+
+class SmartWaiter:
+    """Condition-based waits for a page, replacing fixed sleeps"""
+
+    def __init__(self, page, timings: PageTimings, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.page = page
+        self.timings = timings
+        self.quiet_ms = config.get('quiet_ms', 300)
+        self.network_idle_timeout = config.get('network_idle_timeout', 5000)
+
+    @property
+    def site(self) -> str:
+        return urlparse(self.page.url).netloc or 'unknown'
+
+    async def _timed(self, kind: str, timeout: Optional[float], wait: Callable) -> bool:
+        site = self.site
+        timeout = timeout or self.timings.timeout(site, kind)
+        started = time.monotonic()
+        try:
+            result = await wait(timeout)
+        except Exception as e:
+            logger.debug(f"Wait for {kind} on {site} gave up after {timeout:.0f}ms: {e}")
+            return False
+        if result is False:
+            return False
+        self.timings.record(site, kind, (time.monotonic() - started) * 1000)
+        return True
+
+    async def for_network_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until there are no network connections for 500ms"""
+        site = self.site
+        if self.timings.is_unreliable(site, 'network_idle'):
+            return False
+        timeout = timeout or min(self.timings.timeout(site, 'network_idle'), self.network_idle_timeout)
+        idle = await self._timed(
+            'network_idle', timeout,
+            lambda t: self.page.wait_for_load_state('networkidle', timeout=t)
+        )
+        if not idle and self.timings.record_failure(site, 'network_idle'):
+            logger.info(f"{site} keeps missing network idle; relying on DOM quiescence for a while")
+        return idle
+
+    async def for_dom_quiet(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the DOM stops changing for quiet_ms"""
+        site = self.site
+        if timeout is None and self.timings.is_unreliable(site, 'dom_quiet'):
+            # Pages that never settle (spinners, live timestamps) only get a short look
+            timeout = self.timings.min_timeout
+        quiet = await self._timed(
+            'dom_quiet', timeout,
+            lambda t: self.page.evaluate(DOM_QUIET_SCRIPT, {'quietMs': self.quiet_ms, 'timeoutMs': t})
+        )
+        if not quiet and self.timings.record_failure(site, 'dom_quiet'):
+            logger.info(f"{site} keeps mutating; capping DOM quiescence waits at {self.timings.min_timeout}ms")
+        return quiet
+
+    async def for_selector(self, selector: str, timeout: Optional[float] = None, state: str = 'visible') -> bool:
+        """Wait for an element to reach state"""
+        return await self._timed(
+            f'selector:{selector}', timeout,
+            lambda t: self.page.wait_for_selector(selector, state=state, timeout=t)
+        )
+
+    async def for_url_change(self, previous_url: str, timeout: Optional[float] = None) -> bool:
+        """Wait until the page URL differs from previous_url"""
+        return await self._timed(
+            'url_change', timeout,
+            lambda t: self.page.wait_for_url(lambda url: url != previous_url, timeout=t)
+        )
+
+    async def for_page_ready(self) -> bool:
+        """Network idle (where the site ever gets there), then DOM quiescence"""
+        await self.for_network_idle()
+        return await self.for_dom_quiet()
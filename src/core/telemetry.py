@@ -0,0 +1,252 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Labels of the job being worked on (adapter, tenant, ...); asyncio tasks inherit them
+_context_labels: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar('telemetry_labels', default={})
+
+# Span attributes that are low-cardinality enough to become Prometheus labels
+METRIC_LABELS = ('adapter', 'template', 'status')
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class JsonLinesExporter:
+    """Appends one JSON object per finished span to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', buffering=1024 * 1024)
+        self._lock = threading.Lock()
+
+    def export(self, event: Dict[str, Any]):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Telemetry:
+    """Spans, counters and latency histograms for the hot paths.
+
+    Spans time a block and record its duration in a ``<name>_seconds``
+    histogram labelled with the job's adapter (and template/status where
+    set); the full span, including the job's tenant and attributes such as
+    the selector or URL, goes to the exporters (e.g. JSON lines). Metrics are
+    rendered in the Prometheus text format.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.exporters: List[Any] = []
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def context(self, **labels: str) -> Iterator[None]:
+        """Attach labels (adapter, tenant, ...) to every span and counter inside the block"""
+        token = _context_labels.set({**_context_labels.get(), **labels})
+        try:
+            yield
+        finally:
+            _context_labels.reset(token)
+
+    def _metric_labels(self, labels: Dict[str, Any]) -> Dict[str, Any]:
+        merged = {name: value for name, value in _context_labels.get().items() if name in METRIC_LABELS}
+        merged.update(labels)
+        return merged
+
+    def increment(self, name: str, value: float = 1, **labels: Any):
+        key = (name, _label_key(self._metric_labels(labels)))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any):
+        key = (name, _label_key(self._metric_labels(labels)))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; the yielded dict collects extra attributes (tokens, status, ...)"""
+        started = time.perf_counter()
+        wall_start = time.time()
+        try:
+            yield attributes
+        except BaseException:
+            attributes.setdefault('status', 'error')
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            attributes.setdefault('status', 'ok')
+            metric_labels = {label: attributes[label] for label in METRIC_LABELS if label in attributes}
+            self.observe(f"{name.replace('.', '_')}_seconds", duration, **metric_labels)
+            if self.exporters:
+                event = {
+                    'span': name,
+                    'start': wall_start,
+                    'duration_ms': round(duration * 1000, 3),
+                    **_context_labels.get(),
+                    **attributes
+                }
+                for exporter in self.exporters:
+                    try:
+                        exporter.export(event)
+                    except Exception as e:
+                        logger.debug(f"Telemetry export failed: {e}")
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        """Sum of a counter over all label sets that include labels"""
+        wanted = set(_label_key(labels))
+        return sum(
+            value for (counter, key), value in self._counters.items()
+            if counter == name and wanted <= set(key)
+        )
+
+    def histogram_count(self, name: str, **labels: Any) -> int:
+        wanted = set(_label_key(labels))
+        return sum(
+            histogram[1] for (metric, key), histogram in self._histograms.items()
+            if metric == name and wanted <= set(key)
+        )
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        typed = set()
+        for (name, key), value in counters:
+            if name not in typed:
+                lines.append(f'# TYPE {name} counter')
+                typed.add(name)
+            lines.append(f'{name}{_format_labels(key)} {value}')
+
+        for (name, key), (bucket_counts, count, total) in histograms:
+            if name not in typed:
+                lines.append(f'# TYPE {name} histogram')
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(key, {"le": str(bound)})} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(key, {"le": "+Inf"})} {count}')
+            lines.append(f'{name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{name}_count{_format_labels(key)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write metrics to a textfile (e.g. for node_exporter's textfile collector)"""
+        with open(path, 'w') as file:
+            file.write(self.render_prometheus())
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Process-wide instance used by the instrumented components
+telemetry = Telemetry()
+
+
+def traced(name: str, attribute: Optional[str] = None):
+    """Wrap an async method in a span; attribute names the first argument to record (e.g. selector).
+
+    A False return value is recorded as status 'failed'.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            attributes = {}
+            if attribute:
+                value = kwargs.get(attribute, args[0] if args else None)
+                if value is not None:
+                    attributes[attribute] = value
+            with telemetry.span(name, **attributes) as span:
+                result = await func(self, *args, **kwargs)
+                if result is False:
+                    span['status'] = 'failed'
+                return result
+        return wrapper
+    return decorator
+
+
+class PrometheusServer:
+    """Serves telemetry.render_prometheus() at http://host:port/metrics"""
+
+    def __init__(self, port: int, host: str = '127.0.0.1', source: Telemetry = telemetry):
+        self.port = port
+        self.host = host
+        self.source = source
+        self._runner = None
+
+    async def start(self) -> 'PrometheusServer':
+        async def metrics(request):
+            return web.Response(text=self.source.render_prometheus(), content_type='text/plain')
+
+        app = web.Application()
+        app.router.add_get('/metrics', metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+def configure(config: Optional[Dict[str, Any]] = None) -> Telemetry:
+    """Attach the exporters enabled in the telemetry config section"""
+    config = config or {}
+    if config.get('jsonl_path'):
+        telemetry.exporters.append(JsonLinesExporter(config['jsonl_path']))
+    return telemetry
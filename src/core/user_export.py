@@ -0,0 +1,154 @@
+import csv
+import json
+import os
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Normalized user fields (see header_schema.FIELD_MAPPINGS), in export column order
+USER_FIELDS = ('name', 'email', 'role', 'last_login', 'status')
+
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet'
+}
+
+Row = Tuple[Optional[str], ...]
+
+_json_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+class CsvUserWriter:
+    """Writes rows to a CSV file as they arrive"""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        self.columns = tuple(columns)
+        self.rows_written = 0
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def write(self, rows: Iterable[Row]):
+        for row in rows:
+            self._writer.writerow(['' if value is None else value for value in row])
+            self.rows_written += 1
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlUserWriter:
+    """One JSON object per row; fields a record does not have are left out"""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        self.columns = tuple(columns)
+        self.rows_written = 0
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, rows: Iterable[Row]):
+        encode = _json_encoder.encode
+        columns = self.columns
+        for row in rows:
+            record = {column: value for column, value in zip(columns, row) if value is not None}
+            self._file.write(encode(record) + '\n')
+            self.rows_written += 1
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetUserWriter:
+    """Buffers rows into row groups of row_group_size and appends them to a Parquet file (needs pyarrow)"""
+
+    def __init__(self, path: str, columns: Sequence[str], row_group_size: int = 50000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from e
+
+        self._pa = pa
+        self.columns = tuple(columns)
+        self.rows_written = 0
+        self.row_group_size = row_group_size
+        self._schema = pa.schema([(column, pa.string()) for column in self.columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._buffer = []
+
+    def write(self, rows: Iterable[Row]):
+        for row in rows:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        arrays = [self._pa.array(list(values), type=self._pa.string()) for values in zip(*self._buffer)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {
+    'csv': CsvUserWriter,
+    'jsonl': JsonlUserWriter,
+    'parquet': ParquetUserWriter
+}
+
+
+def export_format(path: str, format: Optional[str] = None) -> str:
+    """The explicit format, else the one implied by the file extension"""
+    format = format or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format for {path}: {format}")
+    return format
+
+
+def open_writer(path: str, columns: Sequence[str], format: Optional[str] = None):
+    """A CSV/JSONL/Parquet writer with write(rows) and close(); missing parent directories are created"""
+    format = export_format(path, format)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return WRITERS[format](path, columns)
+
+
+def partial_path(path: str) -> str:
+    """Where an export is written until it is complete, so a failed run leaves nothing at path"""
+    return path + '.part'
+
+
+def finish_export(path: str, complete: bool):
+    """Move a complete export into place, or delete the partial file"""
+    partial = partial_path(path)
+    if complete:
+        os.replace(partial, path)
+    elif os.path.exists(partial):
+        os.remove(partial)
+
+
+def user_rows(users: Iterable[Dict[str, str]], columns: Sequence[str]) -> Iterable[Row]:
+    """Dict records as tuples in column order"""
+    return (tuple(user.get(column) for column in columns) for user in users)
+
+
+def write_rows(path: str, columns: Sequence[str], rows: Iterable[Row], format: Optional[str] = None) -> int:
+    """Stream rows into a file; returns the number written"""
+    writer = open_writer(partial_path(path), columns, export_format(path, format))
+    complete = False
+    try:
+        writer.write(rows)
+        complete = True
+    finally:
+        writer.close()
+        finish_export(path, complete)
+    logger.info(f"Exported {writer.rows_written} users to {path}")
+    return writer.rows_written
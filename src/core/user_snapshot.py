@@ -0,0 +1,84 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def user_key(user: Dict[str, str]) -> str:
+    """Identity of a user record across runs"""
+    return (user.get('email') or '').strip().lower()
+
+
+def diff_users(previous: Dict[str, Dict[str, str]], current: List[Dict[str, str]],
+               complete: bool = True) -> Dict[str, List[Dict[str, Any]]]:
+    """Compare a fresh extraction with the last snapshot.
+
+    ``removed`` is only meaningful when the whole listing was walked; pass
+    ``complete=False`` for early-stopped runs and it is left empty.
+    """
+    added, changed = [], []
+    seen = set()
+
+    for user in current:
+        key = user_key(user)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+
+        before = previous.get(key)
+        if before is None:
+            added.append(user)
+        elif before != user:
+            fields = sorted(field for field in set(before) | set(user) if before.get(field) != user.get(field))
+            changed.append({'email': key, 'fields': fields, 'before': before, 'after': user})
+
+    removed = [user for key, user in previous.items() if key not in seen] if complete else []
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+class UserSnapshotStore:
+    """Last extracted user directory per (adapter, tenant), kept in SQLite"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(config.get('path', ':memory:'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS user_snapshot ('
+            'adapter TEXT NOT NULL, tenant TEXT NOT NULL, email TEXT NOT NULL, '
+            'record TEXT NOT NULL, updated_at REAL NOT NULL, '
+            'PRIMARY KEY (adapter, tenant, email))'
+        )
+        self._db.commit()
+
+    def load(self, adapter: str, tenant: str) -> Dict[str, Dict[str, str]]:
+        """Return the snapshot as {email: record}"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT email, record FROM user_snapshot WHERE adapter = ? AND tenant = ?',
+                (adapter, tenant)
+            ).fetchall()
+        return {email: json.loads(record) for email, record in rows}
+
+    def apply(self, adapter: str, tenant: str, diff: Dict[str, List[Dict[str, Any]]]):
+        """Write a diff into the snapshot"""
+        now = time.time()
+        upserts = diff['added'] + [change['after'] for change in diff['changed']]
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO user_snapshot (adapter, tenant, email, record, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(adapter, tenant, user_key(user), json.dumps(user, sort_keys=True), now) for user in upserts]
+            )
+            self._db.executemany(
+                'DELETE FROM user_snapshot WHERE adapter = ? AND tenant = ? AND email = ?',
+                [(adapter, tenant, user_key(user)) for user in diff['removed']]
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,130 @@
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+import pandas as pd
+
+from .user_export import USER_FIELDS, write_rows
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality columns: every distinct value is stored once
+INTERNED_COLUMNS = frozenset({'adapter', 'tenant', 'role', 'status'})
+
+# Columns that identify where a record came from, used alongside email for dedup
+CONTEXT_COLUMNS = ('adapter', 'tenant')
+
+
+class UserTable:
+    """Column-oriented container for user records.
+
+    Each column is one list, so a large directory costs a handful of lists
+    instead of one dict per user repeating the same keys, and role, status,
+    adapter and tenant values are interned. Rows are only materialized
+    while iterating. Normalization and dedup run vectorized through pandas.
+    Keys outside the table's columns are dropped.
+    """
+
+    __slots__ = ('columns', '_data')
+
+    def __init__(self, columns: Sequence[str] = USER_FIELDS):
+        self.columns = tuple(columns)
+        self._data: Dict[str, List[Optional[str]]] = {column: [] for column in self.columns}
+
+    @classmethod
+    def from_users(cls, users: Iterable[Dict[str, str]], columns: Sequence[str] = USER_FIELDS,
+                   **context: str) -> 'UserTable':
+        """Build a table; context values (e.g. adapter='notion') become constant columns"""
+        table = cls(tuple(context) + tuple(column for column in columns if column not in context))
+        table.extend(users, **context)
+        return table
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'UserTable':
+        table = cls(tuple(frame.columns))
+        for column in table.columns:
+            values = [None if pd.isna(value) else value for value in frame[column].tolist()]
+            if column in INTERNED_COLUMNS:
+                values = [sys.intern(value) if isinstance(value, str) else value for value in values]
+            table._data[column] = values
+        return table
+
+    @classmethod
+    def concat(cls, tables: Iterable['UserTable'], columns: Optional[Sequence[str]] = None) -> 'UserTable':
+        """One table with the rows of all tables; columns a table lacks are filled with None"""
+        tables = list(tables)
+        if columns is None:
+            columns = list(dict.fromkeys(column for table in tables for column in table.columns))
+        result = cls(columns)
+        for table in tables:
+            rows = len(table)
+            for column in result.columns:
+                result._data[column].extend(table._data[column] if column in table._data else [None] * rows)
+        return result
+
+    def append(self, user: Dict[str, str], **context: str):
+        for column in self.columns:
+            value = context[column] if column in context else user.get(column)
+            if column in INTERNED_COLUMNS and isinstance(value, str):
+                value = sys.intern(value)
+            self._data[column].append(value)
+
+    def extend(self, users: Iterable[Dict[str, str]], **context: str):
+        users = users if isinstance(users, list) else list(users)
+        for column in self.columns:
+            if column in context:
+                value = context[column]
+                values = [sys.intern(value) if isinstance(value, str) else value] * len(users)
+            else:
+                values = [user.get(column) for user in users]
+                if column in INTERNED_COLUMNS:
+                    values = [sys.intern(value) if isinstance(value, str) else value for value in values]
+            self._data[column].extend(values)
+
+    def __len__(self) -> int:
+        return len(self._data[self.columns[0]]) if self.columns else 0
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """Rows as dicts, without the fields a record does not have"""
+        for row in self.rows():
+            yield {column: value for column, value in zip(self.columns, row) if value is not None}
+
+    def rows(self) -> Iterator[Tuple[Optional[str], ...]]:
+        """Rows as tuples in column order"""
+        return zip(*(self._data[column] for column in self.columns))
+
+    def column(self, name: str) -> List[Optional[str]]:
+        return self._data[name]
+
+    def to_users(self) -> List[Dict[str, str]]:
+        return list(self)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({column: self._data[column] for column in self.columns},
+                            columns=list(self.columns), dtype=object)
+
+    def normalized(self) -> 'UserTable':
+        """Emails stripped and lower-cased, roles with tidy whitespace and title case"""
+        frame = self.to_frame()
+        if 'email' in frame:
+            frame['email'] = frame['email'].str.strip().str.lower()
+        if 'role' in frame:
+            frame['role'] = frame['role'].str.strip().str.replace(r'\s+', ' ', regex=True).str.title()
+        return UserTable.from_frame(frame)
+
+    def deduplicated(self) -> 'UserTable':
+        """First record per (adapter, tenant, email); rows without an email are dropped.
+
+        Emails are compared as stored, so normalize first to fold case variants.
+        """
+        frame = self.to_frame()
+        frame = frame[frame['email'].notna() & (frame['email'] != '')]
+        keys = [column for column in CONTEXT_COLUMNS if column in frame] + ['email']
+        return UserTable.from_frame(frame.drop_duplicates(subset=keys, keep='first'))
+
+    def export(self, path: str, format: Optional[str] = None) -> int:
+        """Write the table as CSV, JSONL or Parquet (by extension unless format is given)"""
+        return write_rows(path, self.columns, self.rows(), format)
+
+    def __repr__(self):
+        return f"UserTable({len(self)} rows, columns={list(self.columns)})"
@@ -0,0 +1,155 @@
+import asyncio
+import multiprocessing
+import pickle
+import queue
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+
+from .job_scheduler import Job
+
+logger = logging.getLogger(__name__)
+
+RESULT = 'result'
+DONE = 'done'
+FAILED = 'failed'
+
+JobKey = Tuple[str, str, str]
+
+
+def _job_key(adapter: str, tenant: str, operation: str) -> JobKey:
+    return (adapter, tenant, operation)
+
+
+def shard_jobs(jobs: List[Job], shards: int) -> List[List[Job]]:
+    """Split jobs into at most ``shards`` groups, keeping each (adapter, tenant) in one group.
+
+    Tenants are placed largest first on the least loaded shard, so one
+    process still serializes a tenant's jobs and reuses its session.
+    """
+    by_tenant: Dict[Tuple[str, str], List[Job]] = {}
+    for job in jobs:
+        by_tenant.setdefault(job.tenant_key, []).append(job)
+
+    groups: List[List[Job]] = [[] for _ in range(max(1, shards))]
+    for tenant_key in sorted(by_tenant, key=lambda key: (-len(by_tenant[key]), key)):
+        lightest = min(range(len(groups)), key=lambda index: len(groups[index]))
+        groups[lightest].extend(by_tenant[tenant_key])
+    return [group for group in groups if group]
+
+
+def _worker_entry(worker: Callable, worker_id: int, jobs: List[Job], results, worker_args: Tuple):
+    """Runs in the worker process: one event loop driving worker(worker_id, jobs, emit, *worker_args)"""
+    def emit(record: Dict[str, Any]):
+        try:
+            pickle.dumps(record)
+        except Exception as e:
+            record = {**record, 'result': None, 'error': record.get('error') or f"Unpicklable result: {e}"}
+        results.put((RESULT, worker_id, record))
+
+    try:
+        asyncio.run(worker(worker_id, jobs, emit, *worker_args))
+    except BaseException as e:
+        results.put((FAILED, worker_id, f"{type(e).__name__}: {e}"))
+        raise
+    results.put((DONE, worker_id, None))
+
+
+class WorkerCoordinator:
+    """Runs jobs in several worker processes and gathers their results.
+
+    Jobs are sharded by tenant; each worker process runs
+    ``await worker(worker_id, jobs, emit, *worker_args)`` on its own event
+    loop (with its own browser pool) and calls emit() with a JSON-friendly
+    record per finished job. Records come back over a multiprocessing queue.
+    Jobs of a worker that crashes without reporting them are returned as
+    failures.
+    """
+
+    def __init__(self, worker: Callable, processes: int, poll_interval: float = 1.0):
+        self.worker = worker
+        self.processes = processes
+        self.poll_interval = poll_interval
+
+    def run(self, jobs: List[Job], *worker_args: Any) -> List[Dict[str, Any]]:
+        """Blocking; worker and worker_args must be picklable (module-level function, plain data)"""
+        context = multiprocessing.get_context('spawn')
+        results_queue = context.Queue()
+        shards = shard_jobs(jobs, self.processes)
+
+        self._results: List[Dict[str, Any]] = []
+        self._expected: Dict[int, Counter] = {}
+        processes = {}
+        for worker_id, shard in enumerate(shards):
+            self._expected[worker_id] = Counter(_job_key(job.adapter, job.tenant, job.operation) for job in shard)
+            process = context.Process(
+                target=_worker_entry,
+                args=(self.worker, worker_id, shard, results_queue, worker_args),
+                name=f"job-worker-{worker_id}"
+            )
+            process.start()
+            processes[worker_id] = process
+            logger.info(f"Worker {worker_id} started with {len(shard)} jobs (pid {process.pid})")
+
+        running = dict(processes)
+        try:
+            while running:
+                try:
+                    message = results_queue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    self._reap(running, results_queue)
+                    continue
+                self._handle(message, running)
+        finally:
+            for process in processes.values():
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            results_queue.close()
+
+        return self._results
+
+    def _handle(self, message: Tuple[str, int, Any], running: Dict[int, Any]):
+        kind, worker_id, payload = message
+        if kind == RESULT:
+            self._expected[worker_id][_job_key(payload['adapter'], payload['tenant'], payload['operation'])] -= 1
+            self._results.append(payload)
+        elif kind == DONE:
+            running.pop(worker_id, None)
+            self._fail_outstanding(worker_id, "Worker finished without reporting this job")
+        elif kind == FAILED:
+            running.pop(worker_id, None)
+            logger.error(f"Worker {worker_id} failed: {payload}")
+            self._fail_outstanding(worker_id, f"Worker {worker_id} failed: {payload}")
+
+    def _reap(self, running: Dict[int, Any], results_queue):
+        """Account for workers that exited without a DONE/FAILED message (killed, crashed)"""
+        exited = [worker_id for worker_id, process in running.items() if not process.is_alive()]
+        if not exited:
+            return
+        # Whatever they sent before exiting is already in the pipe
+        while True:
+            try:
+                self._handle(results_queue.get(timeout=0.1), running)
+            except queue.Empty:
+                break
+        for worker_id in exited:
+            if worker_id in running:
+                exitcode = running.pop(worker_id).exitcode
+                logger.error(f"Worker {worker_id} exited with code {exitcode}")
+                self._fail_outstanding(worker_id, f"Worker {worker_id} exited with code {exitcode}")
+
+    def _fail_outstanding(self, worker_id: int, error: str):
+        for (adapter, tenant, operation), count in self._expected[worker_id].items():
+            for _ in range(max(0, count)):
+                self._results.append({
+                    'adapter': adapter,
+                    'tenant': tenant,
+                    'operation': operation,
+                    'success': False,
+                    'attempts': 0,
+                    'duration': 0.0,
+                    'error': error,
+                    'result': None
+                })
+        self._expected[worker_id].clear()
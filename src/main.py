@@ -1,11 +1,28 @@
+import argparse
 import asyncio
+import json
 import logging
+import multiprocessing
+import os
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
 from utils.config import load_config
-from core.browser_manager import BrowserManager
+from utils.auth_handler import AuthHandler
+from utils.session_store import SessionStore
+from core.browser_pool import BrowserPool
 from core.ai_agent import AIAgent
+from core.llm_cache import LLMCache
+from core.selector_store import SelectorStore
+from core.user_snapshot import UserSnapshotStore
+from core.checkpoint_store import CheckpointStore
+from core.user_export import USER_FIELDS
+from core.user_table import CONTEXT_COLUMNS, UserTable
 from core.data_extractor import DataExtractor
-from utils.auth_handler import AuthHandler
-from utils.captcha_solver import CaptchaSolver
+from core.job_scheduler import Job, JobScheduler
+from core.worker_coordinator import WorkerCoordinator
+from core import telemetry as tracing
 from adapters.notion_adapter import NotionAdapter
 from adapters.dropbox_adapter import DropboxAdapter
 
@@ -13,66 +30,274 @@ from adapters.dropbox_adapter import DropboxAdapter
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def main():
-    # Load configuration
-    config = load_config("config.yaml")
-
-    # Initialize core components
-    browser_manager = BrowserManager(headless=False)  # Headless=False ..set for dev
-    ai_agent = AIAgent()
-    data_extractor = DataExtractor()
-    auth_handler = AuthHandler()
-    captcha_solver = CaptchaSolver(browser_manager)
-
-    # Choose SaaS adapter (example: Notion)
-    adapter = NotionAdapter(config, browser_manager, ai_agent, data_extractor)
-    adapter.auth_handler = auth_handler
-    adapter.captcha_solver = captcha_solver
-
-    credentials = {
-        'email': config['credentials']['email'],
-        'password': config['credentials']['password']
+ADAPTERS = {
+    'notion': NotionAdapter,
+    'dropbox': DropboxAdapter
+}
+
+OPERATIONS = {
+    'extract_users', 'sync_users', 'export_users',
+    'create_user', 'delete_user', 'update_user',
+    'create_users', 'delete_users', 'update_users'
+}
+
+
+class JobRunner:
+    """Executes one scheduled job inside a pooled browser session"""
+
+    def __init__(self, config: Dict[str, Any], pool: BrowserPool, ai_agent: AIAgent,
+                 tenants: Dict[str, Dict[str, Any]]):
+        self.config = config
+        self.pool = pool
+        self.ai_agent = ai_agent
+
+        extraction_config = config.get('extraction', {})
+        parse_processes = extraction_config.get('parse_processes', 0)
+        self.parse_executor = ProcessPoolExecutor(
+            max_workers=parse_processes, mp_context=multiprocessing.get_context('spawn')
+        ) if parse_processes else None
+        self.data_extractor = DataExtractor(
+            ai_agent,
+            parser=extraction_config.get('parser'),
+            executor=self.parse_executor,
+            offload_min_chars=extraction_config.get('offload_min_chars', 200000)
+        )
+        self.selector_store = SelectorStore(config.get('ai', {}).get('selector_store', {}))
+        self.snapshot_store = UserSnapshotStore(config.get('sync', {}).get('snapshot_store', {}))
+        self.checkpoint_store = CheckpointStore(config.get('sync', {}).get('checkpoint_store', {}))
+        self.tenants = tenants
+
+        auth_config = config.get('auth', {})
+        self.session_store = SessionStore(auth_config.get('session_cache', {}))
+        self.session_lifetime = timedelta(minutes=auth_config.get('session_lifetime_minutes', 30))
+
+    async def __call__(self, job: Job):
+        credentials = self.tenants[job.tenant]['credentials']
+
+        async with self.pool.session(f"{job.adapter}:{job.tenant}", adapter=job.adapter) as browser_manager:
+            adapter = ADAPTERS[job.adapter](
+                self.config.get('saas_apps', {}), browser_manager, self.ai_agent, self.data_extractor
+            )
+
+            adapter.auth_handler = AuthHandler(self.session_store, self.session_lifetime)
+            adapter.selector_store = self.selector_store
+            adapter.snapshot_store = self.snapshot_store
+            adapter.checkpoint_store = self.checkpoint_store
+            adapter.tenant = job.tenant
+
+            if not await adapter.ensure_session(credentials):
+                raise RuntimeError("Login failed")
+
+            result = await getattr(adapter, job.operation)(**job.args)
+            if result is False:
+                raise RuntimeError(f"{job.operation} failed")
+            return result
+
+    def close(self):
+        if self.parse_executor:
+            self.parse_executor.shutdown()
+
+
+def load_jobs(path: str) -> Dict[str, Any]:
+    """Read and validate a job file"""
+    with open(path, 'r') as file:
+        job_file = yaml.safe_load(file) or {}
+
+    tenants = job_file.get('tenants', {})
+    jobs = []
+    for entry in job_file.get('jobs', []):
+        tenant = entry['tenant']
+        if tenant not in tenants:
+            raise ValueError(f"Job references unknown tenant: {tenant}")
+        adapter = entry.get('adapter', tenants[tenant].get('adapter'))
+        if adapter not in ADAPTERS:
+            raise ValueError(f"Unknown adapter for tenant {tenant}: {adapter}")
+        if entry['operation'] not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {entry['operation']}")
+
+        jobs.append(Job(
+            adapter=adapter,
+            tenant=tenant,
+            operation=entry['operation'],
+            args=entry.get('args'),
+            priority=entry.get('priority', 0),
+            max_retries=entry.get('max_retries')
+        ))
+
+    return {'tenants': tenants, 'jobs': jobs}
+
+
+def summarize_result(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one scheduler result into a JSON-friendly record"""
+    return {
+        'adapter': r['job'].adapter,
+        'tenant': r['job'].tenant,
+        'operation': r['job'].operation,
+        'success': r['success'],
+        'attempts': r['attempts'],
+        'duration': round(r['duration'], 3),
+        'error': r['error'],
+        'result': r['result']
     }
 
+
+def summarize(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten scheduler results into JSON-friendly records"""
+    return [summarize_result(r) for r in results]
+
+
+def tabulate_users(r: Dict[str, Any]):
+    """Replace a finished extract_users job's list of dicts with a UserTable.
+
+    Runs as each job finishes, so the per-user dicts of one job are freed
+    before the next finishes instead of all being held until the run ends.
+    """
+    job = r['job']
+    if r['success'] and job.operation == 'extract_users' and isinstance(r['result'], list):
+        r['result'] = UserTable.from_users(r['result'], adapter=job.adapter, tenant=job.tenant)
+
+
+def json_default(value: Any) -> Any:
+    """JSON form of result values; tables are expanded one at a time while dumping.
+
+    Adapter and tenant are already fields of the job record, so rows leave them out
+    and extract_users results keep the shape of the adapter's return value.
+    """
+    if isinstance(value, UserTable):
+        return [{key: field for key, field in row.items() if key not in CONTEXT_COLUMNS} for row in value]
+    return str(value)
+
+
+def collect_users(results: List[Dict[str, Any]]) -> UserTable:
+    """Users of every successful extract_users job, as one normalized, deduplicated table"""
+    tables = []
+    for r in results:
+        if r['success'] and r['operation'] == 'extract_users':
+            users = r['result']
+            if not isinstance(users, UserTable):
+                users = UserTable.from_users(users, adapter=r['adapter'], tenant=r['tenant'])
+            tables.append(users)
+    return UserTable.concat(tables, CONTEXT_COLUMNS + USER_FIELDS).normalized().deduplicated()
+
+
+def create_ai_agent(config: Dict[str, Any]) -> AIAgent:
+    ai_config = config.get('ai', {})
+    cache_config = ai_config.get('cache', {})
+    llm_cache = LLMCache(cache_config) if cache_config.get('enabled', True) else None
+    return AIAgent(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        model=ai_config.get('model', 'gpt-4'),
+        cache=llm_cache,
+        base_url=ai_config.get('base_url'),
+        max_concurrency=ai_config.get('max_concurrency', 4),
+        requests_per_minute=ai_config.get('requests_per_minute'),
+        tokens_per_minute=ai_config.get('tokens_per_minute'),
+        batch_max_chars=ai_config.get('batch_max_chars', 12000),
+        chunk_tokens=ai_config.get('chunk_tokens', 2000),
+        outline_chars=ai_config.get('outline_chars', 8000)
+    )
+
+
+def worker_telemetry_config(telemetry_config: Dict[str, Any], worker_id: int) -> Dict[str, Any]:
+    """Per-worker telemetry outputs: suffixed files and the metrics port offset by the worker id"""
+    config = dict(telemetry_config)
+    for key in ('jsonl_path', 'prometheus_textfile'):
+        if config.get(key):
+            config[key] = f"{config[key]}.worker-{worker_id}"
+    if config.get('prometheus_port'):
+        config['prometheus_port'] += worker_id
+    return config
+
+
+async def run_jobs(config: Dict[str, Any], tenants: Dict[str, Dict[str, Any]], jobs: List[Job],
+                   telemetry_config: Optional[Dict[str, Any]] = None,
+                   on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Run jobs on this process's event loop with one browser pool"""
+    ai_agent = create_ai_agent(config)
+    pool = BrowserPool(config.get('browser', {}))
+
+    def finished(r: Dict[str, Any]):
+        tabulate_users(r)
+        if on_result:
+            on_result(r)
+
+    runner = JobRunner(config, pool, ai_agent, tenants)
+    scheduler = JobScheduler(runner, config.get('scheduler', {}), on_result=finished)
+    for job in jobs:
+        scheduler.submit(job)
+
+    telemetry_config = config.get('telemetry', {}) if telemetry_config is None else telemetry_config
+    telemetry = tracing.configure(telemetry_config)
+    metrics_server = None
     try:
-        # Start browser
-        await browser_manager.start()
-
-        # Login
-        logger.info("Attempting login...")
-        login_success = await adapter.login(credentials)
-        if not login_success:
-            logger.error("Login failed.")
-            return
-
-        await auth_handler.store_session_timestamp()
-
-        # Extract users
-        logger.info("Extracting users...")
-        users = await adapter.extract_users()
-        logger.info(f"Extracted {len(users)} users: {users}")
-
-        # Create a new user (example)
-        new_user = {
-            'email': 'newuser@example.com',
-            'name': 'New User',
-            'role': 'Member'
-        }
-        creation_success = await adapter.create_user(new_user)
-        logger.info(f"User creation success: {creation_success}")
-
-        # Delete user (example)
-        deletion_success = await adapter.delete_user('newuser@example.com')
-        logger.info(f"User deletion success: {deletion_success}")
-
-        # Logout
-        await adapter.logout()
-
-    except Exception as e:
-        logger.error(f"Unhandled error: {e}")
+        if telemetry_config.get('prometheus_port'):
+            metrics_server = await tracing.PrometheusServer(telemetry_config['prometheus_port']).start()
+        await pool.start()
+        logger.info(f"Running {len(jobs)} jobs...")
+        results = summarize(await scheduler.run())
     finally:
-        await browser_manager.stop()
+        await pool.close()
+        runner.close()
+        if telemetry_config.get('prometheus_textfile'):
+            telemetry.write_prometheus(telemetry_config['prometheus_textfile'])
+        if metrics_server:
+            await metrics_server.stop()
+        telemetry.close()
 
-if __name__ == "__main__":
-    asyncio.run(main())
+    if pool.profile.enabled:
+        logger.info(f"Lean browser profile: {pool.profile.summary()}")
+    return results
 
+
+async def run_worker(worker_id: int, jobs: List[Job], emit: Callable[[Dict[str, Any]], None],
+                     config: Dict[str, Any], tenants: Dict[str, Dict[str, Any]]):
+    """Entry point of a WorkerCoordinator process; streams each job result back through emit"""
+    await run_jobs(
+        config, tenants, jobs,
+        telemetry_config=worker_telemetry_config(config.get('telemetry', {}), worker_id),
+        on_result=lambda r: emit(summarize_result(r))
+    )
+
+
+async def main(args):
+    # Load configuration
+    config = load_config(args.config)
+    job_file = load_jobs(args.jobs)
+
+    processes = args.workers or config.get('workers', {}).get('processes', 1)
+    if processes > 1:
+        # One event loop and browser pool per process; jobs are sharded by tenant
+        coordinator = WorkerCoordinator(run_worker, processes)
+        logger.info(f"Running {len(job_file['jobs'])} jobs in {processes} worker processes...")
+        results = await asyncio.to_thread(coordinator.run, job_file['jobs'], config, job_file['tenants'])
+    else:
+        results = await run_jobs(config, job_file['tenants'], job_file['jobs'])
+
+    failed = [r for r in results if not r['success']]
+    logger.info(f"Completed {len(results) - len(failed)}/{len(results)} jobs")
+    for r in failed:
+        logger.error(f"{r['adapter']}/{r['tenant']} {r['operation']} failed: {r['error']}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2, default=json_default)
+
+    if args.users_output:
+        collect_users(results).export(args.users_output)
+
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run SaaS user-management jobs")
+    parser.add_argument('--jobs', required=True, help="YAML job file")
+    parser.add_argument('--config', default=None, help="Path to config.yaml")
+    parser.add_argument('--output', default=None, help="Write job results as JSON")
+    parser.add_argument('--users-output', default=None,
+                        help="Write all extracted users to a .csv, .jsonl or .parquet file")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes to shard jobs across (default: workers.processes in config)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
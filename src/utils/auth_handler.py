@@ -1,19 +1,39 @@
 import logging
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
+from core.page_state import PageStateClassifier, MFA
 
 logger = logging.getLogger(__name__)
 
 class AuthHandler:
-    def __init__(self):
+    def __init__(self, session_store=None, session_lifetime: timedelta = timedelta(minutes=30)):
         self.session_expiry: Optional[datetime] = None
-        self.session_lifetime = timedelta(minutes=30)  # Example session duration
+        self.session_lifetime = session_lifetime
+        self.session_store = session_store
 
     async def store_session_timestamp(self):
         """Mark session as active now."""
         self.session_expiry = datetime.now() + self.session_lifetime
         logger.info(f"Session timestamp stored. Session expires at {self.session_expiry}.")
 
+    async def save_session(self, adapter: str, account: str, storage_state: Dict[str, Any]):
+        """Persist browser storage state so the next run can skip login."""
+        await self.store_session_timestamp()
+        if self.session_store:
+            self.session_store.save(adapter, account, storage_state, self.session_expiry.timestamp())
+
+    def load_session(self, adapter: str, account: str) -> Optional[Dict[str, Any]]:
+        """Return a cached, unexpired storage state for this account, if any."""
+        if not self.session_store:
+            return None
+        return self.session_store.load(adapter, account)
+
+    def invalidate_session(self, adapter: str, account: str):
+        """Forget a cached session that failed validation."""
+        self.session_expiry = None
+        if self.session_store:
+            self.session_store.invalidate(adapter, account)
+
     def is_session_active(self) -> bool:
         """Check if session is still active."""
         if not self.session_expiry:
@@ -31,8 +51,8 @@ class AuthHandler:
         For now: manual code entry (future: integrate with TOTP/SMS service)
         """
         try:
-            mfa_selector = 'input[name*="code"], input[name*="token"], .mfa-input'
-            if await browser_manager.wait_for_element(mfa_selector, timeout=5000, fail_silently=True):
+            state, _ = await PageStateClassifier(browser_manager).classify()
+            if state == MFA:
                 logger.warning("MFA prompt detected. Awaiting manual code entry.")
                 await browser_manager.pause()  # Let operator input code
                 return True
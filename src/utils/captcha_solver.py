@@ -1,27 +1,34 @@
 import logging
 from typing import Optional
+from core.page_state import PageStateClassifier, STATE_INDICATORS, CAPTCHA
 
 logger = logging.getLogger(__name__)
 
+CAPTCHA_TYPES = {
+    '.g-recaptcha': 'recaptcha',
+    'iframe[src*="recaptcha"]': 'recaptcha',
+    'iframe[src*="hcaptcha"]': 'hcaptcha',
+    'img[src*="captcha"]': 'image_captcha'
+}
+
 class CaptchaSolver:
     def __init__(self, browser_manager):
         self.browser_manager = browser_manager
+        # Only CAPTCHA indicators, all checked in a single in-page probe
+        self.classifier = PageStateClassifier(
+            browser_manager, [(state, selectors) for state, selectors in STATE_INDICATORS if state == CAPTCHA]
+        )
 
     async def detect_captcha(self) -> Optional[str]:
         """
         Detect if CAPTCHA is present on the page.
         Returns the type of CAPTCHA detected (if any).
         """
-        captcha_patterns = {
-            'recaptcha': '.g-recaptcha',
-            'image_captcha': 'img[src*="captcha"]',
-            'custom_captcha': '.captcha, #captcha'
-        }
-
-        for captcha_type, selector in captcha_patterns.items():
-            if await self.browser_manager.wait_for_element(selector, timeout=3000, visible=True, fail_silently=True):
-                logger.warning(f"CAPTCHA detected: {captcha_type}")
-                return captcha_type
+        state, selector = await self.classifier.classify()
+        if state == CAPTCHA:
+            captcha_type = CAPTCHA_TYPES.get(selector, 'custom_captcha')
+            logger.warning(f"CAPTCHA detected: {captcha_type}")
+            return captcha_type
         
         logger.info("No CAPTCHA detected")
         return None
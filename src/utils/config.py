@@ -1,10 +1,21 @@
 import yaml
 import os
 from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent.parent / "config.yaml"
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """Load a YAML config file, defaulting to the project config.yaml"""
+    config_path = Path(path) if path else DEFAULT_CONFIG_PATH
+    if not config_path.exists() and not config_path.is_absolute():
+        config_path = DEFAULT_CONFIG_PATH.parent / config_path
+    with open(config_path, 'r') as file:
+        return yaml.safe_load(file) or {}
 
 class Config:
     def __init__(self):
-        self.config_path = Path(__file__).parent.parent.parent / "config.yaml"
+        self.config_path = DEFAULT_CONFIG_PATH
         self.load_config()
     
     def load_config(self):
@@ -0,0 +1,95 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+logger = logging.getLogger(__name__)
+
+NONCE_SIZE = 12
+
+
+class SessionStore:
+    """Encrypted on-disk cache of Playwright storage state (cookies + localStorage).
+
+    Entries are keyed by adapter + account and sealed with AES-256-GCM. The key is
+    read from the environment variable named by ``key_env`` (base64, 32 bytes);
+    without it the store is disabled and every run falls back to a full login.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.directory = Path(config.get('directory', '.session_cache'))
+        self.enabled = config.get('enabled', True)
+        self._cipher: Optional[AESGCM] = None
+
+        key_env = config.get('key_env', 'SESSION_CACHE_KEY')
+        encoded_key = os.getenv(key_env)
+        if self.enabled and not encoded_key:
+            logger.warning(f"{key_env} not set - session cache disabled")
+            self.enabled = False
+        elif self.enabled:
+            self._cipher = AESGCM(base64.b64decode(encoded_key))
+
+    @staticmethod
+    def generate_key() -> str:
+        """Return a new base64-encoded 256-bit key"""
+        return base64.b64encode(AESGCM.generate_key(bit_length=256)).decode()
+
+    def _path(self, adapter: str, account: str) -> Path:
+        digest = hashlib.sha256(f"{adapter}:{account}".encode()).hexdigest()
+        return self.directory / f"{digest}.session"
+
+    def save(self, adapter: str, account: str, storage_state: Dict[str, Any], expires_at: float):
+        """Encrypt and persist storage state until expires_at (epoch seconds)"""
+        if not self.enabled:
+            return
+
+        payload = json.dumps({'expires_at': expires_at, 'storage_state': storage_state}).encode()
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self._cipher.encrypt(nonce, payload, f"{adapter}:{account}".encode())
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(adapter, account)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as file:
+            file.write(nonce + sealed)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+    def load(self, adapter: str, account: str) -> Optional[Dict[str, Any]]:
+        """Return cached storage state, or None if missing, expired or unreadable"""
+        if not self.enabled:
+            return None
+
+        path = self._path(adapter, account)
+        if not path.exists():
+            return None
+
+        try:
+            data = path.read_bytes()
+            payload = self._cipher.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:], f"{adapter}:{account}".encode())
+            entry = json.loads(payload)
+        except (InvalidTag, ValueError, OSError) as e:
+            logger.warning(f"Discarding unreadable session cache for {adapter}: {e}")
+            self.invalidate(adapter, account)
+            return None
+
+        if entry['expires_at'] <= time.time():
+            logger.info(f"Cached {adapter} session expired")
+            self.invalidate(adapter, account)
+            return None
+
+        return entry['storage_state']
+
+    def invalidate(self, adapter: str, account: str):
+        """Remove a cached session"""
+        try:
+            self._path(adapter, account).unlink()
+        except FileNotFoundError:
+            pass
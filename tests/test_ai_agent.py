@@ -0,0 +1,150 @@
+import asyncio
+import json
+import re
+import time
+import pytest
+from aiohttp import web
+
+from core.ai_agent import AIAgent
+from core.rate_limiter import TokenBucket
+
+
+class FakeOpenAIServer:
+    """Minimal OpenAI-compatible /v1/chat/completions endpoint"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.runner = None
+        self.base_url = None
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        prompt = body['messages'][-1]['content']
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        emails = re.findall(r'[\w.]+@example\.com', prompt)
+        documents = re.findall(r'--- Document (\d+) ---', prompt)
+        if documents:
+            chunks = re.split(r'--- Document \d+ ---', prompt)[1:]
+            content = {
+                number: [{'email': e} for e in re.findall(r'[\w.]+@example\.com', chunk)]
+                for number, chunk in zip(documents, chunks)
+            }
+        else:
+            content = [{'email': e} for e in emails]
+
+        return web.json_response({
+            'id': 'chatcmpl-test',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body['model'],
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': json.dumps(content)}
+            }],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 10, 'total_tokens': 20}
+        })
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self.chat_completions)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    server = await FakeOpenAIServer(delay=0.05).start()
+    try:
+        agent = AIAgent(api_key='test', base_url=server.base_url, max_concurrency=2)
+        results = await asyncio.gather(
+            *(agent.extract_user_data(f"<td>user{i}@example.com</td>") for i in range(6))
+        )
+    finally:
+        await server.stop()
+
+    assert [r[0]['email'] for r in results] == [f"user{i}@example.com" for i in range(6)]
+    assert server.peak_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_small_documents_are_batched():
+    server = await FakeOpenAIServer().start()
+    try:
+        agent = AIAgent(api_key='test', base_url=server.base_url, batch_max_chars=1000)
+        results = await agent.extract_user_data_batch(
+            [f"<td>user{i}@example.com</td>" for i in range(3)] + ['<td>' + 'x' * 1200 + '</td>']
+        )
+    finally:
+        await server.stop()
+
+    assert server.requests == 2
+    assert [r[0]['email'] for r in results[:3]] == ['user0@example.com', 'user1@example.com', 'user2@example.com']
+    assert results[3] == []
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_when_exhausted():
+    bucket = TokenBucket(600)  # 10 per second
+    await bucket.acquire(600)
+
+    started = time.monotonic()
+    await bucket.acquire(2)
+
+    assert time.monotonic() - started >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_large_lists_are_streamed_in_chunks_without_duplicates():
+    rows = ''.join(f'<tr><td>user{i}@example.com</td></tr>' for i in range(300))
+    rows += '<tr><td>user0@example.com</td></tr>'
+    server = await FakeOpenAIServer().start()
+    try:
+        agent = AIAgent(api_key='test', base_url=server.base_url, chunk_tokens=200)
+        emails = [user['email'] async for user in agent.iter_user_data(f'<table>{rows}</table>')]
+    finally:
+        await server.stop()
+
+    assert server.requests > 1
+    assert sorted(emails) == sorted(f'user{i}@example.com' for i in range(300))
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_waits_for_cancelled_chunks():
+    rows = ''.join(f'<tr><td>user{i}@example.com</td></tr>' for i in range(300))
+    agent = AIAgent(api_key='test', chunk_tokens=200)
+    cancelled = []
+
+    async def extract_chunk(chunk):
+        if 'user0@' in chunk:
+            return [{'email': 'user0@example.com'}]
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(chunk)
+            raise
+
+    agent._extract_chunk = extract_chunk
+    stream = agent.iter_user_data(f'<table>{rows}</table>')
+    assert (await stream.__anext__())['email'] == 'user0@example.com'
+    await stream.aclose()
+
+    assert len(cancelled) == len(agent._user_data_chunks(f'<table>{rows}</table>')) - 1
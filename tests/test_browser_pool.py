@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+
+from core.browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def evaluate(self, script):
+        return 1
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    async def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+
+def make_pool(**pool_config):
+    pool = BrowserPool({'pool': pool_config})
+    pool.browser = FakeBrowser()
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_for_same_key():
+    pool = make_pool(max_size=2)
+
+    async with pool.session('tenant-a') as first:
+        pass
+    async with pool.session('tenant-a') as second:
+        pass
+
+    assert first.page is second.page
+    assert pool.stats['created'] == 1
+    assert pool.stats['reused'] == 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_isolated_between_keys():
+    pool = make_pool(max_size=2)
+
+    async with pool.session('tenant-a') as first:
+        pass
+    async with pool.session('tenant-b') as second:
+        pass
+
+    assert first.context is not second.context
+
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded():
+    pool = make_pool(max_size=2)
+    active = 0
+    peak = 0
+
+    async def job(key):
+        nonlocal active, peak
+        async with pool.session(key):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(job(f"tenant-{i}") for i in range(6)))
+
+    assert peak == 2
+    assert len([c for c in pool.browser.contexts if not c.closed]) <= 2
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_and_idle_sessions_are_replaced():
+    pool = make_pool(max_size=2, max_idle_seconds=0)
+
+    async with pool.session('tenant-a') as first:
+        pass
+    async with pool.session('tenant-a') as second:
+        pass
+
+    assert first.context.closed
+    assert second.context is not first.context
+    assert pool.stats['evicted'] == 1
+
+    pool.max_idle_seconds = 300
+    second.page.closed = True
+    async with pool.session('tenant-a') as third:
+        pass
+    assert third.context is not second.context
+
+
+@pytest.mark.asyncio
+async def test_anonymous_sessions_are_not_reused():
+    pool = make_pool()
+
+    async with pool.session() as first:
+        pass
+    async with pool.session() as second:
+        pass
+
+    assert first.context.closed
+    assert second.context is not first.context
+    assert pool.stats['reused'] == 0
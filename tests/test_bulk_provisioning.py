@@ -0,0 +1,109 @@
+import pytest
+
+from adapters.base_adapter import BaseSaaSAdapter
+from adapters.notion_adapter import NotionAdapter
+
+
+class FakeBrowserManager:
+    def __init__(self, registry):
+        self.registry = registry
+        self.closed = False
+        registry.append(self)
+
+    async def open_sibling(self):
+        return FakeBrowserManager(self.registry)
+
+    async def close_page(self):
+        self.closed = True
+
+
+class RecordingAdapter(BaseSaaSAdapter):
+    name = 'fake'
+
+    async def login(self, credentials):
+        return True
+
+    async def extract_users(self, until=None):
+        return []
+
+    async def create_user(self, user_data):
+        if user_data['email'].startswith('bad'):
+            raise ValueError('rejected')
+        return True
+
+    async def delete_user(self, user_identifier):
+        return user_identifier != 'missing@example.com'
+
+    async def update_user(self, user_identifier, updates):
+        return True
+
+
+def make_adapter(cls, config):
+    managers = []
+    adapter = cls(config, FakeBrowserManager(managers), None, None)
+    adapter.session_active = True
+    return adapter, managers
+
+
+@pytest.mark.asyncio
+async def test_generic_fallback_returns_per_item_results_in_order():
+    adapter, managers = make_adapter(RecordingAdapter, {'bulk_concurrency': 3})
+    users = [{'email': f'user{i}@example.com'} for i in range(5)] + [{'email': 'bad@example.com'}]
+
+    results = await adapter.create_users(users)
+
+    assert [r['item'] for r in results] == users
+    assert [r['success'] for r in results] == [True] * 5 + [False]
+    assert results[-1]['error'] == 'rejected'
+    # Two sibling pages were opened for the extra shards and closed afterwards
+    assert len(managers) == 3 and all(m.closed for m in managers[1:])
+
+    results = await adapter.delete_users(['a@example.com', 'missing@example.com'])
+    assert [r['success'] for r in results] == [True, False]
+
+    results = await adapter.update_users({'a@example.com': {'role': 'Admin'}})
+    assert results == [{'item': 'a@example.com', 'success': True, 'error': None}]
+
+
+@pytest.mark.asyncio
+async def test_bulk_requires_an_active_session():
+    adapter, _ = make_adapter(RecordingAdapter, {})
+    adapter.session_active = False
+
+    results = await adapter.delete_users(['a@example.com'])
+    assert results == [{'item': 'a@example.com', 'success': False, 'error': 'not logged in'}]
+
+
+class GroupedNotionAdapter(NotionAdapter):
+    """Records invite submissions instead of driving the invite dialog"""
+
+    def __init__(self, config):
+        super().__init__(config, None, None, None)
+        self.session_active = True
+        self.invites = []
+
+    async def _send_invite(self, emails, role=None):
+        self.invites.append((tuple(emails), role))
+        return not any(email.startswith('bad') for email in emails)
+
+
+@pytest.mark.asyncio
+async def test_notion_invites_by_role_in_batches_and_retries_failed_groups():
+    adapter = GroupedNotionAdapter({'notion': {'invite_batch_size': 2}})
+    users = [
+        {'email': 'a@example.com', 'role': 'Member'},
+        {'email': 'b@example.com', 'role': 'Admin'},
+        {'email': 'c@example.com', 'role': 'Member'},
+        {'email': 'd@example.com', 'role': 'Member'},
+        {'email': 'bad@example.com', 'role': 'Member'},
+    ]
+
+    results = await adapter.create_users(users)
+
+    assert adapter.invites[:3] == [
+        (('a@example.com', 'c@example.com'), 'Member'),
+        (('d@example.com', 'bad@example.com'), 'Member'),
+        (('d@example.com',), 'Member'),
+    ]
+    assert (('b@example.com',), 'Admin') in adapter.invites
+    assert [r['success'] for r in results] == [True, True, True, True, False]
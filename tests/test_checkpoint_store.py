@@ -0,0 +1,141 @@
+import time
+
+import pytest
+
+from adapters.notion_adapter import NotionAdapter
+from core.checkpoint_store import CheckpointStore
+from core.user_snapshot import UserSnapshotStore
+
+ADMIN_URL = 'https://notion.test/settings/members'
+
+
+def page_users(number):
+    return [{'name': f'User {number}-{i}', 'email': f'user{number}-{i}@example.com'} for i in range(2)]
+
+
+class FakePage:
+    def __init__(self, manager):
+        self.manager = manager
+
+    @property
+    def url(self):
+        return f'{ADMIN_URL}?page={self.manager.current}' if self.manager.current > 1 else ADMIN_URL
+
+
+class FakeBrowserManager:
+    """A paginated member list whose "next" click raises when reaching fail_at"""
+
+    def __init__(self, pages, fail_at=None):
+        self.pages = pages
+        self.fail_at = fail_at
+        self.current = 0
+        self.page = FakePage(self)
+        self.visited = []
+
+    async def navigate(self, url):
+        self.current = int(url.split('?page=')[1]) if '?page=' in url else 1
+        self.visited.append(self.current)
+        return True
+
+    async def wait_for_element(self, selector, timeout=10000):
+        return True
+
+    async def click_and_wait(self, selector):
+        if self.current + 1 == self.fail_at:
+            raise RuntimeError('session expired')
+        self.current += 1
+        self.visited.append(self.current)
+        return True
+
+
+class FakeDataExtractor:
+    async def extract_users_from_page(self, browser_manager, schema=None):
+        return page_users(browser_manager.current)
+
+    async def extract_pagination_from_page(self, browser_manager):
+        has_next = browser_manager.current < browser_manager.pages
+        return {'has_next': has_next, 'next_selector': '#next' if has_next else None}
+
+
+def make_adapter(store, pages, fail_at=None):
+    config = {'notion': {'admin_url': ADMIN_URL}}
+    adapter = NotionAdapter(config, FakeBrowserManager(pages, fail_at), None, FakeDataExtractor())
+    adapter.api_patterns = []
+    adapter.session_active = True
+    adapter.tenant = 'acme'
+    adapter.checkpoint_store = store
+    return adapter
+
+
+def all_users(pages):
+    return [user for number in range(1, pages + 1) for user in page_users(number)]
+
+
+@pytest.mark.asyncio
+async def test_failed_extraction_resumes_from_the_last_page(tmp_path):
+    path = str(tmp_path / 'checkpoints.sqlite')
+    store = CheckpointStore({'path': path})
+
+    assert await make_adapter(store, 5, fail_at=4).extract_users() is False
+    checkpoint = store.load('notion', 'acme')
+    assert checkpoint['pages'] == 3
+    assert checkpoint['cursor']['page'] == 3
+    assert checkpoint['users'] == all_users(3)
+    store.close()
+
+    # A new process picks up after page 3
+    store = CheckpointStore({'path': path})
+    adapter = make_adapter(store, 5)
+    users = await adapter.extract_users()
+
+    assert users == all_users(5)
+    assert adapter.browser_manager.visited == [3, 4, 5]
+    assert store.load('notion', 'acme') is None
+
+
+@pytest.mark.asyncio
+async def test_without_a_store_partial_listings_still_fail():
+    assert await make_adapter(None, 5, fail_at=4).extract_users() is False
+
+    snapshots = UserSnapshotStore()
+    snapshots.apply('notion', 'acme', {'added': all_users(3), 'changed': [], 'removed': []})
+    adapter = make_adapter(None, 3)
+    adapter.snapshot_store = snapshots
+
+    async def stalled_click(selector):
+        return False
+
+    adapter.browser_manager.click_and_wait = stalled_click
+    assert await adapter.extract_users() is False
+    assert await adapter.sync_users() is False
+    assert len(snapshots.load('notion', 'acme')) == 6
+
+
+@pytest.mark.asyncio
+async def test_sync_fails_instead_of_diffing_a_partial_listing():
+    store = CheckpointStore()
+    snapshots = UserSnapshotStore()
+    adapter = make_adapter(store, 3, fail_at=3)
+    adapter.snapshot_store = snapshots
+
+    assert await adapter.sync_users() is False
+    assert snapshots.load('notion', 'acme') == {}
+
+    adapter = make_adapter(store, 3)
+    adapter.snapshot_store = snapshots
+    diff = await adapter.sync_users()
+    assert len(diff['added']) == 6
+
+
+def test_stale_checkpoints_are_discarded():
+    store = CheckpointStore({'max_age_minutes': 1})
+    store.save_page('notion', 'acme', page_users(1), {'source': 'html', 'page': 1})
+    store.save_page('notion', 'acme', page_users(1) + page_users(2), {'source': 'html', 'page': 2})
+
+    checkpoint = store.load('notion', 'acme')
+    assert checkpoint['pages'] == 2
+    assert checkpoint['users'] == all_users(2)
+
+    store._db.execute('UPDATE extraction_checkpoint SET updated_at = ?', (time.time() - 120,))
+    assert store.load('notion', 'acme') is None
+    assert store._db.execute('SELECT COUNT(*) FROM extraction_checkpoint_user').fetchone()[0] == 0
@@ -0,0 +1,200 @@
+import pytest
+
+import core.data_extractor as data_extractor_module
+from core.data_extractor import DataExtractor
+from core.header_schema import HeaderSchema
+from core.html_parser import PARSER_BACKENDS
+
+
+class FakeAIAgent:
+    def __init__(self, users=()):
+        self.calls = 0
+        self.users = list(users)
+
+    async def iter_user_data(self, html_content):
+        self.calls += 1
+        for user in self.users:
+            yield user
+
+
+def members_page(count):
+    rows = ''.join(
+        f'<tr><td>User {i}</td><td>user{i}@example.com</td><td>Member</td></tr>' for i in range(count)
+    )
+    return (
+        '<html><body><table><tr><th>Name</th><th>Email</th><th>Role</th></tr>'
+        f'{rows}</table>'
+        '<div class="pagination"><a id="next-page" href="?page=2">Next</a></div>'
+        '</body></html>'
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('parser', PARSER_BACKENDS)
+async def test_backends_extract_same_users_and_pagination(parser):
+    extractor = DataExtractor(FakeAIAgent(), parser=parser)
+    html = members_page(5)
+
+    users = await extractor.extract_users_from_table(html)
+    pagination = extractor.extract_pagination_info(html)
+
+    assert extractor.parser == parser
+    assert users[0] == {'name': 'User 0', 'email': 'user0@example.com', 'role': 'Member'}
+    assert len(users) == 5
+    assert pagination['has_next']
+    assert pagination['next_selector'] == '#next-page'
+
+
+@pytest.mark.asyncio
+async def test_document_is_parsed_once_for_table_and_pagination(monkeypatch):
+    parses = []
+    original = data_extractor_module.parse_html
+
+    def counting_parse(html_content, parser=None):
+        parses.append(parser)
+        return original(html_content, parser)
+
+    monkeypatch.setattr(data_extractor_module, 'parse_html', counting_parse)
+    extractor = DataExtractor(FakeAIAgent())
+    html = members_page(3)
+
+    await extractor.extract_users_from_table(html)
+    extractor.extract_pagination_info(html)
+    extractor.extract_pagination_info(members_page(4))
+
+    assert len(parses) == 2
+
+
+@pytest.mark.asyncio
+async def test_page_is_released_once_pagination_is_read():
+    extractor = DataExtractor(FakeAIAgent())
+    html = members_page(3)
+
+    await extractor.extract_users_from_table(html)
+    assert extractor._last_soup is not None
+
+    extractor.extract_pagination_info(html)
+    assert extractor._last_html is None and extractor._last_soup is None and extractor._offloaded is None
+
+
+class FakeBrowserManager:
+    def __init__(self, tables, pagination_html=None):
+        self.tables = tables
+        self.pagination_html = pagination_html
+        self.scripts = []
+
+    async def evaluate(self, script, arg=None):
+        self.scripts.append(arg)
+        if 'outerHTML' in script:
+            return self.pagination_html
+        if script == data_extractor_module.TABLE_HEADERS_SCRIPT:
+            return [table['th'] for table in self.tables]
+        return [{'headers': self.tables[i]['headers'], 'rows': self.tables[i]['rows']} for i in arg]
+
+
+@pytest.mark.asyncio
+async def test_in_browser_rows_are_normalized_in_python():
+    browser_manager = FakeBrowserManager(
+        tables=[{
+            'th': ['Name', 'Email', 'Permission'],
+            'headers': ['Name', 'Email', 'Permission'],
+            'rows': [['Ada', ' ada@example.com ', 'Admin'], ['Nobody', '', 'Guest'], ['Short']]
+        }],
+        pagination_html='<div class="pagination"><button id="next">Next</button></div>'
+    )
+    extractor = DataExtractor(FakeAIAgent())
+
+    users = await extractor.extract_users_from_page(browser_manager)
+    pagination = await extractor.extract_pagination_from_page(browser_manager)
+
+    assert users == [{'name': 'Ada', 'email': 'ada@example.com', 'role': 'Admin'}]
+    assert pagination['next_selector'] == '#next'
+
+
+def test_disabled_next_button_ends_pagination():
+    extractor = DataExtractor(FakeAIAgent())
+
+    last_page = extractor.extract_pagination_info(
+        '<div class="pagination"><a class="prev" href="?page=2">Prev</a><button class="next" disabled>Next</button></div>'
+    )
+
+    assert not last_page['has_next']
+    assert last_page['has_previous']
+
+
+def test_page_urls_from_numbered_offset_links():
+    extractor = DataExtractor(FakeAIAgent())
+
+    pagination = extractor.extract_pagination_info(
+        '<div class="pagination"><a href="/members?q=a">1</a>'
+        '<a class="current" href="/members?offset=50&q=a">2</a><a href="/members?offset=100&q=a">3</a>'
+        '<span>Page 2 of 5</span><a class="next" href="/members?offset=100&q=a">Next</a></div>'
+    )
+
+    assert pagination['current_page'] == 2
+    assert pagination['total_pages'] == 5
+    assert extractor.page_urls(pagination, 'https://app.test/members?offset=50&q=a') == [
+        f'https://app.test/members?offset={offset}&q=a' for offset in range(0, 250, 50)
+    ]
+
+
+def test_no_page_urls_without_a_numeric_pattern():
+    extractor = DataExtractor(FakeAIAgent())
+
+    pagination = extractor.extract_pagination_info(
+        '<div class="pagination"><a href="?cursor=abc">1</a><a href="?cursor=def">2</a>'
+        '<a class="next" href="?cursor=def">Next</a></div>'
+    )
+
+    assert pagination['total_pages'] == 2
+    assert extractor.page_urls(pagination, 'https://app.test/members') == []
+
+
+@pytest.mark.asyncio
+async def test_in_browser_tables_are_picked_by_the_header_schema():
+    browser_manager = FakeBrowserManager(tables=[
+        {'th': ['Plan', 'Seats'], 'headers': ['Plan', 'Seats'], 'rows': [['Team', 'a@example.com']]},
+        {'th': ['Correo', 'Nombre'], 'headers': ['Correo', 'Nombre'], 'rows': [['ada@example.com', 'Ada']]},
+    ])
+    extractor = DataExtractor(FakeAIAgent())
+
+    users = await extractor.extract_users_from_page(browser_manager, HeaderSchema({'email': ['Correo']}))
+
+    assert users == [{'email': 'ada@example.com'}]
+    # Only the member table's cells are asked for
+    assert browser_manager.scripts == [None, [1]]
+
+
+def test_pagination_skips_layout_wrappers_around_the_table():
+    extractor = DataExtractor(FakeAIAgent())
+    pagination = extractor.extract_pagination_info(
+        '<div class="page-content"><table><tr><th>Email</th></tr></table>'
+        '<nav aria-label="Pagination"><a id="next-page" href="?page=2">Next</a></nav></div>'
+    )
+
+    assert pagination['has_next']
+    assert pagination['next_selector'] == '#next-page'
+
+
+def test_only_page_counters_set_the_total():
+    extractor = DataExtractor(FakeAIAgent())
+    links = '<a href="?page=1">1</a><a href="?page=2">2</a><a href="?page=3">3</a>'
+
+    def total(counter):
+        return extractor.extract_pagination_info(f'<div class="pagination">{counter}{links}</div>')['total_pages']
+
+    assert total('Showing 1-50 of 1200 members') == 3
+    assert total('Page 1 of 40') == 40
+    assert total('Page 1 of 100000') == 3
+
+
+@pytest.mark.asyncio
+async def test_ai_fallback_streams_users_from_the_agent():
+    ai_agent = FakeAIAgent([{'email': 'ada@example.com'}, {'email': 'alan@example.com'}])
+    extractor = DataExtractor(ai_agent)
+
+    users = extractor.iter_users_from_table('<ul><li>ada@example.com</li><li>alan@example.com</li></ul>')
+
+    assert await users.__anext__() == {'email': 'ada@example.com'}
+    assert [user async for user in users] == [{'email': 'alan@example.com'}]
+    assert ai_agent.calls == 1
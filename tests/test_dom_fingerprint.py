@@ -0,0 +1,48 @@
+import pytest
+
+from core.dom_fingerprint import dom_fingerprint, dom_skeleton
+from core.selector_store import SelectorStore
+from adapters.notion_adapter import NotionAdapter
+
+
+def members_page(rows, extra_class=''):
+    body = ''.join(
+        f'<tr class="member-row"><td>User {i}</td><td>user{i}@example.com</td></tr>' for i in range(rows)
+    )
+    return (
+        '<html><head><script>var t = 1;</script></head><body>'
+        f'<div class="members css-1a2b3c {extra_class}"><table><tbody>{body}</tbody></table></div>'
+        '</body></html>'
+    )
+
+
+class FakeAIAgent:
+    def __init__(self):
+        self.calls = 0
+
+    async def analyze_page_structure(self, html_content, task):
+        self.calls += 1
+        return {'selectors': {'rows': 'tr.member-row'}, 'actions': [], 'confidence': 0.9}
+
+
+def test_fingerprint_ignores_data_and_row_count():
+    assert dom_fingerprint(members_page(3)) == dom_fingerprint(members_page(50))
+    assert 'tr.member-row(td*)*' in dom_skeleton(members_page(3))
+
+
+def test_fingerprint_changes_with_layout():
+    assert dom_fingerprint(members_page(3)) != dom_fingerprint(members_page(3, extra_class='compact'))
+
+
+@pytest.mark.asyncio
+async def test_analysis_is_reused_for_known_layout():
+    ai_agent = FakeAIAgent()
+    adapter = NotionAdapter({}, None, ai_agent, None)
+    adapter.selector_store = SelectorStore()
+
+    first = await adapter.analyze_page(members_page(3), 'extract_users')
+    second = await adapter.analyze_page(members_page(40), 'extract_users')
+    await adapter.analyze_page(members_page(3, extra_class='compact'), 'extract_users')
+
+    assert first == second
+    assert ai_agent.calls == 2
@@ -0,0 +1,109 @@
+import pytest
+
+from adapters.dropbox_adapter import DropboxAdapter
+from core.browser_manager import BrowserManager
+from core.page_state import ERROR, LOGGED_IN, MFA
+
+
+class FakeHandle:
+    def __init__(self, value):
+        self.value = value
+
+    async def json_value(self):
+        return self.value
+
+
+class FakePlaywrightPage:
+    """The subset of playwright's Page that BrowserManager calls"""
+
+    def __init__(self, state=LOGGED_IN, selector='nav[role="navigation"]'):
+        self.context = None
+        self.url = 'about:blank'
+        self.state = state
+        self.selector = selector
+        self.filled = {}
+        self.selected = {}
+        self.clicked = []
+        self.probes = []
+
+    async def goto(self, url, wait_until=None):
+        self.url = url
+
+    async def wait_for_load_state(self, state, timeout=None):
+        return None
+
+    async def evaluate(self, script, arg=None):
+        return True
+
+    async def fill(self, selector, text):
+        self.filled[selector] = text
+
+    async def click(self, selector):
+        self.clicked.append(selector)
+
+    async def select_option(self, selector, value=None, label=None):
+        self.selected[selector] = value or label
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        return object()
+
+    async def wait_for_function(self, script, arg, timeout):
+        self.probes.append(arg)
+        return FakeHandle({'state': self.state, 'selector': self.selector})
+
+
+def dropbox(page):
+    config = {'dropbox': {'login_url': 'https://dropbox.test/login'}}
+    return DropboxAdapter(config, BrowserManager.from_page({}, page), None, None)
+
+
+@pytest.mark.asyncio
+async def test_login_drives_the_browser_manager():
+    page = FakePlaywrightPage()
+    adapter = dropbox(page)
+
+    assert await adapter.login({'email': 'admin@example.com', 'password': 'secret'})
+
+    assert adapter.session_active
+    assert page.url == 'https://dropbox.test/login'
+    assert page.filled == {'input[name="login_email"]': 'admin@example.com',
+                           'input[name="login_password"]': 'secret'}
+    assert page.clicked == ['button[type="submit"]']
+    assert page.probes[0]['loggedInSelectors'] == ['nav[role="navigation"]']
+
+
+@pytest.mark.asyncio
+async def test_rejected_login_fails():
+    adapter = dropbox(FakePlaywrightPage(state=ERROR, selector='.error-message'))
+
+    assert not await adapter.login({'email': 'admin@example.com', 'password': 'wrong'})
+    assert not adapter.session_active
+
+
+@pytest.mark.asyncio
+async def test_mfa_challenge_fails_login_after_a_single_probe():
+    page = FakePlaywrightPage(state=MFA, selector='input[name="code"]')
+    adapter = dropbox(page)
+
+    assert not await adapter.login({'email': 'admin@example.com', 'password': 'secret'})
+    assert len(page.probes) == 1
+
+
+@pytest.mark.asyncio
+async def test_create_user_fills_the_invite_form():
+    page = FakePlaywrightPage()
+    adapter = dropbox(page)
+
+    assert await adapter.create_user({'email': 'new@example.com', 'name': 'New', 'role': 'Member'})
+
+    assert page.filled == {'input[name="email"]': 'new@example.com', 'input[name="full_name"]': 'New'}
+    assert page.selected == {'select[name="role"]': 'Member'}
+
+
+@pytest.mark.asyncio
+async def test_mfa_check_returns_at_once_when_logged_in():
+    page = FakePlaywrightPage()
+    adapter = dropbox(page)
+
+    assert await adapter.handle_mfa(page)
+    assert page.probes[0]['loggedInSelectors'] == ['nav[role="navigation"]']
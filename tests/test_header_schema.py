@@ -0,0 +1,55 @@
+import pytest
+
+from adapters.notion_adapter import NotionAdapter
+from core.data_extractor import DataExtractor
+from core.header_schema import HeaderSchema, header_schema
+
+
+def test_plan_matches_exact_names_and_skips_rows_without_email():
+    plan = HeaderSchema().compile(['Name', ' Email ', 'Role', 'Teams'])
+
+    assert plan.fields == (('name', 0), ('email', 1), ('role', 2))
+    assert plan.apply([
+        [' Ada ', 'ada@example.com', 'Admin', 'Core'],
+        ['No Email', '  ', 'Member', ''],
+        ['Short', 'short@example.com'],
+    ]) == [{'name': 'Ada', 'email': 'ada@example.com', 'role': 'Admin'}]
+
+
+def test_punctuation_spacing_and_typos_resolve_to_fields():
+    plan = HeaderSchema().compile(['Full Name', 'E-mail', 'Email-Address', 'Access level', 'Last seen', 'Staus'])
+
+    assert dict(plan.fields) == {'name': 0, 'email': 2, 'role': 3, 'last_login': 4, 'status': 5}
+    assert HeaderSchema(fuzzy_cutoff=1.0).compile(['Staus', 'Email']).fields == (('email', 1),)
+
+
+def test_synonyms_take_priority_and_mark_user_tables():
+    schema = HeaderSchema({'email': ['Login'], 'role': ['Workspace access']})
+    plan = schema.compile(['Login', 'Workspace access', 'Type'])
+
+    assert plan.fields == (('email', 0), ('role', 1))
+    assert schema.is_user_table(['Login', 'Seats'])
+    assert 'login' in schema.indicators
+    assert not HeaderSchema().is_user_table(['Login', 'Seats'])
+
+
+def test_plans_are_compiled_once_per_header_row():
+    schema = HeaderSchema(max_plans=2)
+    plan = schema.compile(['Name', 'Email'])
+
+    assert schema.compile(('Name', 'Email')) is plan
+    schema.compile(['Email'])
+    schema.compile(['Mail'])
+    assert schema.compile(['Name', 'Email']) is not plan
+
+
+@pytest.mark.asyncio
+async def test_adapter_synonyms_from_config_reach_the_extractor():
+    config = {'notion': {'header_synonyms': {'email': ['Correo']}}}
+    adapter = NotionAdapter(config, None, None, DataExtractor(None))
+    html = '<table><tr><th>Nombre</th><th>Correo</th></tr><tr><td>Ada</td><td>ada@example.com</td></tr></table>'
+
+    assert adapter.header_schema is header_schema({'email': ['Correo']})
+    assert await adapter.data_extractor.extract_users_from_table(html, adapter.header_schema) == [
+        {'email': 'ada@example.com'}
+    ]
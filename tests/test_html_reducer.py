@@ -0,0 +1,73 @@
+from core.html_reducer import chunk_rows, html_to_rows, reduce_html
+
+
+def members_table(count):
+    rows = ''.join(
+        f'<tr><td>User {i}</td><td>user{i}@example.com</td><td><svg><path d="M0"/></svg>Member</td></tr>'
+        for i in range(count)
+    )
+    return (
+        '<html><head><style>td { color: red }</style></head><body>'
+        '<script>window.__STATE__ = {"big": "json"}</script>'
+        f'<table><thead><tr><th>Name</th><th>Email</th><th>Role</th></tr></thead><tbody>{rows}</tbody></table>'
+        '</body></html>'
+    )
+
+
+def test_rows_are_compact_text():
+    header, rows = html_to_rows(members_table(3))
+
+    assert header == 'Name | Email | Role'
+    assert rows == [f'User {i} | user{i}@example.com | Member' for i in range(3)]
+
+
+def test_chunks_respect_row_boundaries_and_repeat_header():
+    header, rows = html_to_rows(members_table(200))
+    chunks = chunk_rows(rows, max_tokens=100, header=header)
+
+    assert len(chunks) > 1
+    body_rows = []
+    for chunk in chunks:
+        lines = chunk.split('\n')
+        assert lines[0] == header
+        body_rows.extend(lines[1:])
+    assert body_rows == rows
+
+
+def test_outline_drops_noise_and_collapses_rows():
+    html = members_table(50).replace(
+        '<table>', '<button id="invite" class="btn" onclick="track()" style="color: red">Invite</button><table>'
+    )
+    reduced = reduce_html(html, max_samples=2)
+
+    assert 'window.__STATE__' not in reduced.outline
+    assert 'svg' not in reduced.outline
+    assert 'onclick' not in reduced.outline and 'style' not in reduced.outline
+    assert '... 48 more <tr>' in reduced.outline
+    assert 'user49@example.com' not in reduced.outline
+    assert reduced.reduction > 0.8
+
+
+def test_outline_node_ids_resolve_to_selectors():
+    reduced = reduce_html(members_table(2))
+    button_html = '<div><span><button id="invite">Invite</button></span><table><tr><td>x</td></tr></table></div>'
+    button = reduce_html(button_html)
+
+    invite_id = next(line.split(']')[0].strip(' [') for line in button.outline.splitlines() if 'Invite' in line)
+    assert button.resolve(invite_id) == '#invite'
+    assert button.resolve(f'[{invite_id}]') == '#invite'
+    assert button.resolve('.not-a-node') == '.not-a-node'
+    assert reduce_html(members_table(2)).outline == reduced.outline
+
+
+def test_selectors_count_hidden_siblings_and_escape_ids():
+    html = (
+        '<body><script>init()</script><div hidden>Loading</div>'
+        '<div><button>Invite</button></div><div id="members:list"><p>Ada</p></div></body>'
+    )
+    reduced = reduce_html(html)
+    node_ids = {line.split('"')[1]: line.split(']')[0].strip(' [') for line in reduced.outline.splitlines() if '"' in line}
+
+    assert 'Loading' not in reduced.outline
+    assert reduced.resolve(node_ids['Invite']) == 'body > div:nth-of-type(2) > button:nth-of-type(1)'
+    assert reduced.resolve(node_ids['Ada']) == '[id="members:list"] > p:nth-of-type(1)'
@@ -0,0 +1,193 @@
+import pytest
+
+from adapters.dropbox_adapter import DropboxAdapter
+from adapters.notion_adapter import NotionAdapter
+
+ADMIN_URL = 'https://notion.test/settings/members'
+
+
+def page_users(number):
+    return [{'name': f'User {number}-{i}', 'email': f'user{number}-{i}@example.com'} for i in range(2)]
+
+
+class FakePage:
+    def __init__(self, manager):
+        self.manager = manager
+
+    @property
+    def url(self):
+        if self.manager.url_pagination and self.manager.current > 1:
+            return f'{ADMIN_URL}?page={self.manager.current}'
+        return ADMIN_URL
+
+
+class FakeBrowserManager:
+    """A paginated member list; the URL encodes the page only with url_pagination"""
+
+    def __init__(self, pages, url_pagination=True):
+        self.pages = pages
+        self.url_pagination = url_pagination
+        self.current = 0
+        self.page = FakePage(self)
+        self.clicks = 0
+
+    async def navigate(self, url):
+        self.current = int(url.split('?page=')[1]) if '?page=' in url else 1
+        return True
+
+    async def wait_for_element(self, selector, timeout=10000):
+        return True
+
+    async def click_and_wait(self, selector):
+        self.clicks += 1
+        self.current += 1
+        return True
+
+
+class FakeDataExtractor:
+    async def extract_users_from_page(self, browser_manager, schema=None):
+        return page_users(browser_manager.current)
+
+    async def extract_pagination_from_page(self, browser_manager):
+        has_next = browser_manager.current < browser_manager.pages
+        return {'has_next': has_next, 'next_selector': '#next' if has_next else None}
+
+
+def make_adapter(pages, url_pagination=True):
+    config = {'notion': {'admin_url': ADMIN_URL}}
+    adapter = NotionAdapter(config, FakeBrowserManager(pages, url_pagination), None, FakeDataExtractor())
+    adapter.api_patterns = []
+    adapter.session_active = True
+    return adapter
+
+
+@pytest.mark.asyncio
+async def test_pages_are_loaded_only_when_the_consumer_asks():
+    adapter = make_adapter(3)
+    pages = adapter.iter_users()
+
+    first = await pages.__anext__()
+    assert first['users'] == page_users(1)
+    assert adapter.browser_manager.clicks == 0
+
+    rest = [page async for page in pages]
+    assert [page['users'] for page in rest] == [page_users(2), page_users(3)]
+    assert rest[-1]['cursor'] is None
+    assert adapter.browser_manager.clicks == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('url_pagination, clicks', [(True, 1), (False, 2)])
+async def test_cursor_resumes_after_its_page(url_pagination, clicks):
+    adapter = make_adapter(4, url_pagination)
+    pages = adapter.iter_users()
+    await pages.__anext__()
+    cursor = (await pages.__anext__())['cursor']
+    await pages.aclose()
+
+    resumed = make_adapter(4, url_pagination)
+    users = [page['users'] async for page in resumed.iter_users(cursor)]
+
+    assert cursor['page'] == 2
+    assert users == [page_users(3), page_users(4)]
+    # Only the clicks needed to get back past page 2, then one per new page
+    assert resumed.browser_manager.clicks == clicks + 1
+
+
+@pytest.mark.asyncio
+async def test_extract_users_is_a_wrapper_that_honours_until():
+    adapter = make_adapter(5)
+
+    users = await adapter.extract_users(until=lambda users: users == page_users(2))
+
+    assert users == page_users(1) + page_users(2)
+    assert adapter.browser_manager.clicks == 1
+
+    adapter.session_active = False
+    assert await adapter.extract_users() == []
+
+
+@pytest.mark.asyncio
+async def test_dropbox_html_fallback_reads_every_page():
+    adapter = DropboxAdapter({}, FakeBrowserManager(3), None, FakeDataExtractor())
+    adapter.api_patterns = []
+    adapter.session_active = True
+
+    assert await adapter.extract_users() == page_users(1) + page_users(2) + page_users(3)
+
+
+class FakeAPIResponse:
+    ok = True
+    status = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        return self.body
+
+
+class FakeRequestContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def fetch(self, url, method, headers, data):
+        return FakeAPIResponse(self.pages[data['cursor']])
+
+
+class FakeAPIPage:
+    def __init__(self, pages):
+        self.request = FakeRequestContext(pages)
+
+
+class FakeAPIBrowserManager:
+    def __init__(self, pages):
+        self.page = FakeAPIPage(pages)
+
+
+def members(start, cursor, has_more):
+    return {
+        'members': [{'profile': {'email': f'user{i}@example.com'}} for i in range(start, start + 2)],
+        'cursor': cursor,
+        'has_more': has_more
+    }
+
+
+@pytest.mark.asyncio
+async def test_api_cursor_resumes_through_the_session():
+    adapter = DropboxAdapter({}, FakeAPIBrowserManager({'c2': members(2, 'c4', True), 'c4': members(4, None, False)}),
+                             None, None)
+    adapter.session_active = True
+    cursor = {
+        'source': 'api',
+        'entry': {'url': 'https://api.dropboxapi.com/2/team/members/list_v2', 'method': 'POST',
+                  'headers': {}, 'post_data': {'limit': 2}},
+        'request': {'url': 'https://api.dropboxapi.com/2/team/members/list/continue_v2', 'post_data': {'cursor': 'c2'}}
+    }
+
+    pages = [page async for page in adapter.iter_users(cursor)]
+
+    assert [[user['email'] for user in page['users']] for page in pages] == [
+        ['user2@example.com', 'user3@example.com'], ['user4@example.com', 'user5@example.com']
+    ]
+    assert pages[0]['cursor']['request']['post_data'] == {'cursor': 'c4'}
+    assert pages[1]['cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_page_cap_leaves_a_resumable_cursor_instead_of_a_last_page():
+    adapter = DropboxAdapter({'max_api_pages': 0},
+                             FakeAPIBrowserManager({'c2': members(2, 'c4', True), 'c4': members(4, None, False)}),
+                             None, None)
+    adapter.session_active = True
+    cursor = {
+        'source': 'api',
+        'entry': {'url': 'https://api.dropboxapi.com/2/team/members/list_v2', 'method': 'POST',
+                  'headers': {}, 'post_data': {'limit': 2}},
+        'request': {'url': 'https://api.dropboxapi.com/2/team/members/list/continue_v2', 'post_data': {'cursor': 'c2'}}
+    }
+
+    pages = [page async for page in adapter.iter_users(cursor)]
+
+    assert len(pages) == 1
+    assert pages[0]['cursor']['request']['post_data'] == {'cursor': 'c4'}
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+
+from core.job_scheduler import Job, JobScheduler
+
+
+@pytest.mark.asyncio
+async def test_per_adapter_concurrency_limit():
+    running = {'notion': 0}
+    peak = {'notion': 0}
+
+    async def runner(job):
+        running[job.adapter] += 1
+        peak[job.adapter] = max(peak[job.adapter], running[job.adapter])
+        await asyncio.sleep(0.01)
+        running[job.adapter] -= 1
+        return job.tenant
+
+    scheduler = JobScheduler(runner, {'concurrency': {'notion': 3}})
+    for i in range(10):
+        scheduler.submit(Job('notion', f"tenant-{i}", 'extract_users'))
+
+    results = await scheduler.run()
+
+    assert len(results) == 10
+    assert all(r['success'] for r in results)
+    assert peak['notion'] == 3
+
+
+@pytest.mark.asyncio
+async def test_same_tenant_jobs_are_serialized_in_priority_order():
+    order = []
+    active = set()
+
+    async def runner(job):
+        assert job.tenant_key not in active
+        active.add(job.tenant_key)
+        await asyncio.sleep(0.01)
+        order.append(job.operation)
+        active.discard(job.tenant_key)
+
+    scheduler = JobScheduler(runner, {'default_concurrency': 4})
+    scheduler.submit(Job('notion', 'acme', 'delete_user', priority=2))
+    scheduler.submit(Job('notion', 'acme', 'extract_users', priority=0))
+    scheduler.submit(Job('notion', 'acme', 'create_user', priority=1))
+
+    await scheduler.run()
+
+    assert order == ['extract_users', 'create_user', 'delete_user']
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_with_backoff():
+    calls = []
+
+    async def runner(job):
+        calls.append(job.operation)
+        if len(calls) < 3:
+            raise RuntimeError("flaky")
+        return 'ok'
+
+    scheduler = JobScheduler(runner, {'max_retries': 3, 'backoff_base': 0.001})
+    scheduler.submit(Job('dropbox', 'acme', 'extract_users'))
+
+    results = await scheduler.run()
+
+    assert results[0]['success']
+    assert results[0]['attempts'] == 3
+    assert results[0]['result'] == 'ok'
+
+
+@pytest.mark.asyncio
+async def test_job_gives_up_after_max_retries():
+    async def runner(job):
+        raise RuntimeError("down")
+
+    scheduler = JobScheduler(runner, {'backoff_base': 0.001})
+    scheduler.submit(Job('dropbox', 'acme', 'extract_users', max_retries=1))
+
+    results = await scheduler.run()
+
+    assert not results[0]['success']
+    assert results[0]['attempts'] == 2
+    assert results[0]['error'] == 'down'
+
+
+@pytest.mark.asyncio
+async def test_saturated_adapter_does_not_block_other_adapters():
+    notion_gate = asyncio.Event()
+    finished = []
+
+    async def runner(job):
+        if job.adapter == 'notion':
+            await notion_gate.wait()
+        finished.append(job.adapter)
+        if job.adapter == 'dropbox' and finished.count('dropbox') == 2:
+            notion_gate.set()
+
+    scheduler = JobScheduler(runner, {'max_workers': 2, 'concurrency': {'notion': 1}})
+    for i in range(4):
+        scheduler.submit(Job('notion', f"tenant-{i}", 'extract_users'))
+    scheduler.submit(Job('dropbox', 'acme', 'extract_users'))
+    scheduler.submit(Job('dropbox', 'beta', 'extract_users'))
+
+    results = await asyncio.wait_for(scheduler.run(), timeout=2)
+
+    assert len(results) == 6
+    assert finished[:2] == ['dropbox', 'dropbox']
+
+
+@pytest.mark.asyncio
+async def test_retry_runs_before_later_jobs_of_the_same_tenant():
+    order = []
+
+    async def runner(job):
+        order.append(job.operation)
+        if job.operation == 'create_user' and job.attempts == 1:
+            raise RuntimeError("flaky")
+
+    scheduler = JobScheduler(runner, {'backoff_base': 0.05})
+    scheduler.submit(Job('notion', 'acme', 'create_user', priority=0))
+    scheduler.submit(Job('notion', 'acme', 'delete_user', priority=1))
+
+    await scheduler.run()
+
+    assert order == ['create_user', 'create_user', 'delete_user']
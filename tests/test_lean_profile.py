@@ -0,0 +1,97 @@
+import pytest
+
+from core.lean_profile import LeanProfile, DEFAULT_ESTIMATED_BYTES
+
+
+def make_profile(**overrides):
+    config = {
+        'enabled': True,
+        'viewport': {'width': 1280, 'height': 720},
+        'block_third_party': True,
+        'first_party': {'notion': ['notion.so', 'notion-static.com']},
+        'allow': {'common': ['gstatic.com']},
+    }
+    config.update(overrides)
+    return LeanProfile(config)
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+    async def abort(self, error_code):
+        self.outcome = error_code
+
+
+class FakeContext:
+    def __init__(self):
+        self.init_scripts = []
+        self.handler = None
+
+    async def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+def test_block_decisions():
+    profile = make_profile()
+
+    assert profile.block_reason('https://www.notion.so/api/v3/getSpaces', 'fetch', 'notion') is None
+    assert profile.block_reason('https://www.notion.so/images/logo.png', 'image', 'notion') == 'image'
+    assert profile.block_reason('https://www.google-analytics.com/collect', 'xhr', 'notion') == 'tracker'
+    assert profile.block_reason('https://cdn.example.net/widget.js', 'script', 'notion') == 'third_party'
+    # Allow-listed login dependencies load whatever their type
+    assert profile.block_reason('https://www.gstatic.com/recaptcha/logo.png', 'image', 'notion') is None
+    # Without first-party domains for an adapter, third-party blocking is skipped
+    assert profile.block_reason('https://cdn.example.net/widget.js', 'script', 'dropbox') is None
+
+
+def test_disabled_profile_changes_nothing():
+    profile = LeanProfile({})
+    assert profile.context_options() == {}
+    assert make_profile().context_options()['viewport'] == {'width': 1280, 'height': 720}
+
+
+@pytest.mark.asyncio
+async def test_applied_route_blocks_and_counts_savings():
+    profile = make_profile()
+    context = FakeContext()
+    await profile.apply(context, 'notion')
+
+    routes = [
+        FakeRoute('https://www.notion.so/settings/members', 'document'),
+        FakeRoute('https://www.notion.so/avatar.png', 'image'),
+        FakeRoute('https://www.notion.so/font.woff2', 'font'),
+    ]
+    for route in routes:
+        await context.handler(route)
+
+    assert [route.outcome for route in routes] == ['continued', 'blockedbyclient', 'blockedbyclient']
+    assert len(context.init_scripts) == 1
+    assert profile.stats['allowed'] == 1 and profile.stats['blocked'] == 2
+    assert profile.stats['blocked_by_type'] == {'image': 1, 'font': 1}
+    assert profile.stats['estimated_bytes_saved'] == DEFAULT_ESTIMATED_BYTES['image'] + DEFAULT_ESTIMATED_BYTES['font']
+    assert 'blocked 2/3 requests' in profile.summary()
+
+
+@pytest.mark.asyncio
+async def test_no_route_without_blocking_rules():
+    profile = make_profile(block_resource_types=[], block_domains=[], block_third_party=False)
+    context = FakeContext()
+    await profile.apply(context, 'notion')
+
+    assert context.handler is None
+    assert len(context.init_scripts) == 1
+    assert make_profile().blocks_requests('dropbox')
@@ -0,0 +1,103 @@
+import json
+import pytest
+from types import SimpleNamespace
+
+from core.ai_agent import AIAgent
+from core.html_reducer import reduce_html
+from core.llm_cache import LLMCache
+
+
+class FakeCompletions:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=json.dumps(self.content))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def make_agent(cache, content):
+    agent = AIAgent(api_key='test', model='gpt-4', cache=cache)
+    completions = FakeCompletions(content)
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return agent, completions
+
+
+def test_keys_ignore_whitespace_and_volatile_attributes():
+    a = LLMCache.make_key('gpt-4', 'extract_user_data', 1, '<table nonce="abc">\n  <tr></tr></table>')
+    b = LLMCache.make_key('gpt-4', 'extract_user_data', 1, '<table nonce="xyz"> <tr></tr></table><!-- ts -->')
+
+    assert a == b
+    assert a != LLMCache.make_key('gpt-4', 'extract_user_data', 2, '<table><tr></tr></table>')
+    assert a != LLMCache.make_key('gpt-4o', 'extract_user_data', 1, '<table><tr></tr></table>')
+
+
+@pytest.mark.asyncio
+async def test_repeated_extraction_hits_cache():
+    users = [{'name': 'Ada', 'email': 'ada@example.com'}]
+    agent, completions = make_agent(LLMCache(), users)
+
+    assert await agent.extract_user_data('<table>ada</table>') == users
+    assert await agent.extract_user_data('<table>ada</table>') == users
+
+    assert completions.calls == 1
+    assert agent.cache.stats['hits'] == 1
+    assert agent.cache.stats['misses'] == 1
+
+
+def test_disk_cache_survives_new_instance(tmp_path):
+    path = str(tmp_path / 'llm.sqlite')
+    LLMCache({'path': path}).set('k', {'selectors': {}})
+
+    cache = LLMCache({'path': path})
+
+    assert cache.get('k') == {'selectors': {}}
+    assert cache.stats['disk_hits'] == 1
+
+
+def test_ttl_and_size_eviction():
+    cache = LLMCache({'ttl_seconds': 0})
+    cache.set('k', 1)
+    assert cache.get('k') is None
+
+    cache = LLMCache({'max_entries': 2, 'memory_entries': 1})
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+
+    assert cache.get('a') is None
+    assert cache.get('c') == 'c'
+    assert cache.stats['evictions'] == 1
+
+
+@pytest.mark.asyncio
+async def test_resolved_selectors_do_not_leak_into_the_cache():
+    html = '<body><button id="invite">Invite</button><p>Members</p></body>'
+    node_id = next(line.split(']')[0].strip(' [') for line in reduce_html(html).outline.splitlines()
+                   if 'Invite' in line)
+    agent, completions = make_agent(LLMCache(), {'selectors': {'invite': node_id}, 'confidence': 0.9})
+
+    first = await agent.analyze_page_structure(html, 'invite')
+    first['selectors']['invite'] = 'mutated'
+    second = await agent.analyze_page_structure(html, 'invite')
+
+    assert second['selectors'] == {'invite': '#invite'}
+    assert completions.calls == 1
+    cached = next(iter(agent.cache._memory.values()))[0]
+    assert cached['selectors'] == {'invite': node_id}
+
+
+@pytest.mark.asyncio
+async def test_batched_answers_do_not_share_the_cached_list():
+    agent, completions = make_agent(LLMCache(), [{'name': 'Ada', 'email': 'ada@example.com'}])
+
+    first = await agent.extract_user_data_batch(['<table>ada</table>'])
+    first[0][0]['role'] = 'Admin'
+    first[0].append({'email': 'extra@example.com'})
+    second = await agent.extract_user_data_batch(['<table>ada</table>'])
+    second[0].clear()
+    third = await agent.extract_user_data_batch(['<table>ada</table>'])
+
+    assert third == [[{'name': 'Ada', 'email': 'ada@example.com'}]]
+    assert completions.calls == 1
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+
+from core.page_state import PageStateClassifier, CAPTCHA, MFA, UNKNOWN
+from utils.captcha_solver import CaptchaSolver
+
+
+class FakeHandle:
+    def __init__(self, value):
+        self.value = value
+
+    async def json_value(self):
+        return self.value
+
+
+class FakePage:
+    def __init__(self, result=None, delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = []
+
+    async def wait_for_function(self, script, arg, timeout):
+        self.calls.append((arg, timeout))
+        await asyncio.sleep(self.delay)
+        if self.result is None:
+            raise TimeoutError(f"Timeout {timeout}ms exceeded")
+        return FakeHandle(self.result)
+
+
+class FakeBrowserManager:
+    def __init__(self, page):
+        self.page = page
+
+
+@pytest.mark.asyncio
+async def test_all_indicators_are_probed_in_one_call():
+    page = FakePage({'state': MFA, 'selector': '.mfa-input'})
+    classifier = PageStateClassifier(FakeBrowserManager(page))
+
+    state, selector = await classifier.classify(logged_in_selectors=['nav'], login_url_marker='login')
+
+    assert (state, selector) == (MFA, '.mfa-input')
+    assert len(page.calls) == 1
+    arg, timeout = page.calls[0]
+    assert [state for state, _ in arg['indicators']] == ['captcha', 'mfa', 'error']
+    assert arg['loggedInSelectors'] == ['nav']
+    assert arg['loginUrlMarker'] == 'login'
+    assert timeout == 3000
+
+
+@pytest.mark.asyncio
+async def test_clean_page_costs_a_single_timeout():
+    page = FakePage()
+    classifier = PageStateClassifier(FakeBrowserManager(page), timeout=200)
+
+    assert await classifier.classify() == (UNKNOWN, None)
+    assert [timeout for _, timeout in page.calls] == [200]
+
+
+@pytest.mark.asyncio
+async def test_captcha_solver_maps_matched_selector_to_type():
+    page = FakePage({'state': CAPTCHA, 'selector': '.g-recaptcha'})
+    solver = CaptchaSolver(FakeBrowserManager(page))
+
+    assert await solver.detect_captcha() == 'recaptcha'
+    arg, _ = page.calls[0]
+    assert [state for state, _ in arg['indicators']] == ['captcha']
+
+    page.result = None
+    assert await solver.detect_captcha() is None
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from adapters.notion_adapter import NotionAdapter
+from core.data_extractor import DataExtractor
+
+ADMIN_URL = 'https://notion.test/settings/members'
+
+
+def page_users(number):
+    return [{'name': f'User {number}-{i}', 'email': f'user{number}-{i}@example.com'} for i in range(2)]
+
+
+class Site:
+    """A paginated member list showing at most link_limit numbered links (None: all)"""
+
+    def __init__(self, pages, link_limit=None, numbered=True):
+        self.pages = pages
+        self.link_limit = link_limit
+        self.numbered = numbered
+        self.loading = 0
+        self.peak = 0
+        self.managers = []
+
+    def pagination_html(self, current):
+        links = []
+        if self.numbered:
+            last = self.pages if self.link_limit is None else min(self.pages, max(current, self.link_limit))
+            for number in range(1, last + 1):
+                css = ' class="current"' if number == current else ''
+                links.append(f'<a{css} href="/settings/members?page={number}">{number}</a>')
+        if current < self.pages:
+            links.append(f'<a class="next" href="?page={current + 1}">Next</a>')
+        return f'<div class="pagination">{"".join(links)}</div>'
+
+
+class FakePage:
+    def __init__(self, manager):
+        self.manager = manager
+
+    @property
+    def url(self):
+        return f'{ADMIN_URL}?page={self.manager.current}' if self.manager.current > 1 else ADMIN_URL
+
+
+class FakeBrowserManager:
+    def __init__(self, site):
+        self.site = site
+        self.current = 0
+        self.page = FakePage(self)
+        self.clicks = 0
+        self.closed = False
+        site.managers.append(self)
+
+    async def navigate(self, url):
+        self.site.loading += 1
+        self.site.peak = max(self.site.peak, self.site.loading)
+        await asyncio.sleep(0.01)
+        self.site.loading -= 1
+        self.current = int(url.split('?page=')[1]) if '?page=' in url else 1
+        return True
+
+    async def wait_for_element(self, selector, timeout=10000):
+        return True
+
+    async def click_and_wait(self, selector):
+        self.clicks += 1
+        self.current += 1
+        return True
+
+    async def open_sibling(self):
+        return FakeBrowserManager(self.site)
+
+    async def close_page(self):
+        self.closed = True
+
+
+class PageDataExtractor(DataExtractor):
+    """Real pagination analysis over the fake site's markup"""
+
+    async def extract_users_from_page(self, browser_manager, schema=None):
+        return page_users(browser_manager.current)
+
+    async def extract_pagination_from_page(self, browser_manager):
+        return self.extract_pagination_info(browser_manager.site.pagination_html(browser_manager.current))
+
+
+def make_adapter(site, concurrency=3):
+    config = {'notion': {'admin_url': ADMIN_URL}, 'pagination_concurrency': concurrency}
+    adapter = NotionAdapter(config, FakeBrowserManager(site), None, PageDataExtractor(None))
+    adapter.api_patterns = []
+    adapter.session_active = True
+    return adapter
+
+
+def all_users(pages):
+    return [user for number in range(1, pages + 1) for user in page_users(number)]
+
+
+@pytest.mark.asyncio
+async def test_numbered_pages_are_fetched_concurrently_and_merged_in_order():
+    site = Site(7)
+    adapter = make_adapter(site)
+
+    pages = [page async for page in adapter.iter_users()]
+
+    assert [user for page in pages for user in page['users']] == all_users(7)
+    assert [page['cursor']['page'] for page in pages[:-1]] == list(range(1, 7))
+    assert pages[-1]['cursor'] is None
+    assert 1 < site.peak <= 3
+    main, siblings = site.managers[0], site.managers[1:]
+    assert main.clicks == 0
+    assert len(siblings) == 3 and all(sibling.closed for sibling in siblings)
+
+
+@pytest.mark.asyncio
+async def test_truncated_page_links_continue_with_clicks():
+    site = Site(6, link_limit=3)
+    adapter = make_adapter(site)
+
+    users = await adapter.extract_users()
+
+    assert users == all_users(6)
+    # Pages 2-3 from their links, then the main page clicks on from page 3
+    assert adapter.browser_manager.clicks >= 1
+
+
+@pytest.mark.asyncio
+async def test_cursor_only_pagination_uses_the_click_loop():
+    site = Site(4, numbered=False)
+    adapter = make_adapter(site)
+
+    assert await adapter.extract_users() == all_users(4)
+    assert adapter.browser_manager.clicks == 3
+    assert len(site.managers) == 1
+
+
+@pytest.mark.asyncio
+async def test_early_stop_cancels_prefetched_pages():
+    site = Site(10)
+    adapter = make_adapter(site, concurrency=2)
+
+    users = await adapter.extract_users(until=lambda page: page == page_users(3))
+
+    assert users == all_users(3)
+    assert all(sibling.closed for sibling in site.managers[1:])
+    # Never more than the lookahead window beyond the last page taken
+    assert max(manager.current for manager in site.managers) <= 5
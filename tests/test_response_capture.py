@@ -0,0 +1,131 @@
+import pytest
+
+from core.response_capture import ResponseCapture
+from adapters.dropbox_adapter import DropboxAdapter
+from adapters.notion_adapter import NotionAdapter
+
+API = 'https://api.dropboxapi.com/2/team/members'
+
+
+def member(i):
+    return {'profile': {'email': f'user{i}@example.com', 'name': {'display_name': f'User {i}'},
+                        'status': {'.tag': 'active'}},
+            'roles': [{'name': 'Member'}]}
+
+
+def members_page(start, has_more):
+    return {'members': [member(i) for i in range(start, start + 2)], 'cursor': f'c{start}', 'has_more': has_more}
+
+
+class FakeRequest:
+    method = 'POST'
+    headers = {'authorization': 'Bearer t', 'content-length': '2'}
+    post_data_json = {'limit': 2}
+    post_data = '{"limit": 2}'
+
+
+class FakeResponse:
+    def __init__(self, url, body, content_type='application/json'):
+        self.url = url
+        self.body = body
+        self.ok = True
+        self.status = 200
+        self.headers = {'content-type': content_type}
+        self.request = FakeRequest()
+
+    async def json(self):
+        return self.body
+
+
+class FakeRequestContext:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetches = []
+
+    async def fetch(self, url, method, headers, data):
+        self.fetches.append((url, method, headers, data))
+        return FakeResponse(url, self.pages[data['cursor']])
+
+
+class FakePage:
+    def __init__(self, pages=None):
+        self.listeners = []
+        self.request = FakeRequestContext(pages or {})
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    def emit(self, response):
+        for handler in self.listeners:
+            handler(response)
+
+
+@pytest.mark.asyncio
+async def test_only_matching_json_responses_are_recorded():
+    page = FakePage()
+    capture = ResponseCapture(page, [r'/2/team/members/list(_v2|/continue_v2)?$']).start()
+
+    page.emit(FakeResponse(f'{API}/list_v2', members_page(0, False)))
+    page.emit(FakeResponse('https://www.dropbox.com/static/app.js', {}, 'text/javascript'))
+    page.emit(FakeResponse(f'{API}/list_v2', '<html>', 'text/html'))
+    await capture.drain()
+    capture.stop()
+
+    assert [entry['url'] for entry in capture.entries] == [f'{API}/list_v2']
+    assert capture.entries[0]['headers'] == {'authorization': 'Bearer t'}
+    assert page.listeners == []
+
+
+class FakeBrowserManager:
+    """Loading the admin page fires the console's first members/list_v2 call"""
+
+    def __init__(self, page):
+        self.page = page
+
+    def capture_responses(self, patterns):
+        return ResponseCapture(self.page, patterns).start()
+
+    async def navigate(self, url):
+        self.page.emit(FakeResponse(f'{API}/list_v2', members_page(0, True)))
+        return True
+
+
+@pytest.mark.asyncio
+async def test_dropbox_walks_api_cursor_through_the_session():
+    page = FakePage({'c0': members_page(2, True), 'c2': members_page(4, False)})
+    adapter = DropboxAdapter({}, FakeBrowserManager(page), None, None)
+    adapter.session_active = True
+
+    pages = [listing async for listing in adapter.iter_users()]
+    users = [user for listing in pages for user in listing['users']]
+
+    assert [user['email'] for user in users] == [f'user{i}@example.com' for i in range(6)]
+    assert users[0] == {'name': 'User 0', 'email': 'user0@example.com', 'role': 'Member', 'status': 'active'}
+    assert pages[-1]['cursor'] is None
+    # Live replays keep the captured auth header; cursors that get checkpointed do not
+    assert all(headers == {'authorization': 'Bearer t'} for _, _, headers, _ in page.request.fetches)
+    assert pages[0]['cursor']['entry']['headers'] == {}
+    assert [(url, data) for url, _, _, data in page.request.fetches] == [
+        (f'{API}/list/continue_v2', {'cursor': 'c0'}),
+        (f'{API}/list/continue_v2', {'cursor': 'c2'}),
+    ]
+
+
+def test_notion_payload_mapping():
+    payload = {
+        'users': [{'userId': 'u1', 'role': 'editor'}, {'userId': 'u2', 'role': 'owner'}],
+        'recordMap': {'notion_user': {
+            'u1': {'value': {'email': 'ada@example.com', 'given_name': 'Ada', 'family_name': 'Lovelace'}},
+            'u2': {'value': {'value': {'email': 'alan@example.com', 'name': 'Alan Turing'}}},
+        }}
+    }
+
+    users = NotionAdapter({}, None, None, None).users_from_payload(payload)
+
+    assert users == [
+        {'name': 'Ada Lovelace', 'email': 'ada@example.com', 'role': 'editor'},
+        {'name': 'Alan Turing', 'email': 'alan@example.com', 'role': 'owner'},
+    ]
@@ -0,0 +1,141 @@
+import pytest
+
+from adapters.base_adapter import BaseSaaSAdapter
+from core.selector_store import SelectorStore
+
+
+class FakePage:
+    def __init__(self, visible):
+        self.visible = visible
+
+    async def is_visible(self, selector):
+        return selector in self.visible
+
+
+class FakeBrowserManager:
+    """Elements in ``visible`` appear at once; waits for anything else time out"""
+
+    def __init__(self, visible):
+        self.page = FakePage(visible)
+        self.waits = []
+
+    async def wait_for_element(self, selector, timeout=10000):
+        self.waits.append(selector)
+        return any(part in self.page.visible for part in selector.split(', '))
+
+    async def get_page_content(self):
+        return '<html><body><button class="invite">Invite people</button></body></html>'
+
+
+class FakeAIAgent:
+    def __init__(self, steps):
+        self.steps = steps
+        self.calls = 0
+
+    async def analyze_page_structure(self, html_content, task):
+        return {'confidence': 0}
+
+    async def generate_automation_steps(self, task, page_analysis, html_content=None):
+        self.calls += 1
+        return self.steps
+
+
+class Adapter(BaseSaaSAdapter):
+    name = 'fake'
+
+    async def login(self, credentials):
+        return True
+
+    async def extract_users(self, until=None):
+        return []
+
+    async def create_user(self, user_data):
+        return True
+
+    async def delete_user(self, user_identifier):
+        return True
+
+    async def update_user(self, user_identifier, updates):
+        return True
+
+
+CANDIDATES = ['#stale', '#invite', '#other']
+
+
+def make_adapter(store, visible, ai_agent=None):
+    adapter = Adapter({}, FakeBrowserManager(visible), ai_agent, None)
+    adapter.selector_store = store
+    return adapter
+
+
+def test_rank_prefers_recent_success_then_latency(tmp_path):
+    path = str(tmp_path / 'selectors.sqlite')
+    store = SelectorStore({'path': path})
+    store.record_selector('notion', 'invite', '#a', True, latency_ms=900)
+    store.record_selector('notion', 'invite', '#b', True, latency_ms=50)
+    store.record_selector('notion', 'invite', '#c', False)
+    store.record_selector('notion', 'invite', '#learned', True, latency_ms=10, source='ai')
+    store.close()
+
+    # Persisted across runs
+    store = SelectorStore({'path': path})
+    ranked = store.rank_selectors('notion', 'invite', ['#c', '#new', '#a', '#b'])
+
+    assert ranked == ['#learned', '#b', '#a', '#new', '#c']
+    assert store.rank_selectors('dropbox', 'invite', ['#c', '#a']) == ['#c', '#a']
+
+
+@pytest.mark.asyncio
+async def test_winning_selector_is_tried_first_on_the_next_run():
+    store = SelectorStore()
+
+    first = make_adapter(store, {'#invite'})
+    assert await first.find_selector('invite', CANDIDATES) == '#invite'
+    # No stats yet: one combined wait
+    assert first.browser_manager.waits == ['#stale, #invite, #other']
+
+    second = make_adapter(store, {'#invite'})
+    assert await second.find_selector('invite', CANDIDATES) == '#invite'
+    assert second.browser_manager.waits == ['#invite']
+
+    stats = store.selector_stats('fake', 'invite')
+    assert stats['#invite']['successes'] == 2
+    assert stats['#stale']['failures'] == 1
+    assert '#other' not in stats
+
+
+@pytest.mark.asyncio
+async def test_stale_winner_falls_back_to_the_other_candidates():
+    store = SelectorStore()
+    store.record_selector('fake', 'invite', '#stale', True, latency_ms=20)
+
+    adapter = make_adapter(store, {'#other'})
+    assert await adapter.find_selector('invite', CANDIDATES) == '#other'
+    assert adapter.browser_manager.waits == ['#stale', '#invite, #other']
+    assert store.rank_selectors('fake', 'invite', CANDIDATES)[0] == '#other'
+
+
+@pytest.mark.asyncio
+async def test_ai_selectors_are_learned_and_reused():
+    store = SelectorStore()
+    ai_agent = FakeAIAgent([
+        {'action': 'click', 'selector': '#missing'},
+        {'action': 'click', 'selector': 'button.invite'}
+    ])
+
+    adapter = make_adapter(store, {'button.invite'}, ai_agent)
+    assert await adapter.find_selector('invite', CANDIDATES, task='Open the invite dialog') == 'button.invite'
+    assert ai_agent.calls == 1
+
+    adapter = make_adapter(store, {'button.invite'}, ai_agent)
+    assert await adapter.find_selector('invite', CANDIDATES, task='Open the invite dialog') == 'button.invite'
+    assert adapter.browser_manager.waits == ['button.invite']
+    assert ai_agent.calls == 1
+    assert store.selector_stats('fake', 'invite')['button.invite']['source'] == 'ai'
+
+
+@pytest.mark.asyncio
+async def test_without_store_or_task_a_miss_returns_none():
+    adapter = make_adapter(None, set())
+    assert await adapter.find_selector('logout', Adapter.logout_selectors) is None
+    assert adapter.browser_manager.waits == [', '.join(Adapter.logout_selectors)]
@@ -0,0 +1,108 @@
+import time
+import pytest
+
+from adapters.notion_adapter import NotionAdapter
+from utils.session_store import SessionStore
+
+STATE = {
+    'cookies': [{'name': 'token_v2', 'value': 'secret-cookie', 'domain': '.notion.so', 'path': '/'}],
+    'origins': [{'origin': 'https://www.notion.so', 'localStorage': [{'name': 'ajs', 'value': '1'}]}]
+}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv('SESSION_CACHE_KEY', SessionStore.generate_key())
+    return SessionStore({'directory': str(tmp_path)})
+
+
+def test_round_trip_is_encrypted_at_rest(store, tmp_path):
+    store.save('notion', 'admin@acme.com', STATE, time.time() + 60)
+
+    assert store.load('notion', 'admin@acme.com') == STATE
+    assert store.load('notion', 'other@acme.com') is None
+    for path in tmp_path.iterdir():
+        assert b'secret-cookie' not in path.read_bytes()
+
+
+def test_expired_session_is_dropped(store, tmp_path):
+    store.save('notion', 'admin@acme.com', STATE, time.time() - 1)
+
+    assert store.load('notion', 'admin@acme.com') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_wrong_key_is_treated_as_cache_miss(store, tmp_path, monkeypatch):
+    store.save('dropbox', 'admin@acme.com', STATE, time.time() + 60)
+
+    monkeypatch.setenv('SESSION_CACHE_KEY', SessionStore.generate_key())
+    other = SessionStore({'directory': str(tmp_path)})
+
+    assert other.load('dropbox', 'admin@acme.com') is None
+
+
+def test_store_is_disabled_without_key(tmp_path, monkeypatch):
+    monkeypatch.delenv('SESSION_CACHE_KEY', raising=False)
+    store = SessionStore({'directory': str(tmp_path)})
+
+    store.save('notion', 'admin@acme.com', STATE, time.time() + 60)
+
+    assert not store.enabled
+    assert store.load('notion', 'admin@acme.com') is None
+
+
+class ProbeResponse:
+    def __init__(self, status, location=''):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = {'location': location}
+
+
+class ProbeRequest:
+    def __init__(self, response):
+        self.response = response
+        self.urls = []
+
+    async def get(self, url, max_redirects=None):
+        self.urls.append(url)
+        return self.response
+
+
+class ProbePage:
+    def __init__(self, response):
+        self.request = ProbeRequest(response)
+
+
+class ProbeBrowserManager:
+    def __init__(self, response):
+        self.page = ProbePage(response)
+
+
+def probed_adapter(response):
+    adapter = NotionAdapter({}, ProbeBrowserManager(response), None, None)
+    adapter.logins = 0
+
+    async def login(credentials):
+        adapter.logins += 1
+        return False
+
+    adapter.login = login
+    return adapter
+
+
+@pytest.mark.asyncio
+async def test_live_session_is_reused_without_a_session_store():
+    adapter = probed_adapter(ProbeResponse(200))
+
+    assert await adapter.ensure_session({'email': 'admin@acme.com'})
+    assert adapter.session_active
+    assert adapter.logins == 0
+    assert adapter.browser_manager.page.request.urls == [adapter.admin_url]
+
+
+@pytest.mark.asyncio
+async def test_signed_out_context_logs_in():
+    adapter = probed_adapter(ProbeResponse(302, '/login?next=settings'))
+
+    assert not await adapter.ensure_session({'email': 'admin@acme.com'})
+    assert adapter.logins == 1
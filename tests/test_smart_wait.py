@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+
+from core.smart_wait import PageTimings, SmartWaiter
+
+
+class FakePage:
+    def __init__(self, url='https://www.notion.so/login', network_idle_delay=None):
+        self.url = url
+        self.network_idle_delay = network_idle_delay
+        self.timeouts = []
+        self.dom_timeouts = []
+        self.mutating = False
+
+    async def wait_for_load_state(self, state, timeout):
+        self.timeouts.append(timeout)
+        if self.network_idle_delay is None:
+            raise TimeoutError("never idle")
+        await asyncio.sleep(self.network_idle_delay)
+
+    async def evaluate(self, script, arg):
+        self.dom_timeouts.append(arg['timeoutMs'])
+        return not self.mutating
+
+    async def wait_for_url(self, predicate, timeout):
+        self.url = 'https://www.notion.so/workspace'
+        assert predicate(self.url)
+
+
+def test_timeout_adapts_to_observed_timings():
+    timings = PageTimings({'default_timeout': 10000, 'min_timeout': 500, 'safety_factor': 3})
+
+    assert timings.timeout('notion.so', 'dom_quiet') == 10000
+    for _ in range(20):
+        timings.record('notion.so', 'dom_quiet', 400)
+    assert 500 <= timings.timeout('notion.so', 'dom_quiet') <= 1500
+
+    for _ in range(20):
+        timings.record('dropbox.com', 'dom_quiet', 5000)
+    assert timings.timeout('dropbox.com', 'dom_quiet') > timings.timeout('notion.so', 'dom_quiet')
+
+
+@pytest.mark.asyncio
+async def test_network_idle_is_skipped_on_sites_that_never_idle():
+    page = FakePage()
+    waiter = SmartWaiter(page, PageTimings({'unreliable_after': 1}), {'network_idle_timeout': 50})
+
+    assert await waiter.for_page_ready()
+    assert not await waiter.for_network_idle()
+    assert page.timeouts == [50]
+
+
+@pytest.mark.asyncio
+async def test_successful_waits_are_recorded_per_site():
+    page = FakePage(network_idle_delay=0.01)
+    timings = PageTimings()
+    waiter = SmartWaiter(page, timings)
+
+    assert await waiter.for_network_idle()
+    assert await waiter.for_url_change('https://www.notion.so/login')
+    assert ('www.notion.so', 'network_idle') in timings._stats
+    assert timings.timeout('www.notion.so', 'network_idle') < timings.default_timeout
+
+
+@pytest.mark.asyncio
+async def test_unreliable_mark_needs_repeated_timeouts_and_expires(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('core.smart_wait.time.monotonic', lambda: clock[0])
+    page = FakePage()
+    timings = PageTimings({'unreliable_after': 2, 'unreliable_ttl': 60})
+    waiter = SmartWaiter(page, timings, {'network_idle_timeout': 50})
+
+    await waiter.for_network_idle()
+    assert not timings.is_unreliable('www.notion.so', 'network_idle')
+    await waiter.for_network_idle()
+    assert timings.is_unreliable('www.notion.so', 'network_idle')
+    await waiter.for_network_idle()
+    assert page.timeouts == [50, 50]
+
+    clock[0] += 61
+    assert not timings.is_unreliable('www.notion.so', 'network_idle')
+    await waiter.for_network_idle()
+    assert page.timeouts == [50, 50, 50]
+
+
+@pytest.mark.asyncio
+async def test_dom_quiet_waits_are_capped_on_pages_that_keep_mutating():
+    page = FakePage()
+    page.mutating = True
+    timings = PageTimings({'default_timeout': 10000, 'min_timeout': 500, 'unreliable_after': 2})
+    waiter = SmartWaiter(page, timings)
+
+    for _ in range(3):
+        assert not await waiter.for_dom_quiet()
+
+    assert page.dom_timeouts == [10000, 10000, 500]
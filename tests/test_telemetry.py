@@ -0,0 +1,73 @@
+import asyncio
+import json
+import pytest
+
+from core.telemetry import JsonLinesExporter, Telemetry, telemetry, traced
+from core.data_extractor import DataExtractor
+
+
+def test_spans_feed_histograms_and_exporters(tmp_path):
+    tracer = Telemetry()
+    path = tmp_path / 'spans.jsonl'
+    tracer.exporters.append(JsonLinesExporter(str(path)))
+
+    with tracer.context(adapter='notion', tenant='acme'):
+        with tracer.span('browser.click', selector='#invite') as span:
+            span['status'] = 'failed'
+        tracer.increment('browser_click_retries_total')
+    tracer.close()
+
+    event = json.loads(path.read_text())
+    assert event['span'] == 'browser.click'
+    assert (event['adapter'], event['tenant'], event['selector'], event['status']) == ('notion', 'acme', '#invite', 'failed')
+
+    metrics = tracer.render_prometheus()
+    assert 'browser_click_retries_total{adapter="notion"} 1' in metrics
+    assert 'browser_click_seconds_count{adapter="notion",status="failed"} 1' in metrics
+    assert 'browser_click_seconds_bucket{adapter="notion",status="failed",le="+Inf"} 1' in metrics
+    # Tenants and selectors stay out of metric labels
+    assert 'acme' not in metrics and '#invite' not in metrics
+
+
+@pytest.mark.asyncio
+async def test_context_labels_follow_asyncio_tasks():
+    tracer = Telemetry()
+
+    async def work():
+        tracer.increment('job_retries_total')
+
+    with tracer.context(adapter='dropbox'):
+        await asyncio.gather(asyncio.ensure_future(work()), asyncio.ensure_future(work()))
+
+    assert tracer.counter_value('job_retries_total', adapter='dropbox') == 2
+
+
+class Clicker:
+    @traced('test.click', 'selector')
+    async def click(self, selector):
+        return selector != 'missing'
+
+
+@pytest.mark.asyncio
+async def test_traced_marks_false_results_as_failed():
+    telemetry.reset()
+    await Clicker().click('ok')
+    await Clicker().click(selector='missing')
+
+    assert telemetry.histogram_count('test_click_seconds', status='ok') == 1
+    assert telemetry.histogram_count('test_click_seconds', status='failed') == 1
+
+
+class EmptyAIAgent:
+    async def iter_user_data(self, html_content):
+        return
+        yield
+
+
+@pytest.mark.asyncio
+async def test_ai_fallback_and_parse_are_recorded():
+    telemetry.reset()
+    await DataExtractor(EmptyAIAgent()).extract_users_from_table('<div>no table here</div>')
+
+    assert telemetry.counter_value('extract_ai_fallbacks_total') == 1
+    assert telemetry.histogram_count('extract_parse_seconds') == 1
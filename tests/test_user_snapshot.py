@@ -0,0 +1,74 @@
+import pytest
+
+from core.user_snapshot import UserSnapshotStore, diff_users
+from adapters.notion_adapter import NotionAdapter
+
+
+def user(i, role='Member'):
+    return {'name': f'User {i}', 'email': f'user{i}@example.com', 'role': role}
+
+
+def test_diff_reports_added_removed_and_changed():
+    previous = {u['email']: u for u in [user(1), user(2), user(3)]}
+    current = [user(1), user(2, role='Admin'), user(4)]
+
+    diff = diff_users(previous, current)
+
+    assert diff['added'] == [user(4)]
+    assert diff['removed'] == [user(3)]
+    assert diff['changed'] == [{
+        'email': 'user2@example.com', 'fields': ['role'], 'before': user(2), 'after': user(2, role='Admin')
+    }]
+    assert diff_users(previous, current, complete=False)['removed'] == []
+
+
+def test_store_applies_diffs_per_tenant():
+    store = UserSnapshotStore()
+    store.apply('notion', 'acme', diff_users({}, [user(1), user(2)]))
+    store.apply('notion', 'other', diff_users({}, [user(9)]))
+
+    previous = store.load('notion', 'acme')
+    store.apply('notion', 'acme', diff_users(previous, [user(2, role='Admin')]))
+
+    assert store.load('notion', 'acme') == {'user2@example.com': user(2, role='Admin')}
+    assert list(store.load('notion', 'other')) == ['user9@example.com']
+
+
+class PagedNotionAdapter(NotionAdapter):
+    """Serves a fixed list of pages instead of driving a browser"""
+
+    def __init__(self, pages):
+        super().__init__({}, None, None, None)
+        self.pages = pages
+        self.visited = 0
+
+    async def extract_users(self, until=None):
+        users = []
+        for page in self.pages:
+            self.visited += 1
+            users.extend(page)
+            if until and until(page):
+                break
+        return users
+
+
+@pytest.mark.asyncio
+async def test_early_stop_ends_at_first_unchanged_page():
+    pages = [[user(i) for i in range(p * 3, p * 3 + 3)] for p in range(5)]
+    store = UserSnapshotStore()
+
+    adapter = PagedNotionAdapter(pages)
+    adapter.snapshot_store = store
+    first = await adapter.sync_users(early_stop=True)
+    assert len(first['added']) == 15 and first['complete']
+
+    # Most recently active user changed; everything from page 2 on is as before
+    pages[0][0] = user(0, role='Admin')
+    adapter = PagedNotionAdapter(pages)
+    adapter.snapshot_store = store
+    delta = await adapter.sync_users(early_stop=True)
+
+    assert adapter.visited == 2
+    assert [change['email'] for change in delta['changed']] == ['user0@example.com']
+    assert delta['added'] == [] and delta['removed'] == [] and not delta['complete']
+    assert store.load('notion', 'default')['user0@example.com']['role'] == 'Admin'
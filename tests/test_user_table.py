@@ -0,0 +1,178 @@
+import csv
+import json
+import pickle
+import tracemalloc
+
+import pytest
+
+from adapters.base_adapter import BaseSaaSAdapter
+from core.user_export import open_writer
+from core.user_table import UserTable
+from core.job_scheduler import Job
+from main import collect_users, json_default, summarize_result, tabulate_users
+
+
+def users(count, role='Member'):
+    return [{'name': f'User {i}', 'email': f'user{i}@example.com', 'role': role} for i in range(count)]
+
+
+def test_rows_round_trip_and_interned_values():
+    records = users(3) + [{'email': 'guest@example.com', 'status': 'invited'}]
+    table = UserTable.from_users(records, adapter='notion', tenant='acme')
+
+    assert len(table) == 4
+    assert table.columns[:2] == ('adapter', 'tenant')
+    assert list(table)[0] == {'adapter': 'notion', 'tenant': 'acme', **records[0]}
+    assert list(table)[3] == {'adapter': 'notion', 'tenant': 'acme', **records[3]}
+    roles = table.column('role')
+    assert roles[0] is roles[1] is roles[2]
+
+
+def test_columns_take_less_memory_than_dicts():
+    records = [dict(user) for user in users(20000)]
+
+    tracemalloc.start()
+    dicts = [dict(user) for user in records]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    table = UserTable.from_users(records)
+    table_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(table) == len(dicts)
+    assert table_bytes < dict_bytes / 2
+
+
+def test_normalize_and_deduplicate():
+    table = UserTable.from_users([
+        {'email': ' Ada@Example.com ', 'role': ' workspace   owner'},
+        {'email': 'ada@example.com', 'role': 'Member'},
+        {'email': 'alan@example.com', 'role': 'admin'},
+        {'name': 'No Email'},
+    ], adapter='notion', tenant='acme')
+
+    result = list(table.normalized().deduplicated())
+
+    assert result == [
+        {'adapter': 'notion', 'tenant': 'acme', 'email': 'ada@example.com', 'role': 'Workspace Owner'},
+        {'adapter': 'notion', 'tenant': 'acme', 'email': 'alan@example.com', 'role': 'Admin'},
+    ]
+
+
+def test_csv_and_jsonl_exports(tmp_path):
+    table = UserTable.from_users(users(3) + [{'email': 'bare@example.com'}])
+
+    assert table.export(str(tmp_path / 'users.csv')) == 4
+    with open(tmp_path / 'users.csv', newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert rows[0] == {'name': 'User 0', 'email': 'user0@example.com', 'role': 'Member', 'last_login': '', 'status': ''}
+
+    assert table.export(str(tmp_path / 'users.out'), format='jsonl') == 4
+    with open(tmp_path / 'users.out') as file:
+        records = [json.loads(line) for line in file]
+    assert records == list(table)
+
+    with pytest.raises(ValueError):
+        table.export(str(tmp_path / 'users.xlsx'))
+
+
+def test_parquet_export_in_row_groups(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'users.parquet')
+
+    writer = open_writer(path, ['name', 'email', 'role'])
+    writer.row_group_size = 2
+    writer.write((user['name'], user['email'], user['role']) for user in users(5))
+    writer.close()
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_rows == 5
+    assert parquet.num_row_groups == 3
+
+
+def test_collect_users_across_jobs():
+    results = [
+        {'adapter': 'notion', 'tenant': 'acme', 'operation': 'extract_users', 'success': True,
+         'result': users(2) + [{'email': 'USER0@example.com'}]},
+        {'adapter': 'dropbox', 'tenant': 'acme', 'operation': 'extract_users', 'success': True, 'result': users(1)},
+        {'adapter': 'notion', 'tenant': 'beta', 'operation': 'extract_users', 'success': False, 'result': None},
+        {'adapter': 'notion', 'tenant': 'acme', 'operation': 'create_user', 'success': True, 'result': True},
+    ]
+
+    results[1]['result'] = UserTable.from_users(users(1), adapter='dropbox', tenant='acme')
+
+    table = collect_users(results)
+
+    assert [(row['adapter'], row['email']) for row in table] == [
+        ('notion', 'user0@example.com'), ('notion', 'user1@example.com'), ('dropbox', 'user0@example.com')
+    ]
+
+
+def test_finished_jobs_keep_users_as_a_table():
+    record = {'job': Job('notion', 'acme', 'extract_users'), 'success': True, 'result': users(3),
+              'error': None, 'attempts': 1, 'duration': 0.5}
+
+    tabulate_users(record)
+    summary = pickle.loads(pickle.dumps(summarize_result(record)))
+
+    assert isinstance(summary['result'], UserTable)
+    assert len(summary['result']) == 3
+    dumped = json.loads(json.dumps([summary], default=json_default))
+    assert dumped[0]['result'] == users(3)
+
+
+class StreamingAdapter(BaseSaaSAdapter):
+    name = 'fake'
+
+    def __init__(self, pages, complete=True):
+        super().__init__({}, None, None, None)
+        self.pages = pages
+        self.complete = complete
+        self.session_active = True
+
+    async def iter_users(self, cursor=None):
+        for number, page in enumerate(self.pages, 1):
+            last = number == len(self.pages) and self.complete
+            yield {'users': page, 'cursor': None if last else {'page': number}}
+
+    async def login(self, credentials):
+        return True
+
+    async def create_user(self, user_data):
+        return True
+
+    async def delete_user(self, user_identifier):
+        return True
+
+    async def update_user(self, user_identifier, updates):
+        return True
+
+
+@pytest.mark.asyncio
+async def test_export_users_streams_pages_into_the_file(tmp_path):
+    path = str(tmp_path / 'members.jsonl')
+
+    result = await StreamingAdapter([users(2), users(3)[2:]]).export_users(path)
+
+    assert result == {'path': path, 'rows': 3}
+    with open(path) as file:
+        assert [json.loads(line)['email'] for line in file] == [f'user{i}@example.com' for i in range(3)]
+
+    assert await StreamingAdapter([users(2)], complete=False).export_users(path) is False
+
+
+@pytest.mark.asyncio
+async def test_export_users_creates_directories_and_never_leaves_a_partial_file(tmp_path):
+    path = tmp_path / 'exports' / 'acme.csv'
+
+    assert await StreamingAdapter([users(2)], complete=False).export_users(str(path)) is False
+    assert list((tmp_path / 'exports').iterdir()) == []
+
+    assert await StreamingAdapter([users(2)]).export_users(str(path)) == {'path': str(path), 'rows': 2}
+    assert await StreamingAdapter([users(3)], complete=False).export_users(str(path)) is False
+    assert [p.name for p in (tmp_path / 'exports').iterdir()] == ['acme.csv']
+    assert len(path.read_text().splitlines()) == 3
+
+    assert await StreamingAdapter([users(2)]).export_users(str(tmp_path / 'members.xlsx')) is False
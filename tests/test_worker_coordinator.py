@@ -0,0 +1,99 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from core.data_extractor import DataExtractor
+from core.job_scheduler import Job, JobScheduler
+from core.worker_coordinator import WorkerCoordinator, shard_jobs
+
+
+async def fake_worker(worker_id, jobs, emit, crash_tenant):
+    """Module level so spawned worker processes can import it"""
+    async def runner(job):
+        if job.tenant == crash_tenant:
+            os._exit(3)
+        await asyncio.sleep(0.01)
+        return {'pid': os.getpid(), 'worker': worker_id}
+
+    def on_result(r):
+        emit({
+            'adapter': r['job'].adapter,
+            'tenant': r['job'].tenant,
+            'operation': r['job'].operation,
+            'success': r['success'],
+            'attempts': r['attempts'],
+            'duration': r['duration'],
+            'error': r['error'],
+            'result': r['result']
+        })
+
+    scheduler = JobScheduler(runner, {'max_retries': 0}, on_result=on_result)
+    for job in jobs:
+        scheduler.submit(job)
+    await scheduler.run()
+
+
+class FakeAIAgent:
+    async def iter_user_data(self, html_content):
+        return
+        yield
+
+
+def test_shard_jobs_keeps_tenants_together_and_balances():
+    jobs = [Job('notion', 'big', 'extract_users') for _ in range(4)]
+    jobs += [Job('notion', f'small-{i}', 'extract_users') for i in range(4)]
+    jobs += [Job('dropbox', 'big', 'extract_users')]
+
+    shards = shard_jobs(jobs, 2)
+
+    assert sorted(len(shard) for shard in shards) == [4, 5]
+    for tenant_key in {job.tenant_key for job in jobs}:
+        assert sum(any(job.tenant_key == tenant_key for job in shard) for shard in shards) == 1
+    assert len(shard_jobs(jobs[:1], 4)) == 1
+
+
+def test_coordinator_aggregates_results_from_worker_processes():
+    jobs = [Job('notion', f'tenant-{i}', 'extract_users') for i in range(6)]
+
+    results = WorkerCoordinator(fake_worker, 3, poll_interval=0.2).run(jobs, None)
+
+    assert len(results) == 6
+    assert all(r['success'] for r in results)
+    assert {r['tenant'] for r in results} == {job.tenant for job in jobs}
+    assert len({r['result']['pid'] for r in results}) == 3
+    assert os.getpid() not in {r['result']['pid'] for r in results}
+
+
+def test_jobs_of_a_crashed_worker_are_reported_as_failed():
+    jobs = [Job('notion', 'stable', 'extract_users'), Job('notion', 'crash', 'sync_users')]
+
+    results = WorkerCoordinator(fake_worker, 2, poll_interval=0.2).run(jobs, 'crash')
+
+    by_tenant = {r['tenant']: r for r in results}
+    assert by_tenant['stable']['success'] is True
+    assert by_tenant['crash']['success'] is False
+    assert by_tenant['crash']['operation'] == 'sync_users'
+    assert 'exited with code 3' in by_tenant['crash']['error']
+
+
+@pytest.mark.asyncio
+async def test_large_documents_are_parsed_in_the_executor():
+    rows = ''.join(f'<tr><td>User {i}</td><td>user{i}@example.com</td></tr>' for i in range(50))
+    html = (
+        f'<table><tr><th>Name</th><th>Email</th></tr>{rows}</table>'
+        '<div class="pagination"><a id="next" href="?page=2">Next</a></div>'
+    )
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        extractor = DataExtractor(FakeAIAgent(), parser='html.parser', executor=executor, offload_min_chars=100)
+        users = await extractor.extract_users_from_table(html)
+        pagination = extractor.extract_pagination_info(html)
+
+    assert len(users) == 50
+    assert users[0] == {'name': 'User 0', 'email': 'user0@example.com'}
+    assert pagination['has_next'] is True
+    assert pagination['next_selector'] == '#next'
+    # Nothing was parsed on the event loop
+    assert extractor._last_soup is None